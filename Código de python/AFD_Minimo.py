@@ -0,0 +1,306 @@
+from array import array
+from Clases_AFN import Particion
+
+try:
+    import numpy
+except ImportError:  # NumPy es opcional: las tablas siempre están disponibles como array
+    numpy = None
+
+# Código de tipo de array para enteros de 32 bits
+TIPO_INT32 = 'i' if array('i').itemsize == 4 else 'l'
+# Puntos de código con columna precalculada en fullmatch_lote
+LIMITE_DIRECTO = 0x10000
+
+
+class AFD:
+    # Autómata finito determinista en forma de tabla densa: tabla[estado * columnas + columna]
+    # es el estado siguiente (array int32) y aceptacion es un mapa de bits de estados finales.
+    # La tabla es completa: las transiciones inexistentes van al estado muerto (si lo hay).
+    # Las columnas son las clases de caracteres de la Particion del alfabeto, que cubre todo Unicode.
+    # En un AFD de varios patrones, etiquetas[estado] es la tupla de patrones que acepta cada estado.
+
+    def __init__(self, particion, tabla, aceptacion, num_estados, inicial=0, estado_muerto=-1, etiquetas=None):
+        self.particion = particion
+        # columnas[caracter] = columna de la tabla (se completa bajo demanda)
+        self.columnas = particion.columnas
+        self.num_columnas = particion.num_clases
+        # Texto de cada columna, para mostrar el AFD
+        self.alfabeto = particion.textos()
+        self.tabla = tabla
+        self.aceptacion = aceptacion
+        self.inicial = inicial
+        self.estado_muerto = estado_muerto
+        self.num_estados = num_estados
+        self.etiquetas = etiquetas
+        # Tablas NumPy para fullmatch_lote (se crean en el primer uso)
+        self._tablas_lote = None
+
+    def acepta(self, estado):
+        return bool(self.aceptacion[estado >> 3] >> (estado & 7) & 1)
+
+    def siguiente(self, estado, caracter):
+        # Estado siguiente al leer caracter
+        return self.tabla[estado * self.num_columnas + self.columnas[caracter]]
+
+    def fullmatch(self, texto):
+        # True si el AFD acepta el texto completo (una consulta de tabla por carácter)
+        tabla, columnas, k, muerto = self.tabla, self.columnas, self.num_columnas, self.estado_muerto
+        estado = self.inicial
+        for caracter in texto:
+            estado = tabla[estado * k + columnas[caracter]]
+            if estado == muerto:
+                return False
+        return self.acepta(estado)
+
+    def match(self, texto, inicio=0):
+        # Coincidencia más larga anclada en inicio: (inicio, fin) o None
+        tabla, columnas, k, muerto = self.tabla, self.columnas, self.num_columnas, self.estado_muerto
+        estado = self.inicial
+        mejor = inicio if self.acepta(estado) else None
+        for posicion in range(inicio, len(texto)):
+            estado = tabla[estado * k + columnas[texto[posicion]]]
+            if estado == muerto:
+                break
+            if self.acepta(estado):
+                mejor = posicion + 1
+        return None if mejor is None else (inicio, mejor)
+
+    def como_numpy(self):
+        # Vista sin copia de la tabla como matriz int32 (estados x columnas) y vector booleano de aceptación
+        if numpy is None:
+            raise ImportError("NumPy no está instalado")
+        matriz = numpy.frombuffer(self.tabla, dtype=numpy.int32).reshape(self.num_estados, self.num_columnas)
+        aceptacion = numpy.unpackbits(numpy.frombuffer(self.aceptacion, dtype=numpy.uint8), bitorder='little')
+        return matriz, aceptacion[:self.num_estados].astype(bool)
+
+    def _preparar_lote(self):
+        # Tabla con una columna extra de relleno (cada estado va a sí mismo), la columna de cada
+        # carácter del plano básico y los límites de la partición para los demás (searchsorted)
+        if self._tablas_lote is None:
+            matriz, aceptacion = self.como_numpy()
+            tabla = numpy.empty((self.num_estados, self.num_columnas + 1), dtype=numpy.int32)
+            tabla[:, :-1] = matriz
+            tabla[:, -1] = numpy.arange(self.num_estados, dtype=numpy.int32)
+            limites = numpy.array(self.particion.limites, dtype=numpy.uint32)
+            clases = numpy.array(self.particion.clases, dtype=numpy.int32)
+            # Columna directa de cada punto de código del plano básico (evita la búsqueda binaria)
+            directas = clases[numpy.searchsorted(limites, numpy.arange(LIMITE_DIRECTO, dtype=numpy.uint32), side='right') - 1]
+            self._tablas_lote = (tabla, aceptacion, limites, clases, directas)
+        return self._tablas_lote
+
+    def fullmatch_lote(self, textos, bloque=1 << 16):
+        # fullmatch de muchas cadenas a la vez: devuelve un vector booleano de NumPy.
+        # textos es una lista de str o de bytes (cada byte es un carácter, como en latin-1) o un
+        # array de NumPy de tipo 'U' o 'S'. Cada bloque de cadenas se codifica en una matriz de
+        # puntos de código (rellena hasta la más larga), se traduce a columnas de la tabla y todas
+        # las cadenas avanzan juntas un carácter por paso con un solo acceso tabla[estados, columnas].
+        if numpy is None:
+            raise ImportError("NumPy no está instalado")
+        tabla, aceptacion, limites, clases, directas = self._preparar_lote()
+        relleno = self.num_columnas
+        resultado = numpy.empty(len(textos), dtype=bool)
+        for inicio in range(0, len(textos), bloque):
+            parte = textos[inicio:inicio + bloque]
+            if isinstance(parte, numpy.ndarray):
+                matriz = parte
+                longitudes = numpy.char.str_len(parte)
+            else:
+                matriz = numpy.array(parte, dtype='S' if parte and isinstance(parte[0], bytes) else 'U')
+                longitudes = numpy.fromiter(map(len, parte), dtype=numpy.intp, count=len(parte))
+            # Puntos de código (uint8 para bytes, uint32 para str) en una matriz cadenas x caracteres
+            ancho = matriz.dtype.itemsize if matriz.dtype.kind == 'S' else matriz.dtype.itemsize // 4
+            codigos = matriz.view(numpy.uint8 if matriz.dtype.kind == 'S' else numpy.uint32)
+            codigos = codigos.reshape(len(parte), ancho)
+            if codigos.size and codigos.max() >= LIMITE_DIRECTO:
+                columnas = clases[numpy.searchsorted(limites, codigos, side='right') - 1]
+            else:
+                columnas = directas[codigos]
+            # Las posiciones después del final de cada cadena usan la columna de relleno
+            columnas[numpy.arange(ancho) >= longitudes[:, None]] = relleno
+            # Una fila por posición para que cada paso lea memoria contigua
+            columnas = numpy.ascontiguousarray(columnas.T)
+            estados = numpy.full(len(parte), self.inicial, dtype=numpy.int32)
+            for posicion in range(ancho):
+                estados = tabla[estados, columnas[posicion]]
+                if self.estado_muerto >= 0 and posicion & 15 == 15 and (estados == self.estado_muerto).all():
+                    break
+            resultado[inicio:inicio + len(parte)] = aceptacion[estados]
+        return resultado
+
+    def a_diccionario(self):
+        # Representación serializable de las tablas (para la caché y la exportación)
+        return {
+            'particion': self.particion.a_diccionario(),
+            'tabla': self.tabla.tolist(),
+            'aceptacion': bytes(self.aceptacion).hex(),
+            'num_estados': self.num_estados,
+            'inicial': self.inicial,
+            'estado_muerto': self.estado_muerto,
+            **({} if self.etiquetas is None else {'etiquetas': [list(etiqueta) for etiqueta in self.etiquetas]}),
+        }
+
+    @classmethod
+    def desde_diccionario(cls, datos):
+        # Reconstruye un AFD guardado con a_diccionario()
+        etiquetas = datos.get('etiquetas')
+        if etiquetas is not None:
+            etiquetas = [tuple(etiqueta) for etiqueta in etiquetas]
+        return cls(Particion.desde_diccionario(datos['particion']), array(TIPO_INT32, datos['tabla']), bytearray.fromhex(datos['aceptacion']),
+                   datos['num_estados'], datos['inicial'], datos['estado_muerto'], etiquetas)
+
+    def componentes(self):
+        # Devuelve (K, Σ, S, F, δ) con nombres qN para mostrarlos como el AFN; se omite el estado muerto
+        estados = [f'q{estado}' for estado in range(self.num_estados) if estado != self.estado_muerto]
+        finales = {f'q{estado}' for estado in range(self.num_estados) if self.acepta(estado)}
+        transiciones = []
+        usadas = set()
+        for estado in range(self.num_estados):
+            if estado == self.estado_muerto:
+                continue
+            for columna, simbolo in enumerate(self.alfabeto):
+                destino = self.tabla[estado * self.num_columnas + columna]
+                if destino != self.estado_muerto:
+                    transiciones.append((f'q{estado}', simbolo, f'q{destino}'))
+                    usadas.add(columna)
+        # Σ solo incluye las clases que aparecen en alguna transición (no la del resto de caracteres)
+        alfabeto = [simbolo for columna, simbolo in enumerate(self.alfabeto) if columna in usadas]
+        return estados, alfabeto, f'q{self.inicial}', finales, transiciones
+
+
+def _mapa_aceptacion(aceptados, total):
+    # Construye el mapa de bits de aceptación a partir de una lista de booleanos
+    aceptacion = bytearray((total + 7) // 8)
+    for estado, acepta in enumerate(aceptados):
+        if acepta:
+            aceptacion[estado >> 3] |= 1 << (estado & 7)
+    return aceptacion
+
+
+def determinizar(simulador, patrones=None):
+    # Construcción de subconjuntos completa a partir de un SimuladorAFN.
+    # Cada estado del AFD es un mapa de bits de estados del AFN; el conjunto vacío es el estado muerto.
+    # Con patrones (mapa de bits de estados finales de cada patrón) cada estado se etiqueta con
+    # los índices de los patrones que acepta.
+    # Hay una columna por clase de caracteres de la partición del simulador.
+    clases = range(simulador.particion.num_clases)
+    numeros = {simulador.inicial: 0}
+    mascaras = [simulador.inicial]
+    tabla = array(TIPO_INT32)
+    indice = 0
+    while indice < len(mascaras):
+        mascara = mascaras[indice]
+        for clase in clases:
+            destino = simulador.paso_clase(mascara, clase)
+            numero = numeros.get(destino)
+            if numero is None:
+                numero = numeros[destino] = len(mascaras)
+                mascaras.append(destino)
+            tabla.append(numero)
+        indice += 1
+    aceptacion = _mapa_aceptacion([bool(m & simulador.finales) for m in mascaras], len(mascaras))
+    etiquetas = None
+    if patrones is not None:
+        etiquetas = [tuple(i for i, finales in enumerate(patrones) if m & finales) for m in mascaras]
+    return AFD(simulador.particion, tabla, aceptacion, len(mascaras), 0, numeros.get(0, -1), etiquetas)
+
+
+def minimizar(afd):
+    # Minimización de Hopcroft: refina la partición {F, K - F} usando las transiciones inversas
+    # hasta que ningún bloque distinga estados. Devuelve un AFD nuevo con un estado por bloque.
+    # Si el AFD tiene etiquetas de patrones, la partición inicial agrupa los estados por etiqueta.
+    n, k = afd.num_estados, afd.num_columnas
+    tabla = afd.tabla
+
+    # inversa[c][q] = estados p con δ(p, c) = q
+    inversa = [[[] for _ in range(n)] for _ in range(k)]
+    for p in range(n):
+        base = p * k
+        for c in range(k):
+            inversa[c][tabla[base + c]].append(p)
+
+    finales = {q for q in range(n) if afd.acepta(q)}
+    if afd.etiquetas is None:
+        no_finales = set(range(n)) - finales
+        bloques = [b for b in (finales, no_finales) if b]
+    else:
+        por_etiqueta = {}
+        for q in range(n):
+            por_etiqueta.setdefault(afd.etiquetas[q], set()).add(q)
+        bloques = list(por_etiqueta.values())
+    bloque_de = [0] * n
+    for i, bloque in enumerate(bloques):
+        for q in bloque:
+            bloque_de[q] = i
+
+    # Lista de trabajo: (bloque, columna). Basta con empezar por todos los bloques menos el más grande.
+    pendientes = set()
+    if len(bloques) > 1:
+        mayor = max(range(len(bloques)), key=lambda i: len(bloques[i]))
+        pendientes = {(i, c) for i in range(len(bloques)) if i != mayor for c in range(k)}
+    elif bloques:
+        pendientes = {(0, c) for c in range(k)}
+
+    while pendientes:
+        divisor, c = pendientes.pop()
+        # Estados que con la columna c llegan al bloque divisor, agrupados por su bloque
+        afectados = {}
+        for q in bloques[divisor]:
+            for p in inversa[c][q]:
+                afectados.setdefault(bloque_de[p], set()).add(p)
+        for indice, interseccion in afectados.items():
+            bloque = bloques[indice]
+            if len(interseccion) == len(bloque):
+                continue
+            # Separa el bloque: el grupo más pequeño recibe un índice nuevo
+            resto = bloque - interseccion
+            nuevo, queda = (interseccion, resto) if len(interseccion) <= len(resto) else (resto, interseccion)
+            bloques[indice] = queda
+            bloques.append(nuevo)
+            indice_nuevo = len(bloques) - 1
+            for q in nuevo:
+                bloque_de[q] = indice_nuevo
+            # Si (bloque, columna) ya estaba pendiente, hay que procesar ambas mitades;
+            # si no, basta con la mitad más pequeña, que es la nueva
+            for columna in range(k):
+                pendientes.add((indice_nuevo, columna))
+
+    # Renumeración en orden de recorrido desde el estado inicial (estados alcanzables)
+    numero_bloque = {bloque_de[afd.inicial]: 0}
+    orden = [bloque_de[afd.inicial]]
+    nueva_tabla = array(TIPO_INT32)
+    indice = 0
+    while indice < len(orden):
+        representante = next(iter(bloques[orden[indice]]))
+        for c in range(k):
+            destino = bloque_de[tabla[representante * k + c]]
+            numero = numero_bloque.get(destino)
+            if numero is None:
+                numero = numero_bloque[destino] = len(orden)
+                orden.append(destino)
+            nueva_tabla.append(numero)
+        indice += 1
+    aceptados = [next(iter(bloques[b])) in finales for b in orden]
+    aceptacion = _mapa_aceptacion(aceptados, len(orden))
+
+    # El estado muerto es el bloque que no acepta y solo se transiciona a sí mismo
+    estado_muerto = -1
+    for numero in range(len(orden)):
+        if not aceptados[numero] and all(nueva_tabla[numero * k + c] == numero for c in range(k)):
+            estado_muerto = numero
+            break
+    etiquetas = None
+    if afd.etiquetas is not None:
+        etiquetas = [afd.etiquetas[next(iter(bloques[b]))] for b in orden]
+    # El estado muerto va al final para que los estados mostrados queden numerados sin huecos
+    ultimo = len(orden) - 1
+    if 0 < estado_muerto < ultimo:
+        cambio = {estado_muerto: ultimo, ultimo: estado_muerto}
+        filas = [nueva_tabla[numero * k:(numero + 1) * k] for numero in range(len(orden))]
+        filas[estado_muerto], filas[ultimo] = filas[ultimo], filas[estado_muerto]
+        nueva_tabla = array(TIPO_INT32, (cambio.get(destino, destino) for fila in filas for destino in fila))
+        aceptados[estado_muerto], aceptados[ultimo] = aceptados[ultimo], aceptados[estado_muerto]
+        aceptacion = _mapa_aceptacion(aceptados, len(orden))
+        if etiquetas is not None:
+            etiquetas[estado_muerto], etiquetas[ultimo] = etiquetas[ultimo], etiquetas[estado_muerto]
+        estado_muerto = ultimo
+    return AFD(afd.particion, nueva_tabla, aceptacion, len(orden), 0, estado_muerto, etiquetas)
@@ -0,0 +1,218 @@
+import sys
+from collections import OrderedDict
+
+# Costo aproximado en bytes de un estado del AFD y de cada transición guardada
+COSTO_ESTADO = 200
+COSTO_TRANSICION = 80
+
+
+class EstadoAFD:
+    # Estado del AFD: un conjunto de estados del AFN (mapa de bits) con sus transiciones ya calculadas
+    __slots__ = ('mascara', 'anclado', 'acepta', 'siguientes', 'valido', 'costo')
+
+    def __init__(self, mascara, anclado, acepta, costo):
+        self.mascara = mascara
+        self.anclado = anclado
+        self.acepta = acepta
+        self.siguientes = {}
+        self.valido = True
+        self.costo = costo
+
+
+class AFDPerezoso:
+    # Construcción de subconjuntos bajo demanda sobre un SimuladorAFN: los estados del AFD se
+    # crean la primera vez que la entrada los alcanza y se guardan en una caché LRU con un
+    # presupuesto de memoria. Con entradas repetitivas casi todo el texto se procesa con una
+    # consulta de diccionario por carácter. Si la caché se desaloja demasiado (thrashing),
+    # la llamada en curso continúa con la simulación del AFN.
+
+    def __init__(self, simulador, limite_memoria=4 * 1024 * 1024, proporcion_desalojos=0.1, minimo_caracteres=256):
+        self.simulador = simulador
+        self.limite_memoria = limite_memoria
+        # Si en una llamada hay más de proporcion_desalojos desalojos por carácter (tras
+        # minimo_caracteres), se abandona el AFD y se simula el AFN
+        self.proporcion_desalojos = proporcion_desalojos
+        self.minimo_caracteres = minimo_caracteres
+        self.cache = OrderedDict()
+        self.memoria_usada = 0
+        # Contadores de la caché
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.retrocesos_afn = 0
+
+    @classmethod
+    def desde_afn(cls, afn, **opciones):
+        return cls(afn.crear_simulador(), **opciones)
+
+    def estadisticas(self):
+        # Contadores de aciertos, fallos, desalojos y retrocesos a la simulación del AFN
+        return {
+            'estados': len(self.cache),
+            'memoria_usada': self.memoria_usada,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'retrocesos_afn': self.retrocesos_afn,
+        }
+
+    def limpiar(self):
+        # Vacía la caché (los contadores se conservan)
+        for estado in self.cache.values():
+            estado.valido = False
+            estado.siguientes = {}
+        self.cache.clear()
+        self.memoria_usada = 0
+
+    def _estado(self, mascara, anclado):
+        # Obtiene (o crea) el estado del AFD para un conjunto de estados del AFN
+        clave = (mascara, anclado)
+        estado = self.cache.get(clave)
+        if estado is not None:
+            self.cache.move_to_end(clave)
+            return estado
+        costo = COSTO_ESTADO + sys.getsizeof(mascara)
+        estado = EstadoAFD(mascara, anclado, bool(mascara & self.simulador.finales), costo)
+        self.cache[clave] = estado
+        self.memoria_usada += costo
+        self._desalojar(estado)
+        return estado
+
+    def _desalojar(self, protegido):
+        # Libera los estados menos usados hasta respetar el presupuesto de memoria
+        while self.memoria_usada > self.limite_memoria and len(self.cache) > 1:
+            clave, estado = next(iter(self.cache.items()))
+            if estado is protegido:
+                self.cache.move_to_end(clave)
+                continue
+            del self.cache[clave]
+            self.memoria_usada -= estado.costo
+            # Las transiciones que apuntan a un estado inválido se resuelven de nuevo por la caché
+            estado.valido = False
+            estado.siguientes = {}
+            self.desalojos += 1
+
+    def _siguiente(self, estado, clase):
+        # Calcula la transición que falta y la guarda en el estado
+        self.fallos += 1
+        if not estado.valido:
+            estado = self._estado(estado.mascara, estado.anclado)
+        mascara = self.simulador.paso_clase(estado.mascara, clase)
+        if not estado.anclado:
+            mascara |= self.simulador.inicial
+        destino = self._estado(mascara, estado.anclado)
+        if estado.valido:
+            estado.siguientes[clase] = destino
+            estado.costo += COSTO_TRANSICION
+            self.memoria_usada += COSTO_TRANSICION
+            self._desalojar(destino)
+        return destino
+
+    def _recorrer(self, texto, inicio, anclado, hasta_aceptar=False):
+        # Recorre el texto desde inicio y devuelve la última posición donde el autómata aceptaba
+        # (o la primera, si hasta_aceptar), o None si nunca aceptó
+        estado = self._estado(self.simulador.inicial, anclado)
+        ultima = inicio if estado.acepta else None
+        if ultima is not None and hasta_aceptar:
+            return ultima
+        desalojos_iniciales = self.desalojos
+        columnas = self.simulador.columnas
+        posicion = inicio
+        longitud = len(texto)
+        while posicion < longitud:
+            # Las transiciones se guardan por clase de caracteres, no por carácter
+            clase = columnas[texto[posicion]]
+            destino = estado.siguientes.get(clase)
+            if destino is None or not destino.valido:
+                destino = self._siguiente(estado, clase)
+                procesados = posicion - inicio + 1
+                if (procesados >= self.minimo_caracteres and
+                        self.desalojos - desalojos_iniciales > self.proporcion_desalojos * procesados):
+                    # La caché no da abasto: el resto de la entrada se simula con el AFN
+                    self.retrocesos_afn += 1
+                    return self._recorrer_afn(texto, posicion + 1, destino.mascara, anclado, ultima, hasta_aceptar)
+            else:
+                self.aciertos += 1
+                if destino is not estado:
+                    self.cache.move_to_end((destino.mascara, anclado))
+            estado = destino
+            posicion += 1
+            if estado.acepta:
+                ultima = posicion
+                if hasta_aceptar:
+                    return ultima
+            elif anclado and not estado.mascara:
+                break
+        return ultima
+
+    def _recorrer_afn(self, texto, posicion, mascara, anclado, ultima, hasta_aceptar):
+        # Continúa el recorrido simulando el AFN directamente sobre mapas de bits
+        simulador = self.simulador
+        if mascara & simulador.finales:
+            ultima = posicion
+            if hasta_aceptar:
+                return ultima
+        for indice in range(posicion, len(texto)):
+            mascara = simulador.paso(mascara, texto[indice])
+            if not anclado:
+                mascara |= simulador.inicial
+            if mascara & simulador.finales:
+                ultima = indice + 1
+                if hasta_aceptar:
+                    return ultima
+            elif anclado and not mascara:
+                break
+        return ultima
+
+    def fullmatch(self, texto):
+        # True si el autómata acepta el texto completo
+        return self._recorrer(texto, 0, True) == len(texto)
+
+    def match(self, texto, inicio=0):
+        # Coincidencia más larga anclada en inicio: (inicio, fin) o None
+        fin = self._recorrer(texto, inicio, True)
+        return None if fin is None else (inicio, fin)
+
+    def contiene(self, texto, inicio=0):
+        # True si alguna subcadena desde inicio es aceptada (AFD no anclado, se detiene en la primera)
+        return self._recorrer(texto, inicio, False, hasta_aceptar=True) is not None
+
+    def search(self, texto, inicio=0):
+        # Primera coincidencia (más a la izquierda y más larga). El AFD no anclado descarta
+        # rápido los textos sin coincidencias; si hay alguna, se localiza con el simulador.
+        # Con prefijos literales el simulador ya salta a los candidatos con str.find; con solo
+        # subcadenas requeridas, str.find descarta los textos que no las tienen y el resto pasa
+        # igualmente por el AFD no anclado.
+        prefiltro = self.simulador.prefiltro
+        if prefiltro is not None:
+            if prefiltro.prefijos:
+                return self.simulador.search(texto, inicio)
+            if not prefiltro.posible(texto, inicio):
+                return None
+        if not self.contiene(texto, inicio):
+            return None
+        return self.simulador.search(texto, inicio)
+
+    def fines(self, fragmentos, posicion=0):
+        # Genera la posición (absoluta, contando desde posicion) donde termina cada coincidencia en un
+        # flujo de fragmentos de texto, con el AFD no anclado. El estado del AFD pasa de un fragmento
+        # al siguiente, así que las coincidencias que cruzan el borde se detectan igual, y la memoria
+        # solo depende de la caché de estados, no del tamaño de la entrada.
+        estado = self._estado(self.simulador.inicial, False)
+        if estado.acepta:
+            yield posicion
+        columnas = self.simulador.columnas
+        for texto in fragmentos:
+            for caracter in texto:
+                clase = columnas[caracter]
+                destino = estado.siguientes.get(clase)
+                if destino is None or not destino.valido:
+                    destino = self._siguiente(estado, clase)
+                else:
+                    self.aciertos += 1
+                    if destino is not estado:
+                        self.cache.move_to_end((destino.mascara, False))
+                estado = destino
+                posicion += 1
+                if estado.acepta:
+                    yield posicion
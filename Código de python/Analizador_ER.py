@@ -0,0 +1,283 @@
+from Clases_AFN import ConjuntoSimbolos
+
+# Analizador de una sola pasada para las expresiones regulares del proyecto.
+# Reemplaza la cadena balanceoParentesis -> insertar_concatenacion -> cambiar_a_postfijo:
+# en un único recorrido lineal valida los paréntesis, inserta las concatenaciones implícitas,
+# aplica las precedencias (Shunting Yard) y produce el postfijo como lista de tokens.
+# Las clases de caracteres ([a-z], [^0-9], [^] para cualquier carácter) son un solo token
+# ConjuntoSimbolos; '.' sigue siendo la concatenación explícita y '^' la cadena vacía.
+# Las repeticiones acotadas (a{3}, (ab){2,50}, a{2,}, a{,4}) son un solo token posfijo Repeticion.
+
+# Operadores unarios posfijos, binarios y sus precedencias (las mismas de cambiar_a_postfijo)
+OPERADORES_POSFIJOS = {'*', '+', '?'}
+OPERADORES_BINARIOS = {'|', ',', '.'}
+PRECEDENCIAS = {'*': 3, '+': 3, '?': 3, '^': 3, '.': 2, '|': 1, ',': 1}
+CONCATENACION = '.'
+# Cota máxima aceptada en una repetición {m,n}
+MAXIMO_REPETICION = 100000
+# Máximo de caracteres de la expresión con las repeticiones expandidas: las repeticiones anidadas
+# se multiplican (((a{1000}){1000}){1000} son mil millones de copias de a) aunque cada una sea válida
+MAXIMO_EXPANSION = 1000000
+
+
+class ErrorSintaxis(ValueError):
+    # Error de sintaxis en la expresión regular con la posición (índice desde 0) donde se detectó
+
+    def __init__(self, mensaje, posicion):
+        super().__init__(f"{mensaje} en la posición {posicion}")
+        self.posicion = posicion
+
+    def senalar(self, expresion):
+        # Devuelve la expresión con una marca debajo de la posición del error
+        return f"{expresion}\n{' ' * self.posicion}^"
+
+
+class Repeticion:
+    # Token posfijo de repetición acotada: entre minimo y maximo veces (maximo None = sin límite)
+    __slots__ = ('minimo', 'maximo')
+
+    def __init__(self, minimo, maximo):
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def __eq__(self, otro):
+        if not isinstance(otro, Repeticion):
+            return NotImplemented
+        return self.minimo == otro.minimo and self.maximo == otro.maximo
+
+    def __hash__(self):
+        return hash((Repeticion, self.minimo, self.maximo))
+
+    def __str__(self):
+        if self.maximo == self.minimo:
+            return f'{{{self.minimo}}}'
+        return f"{{{self.minimo},{'' if self.maximo is None else self.maximo}}}"
+
+    def __repr__(self):
+        return f'Repeticion{self}'
+
+
+def leer_repeticion(expresion, inicio):
+    # Lee la repetición que empieza con '{' en inicio: {m}, {m,n}, {m,} o {,n}.
+    # Devuelve (Repeticion, posición siguiente a '}').
+    fin = expresion.find('}', inicio)
+    if fin < 0:
+        raise ErrorSintaxis("Repetición sin cerrar", inicio)
+    partes = expresion[inicio + 1:fin].split(',')
+    if len(partes) > 2 or not all(parte == '' or parte.isdigit() for parte in partes) or not any(partes):
+        raise ErrorSintaxis("Repetición inválida: se espera {m}, {m,n}, {m,} o {,n}", inicio)
+    minimo = int(partes[0]) if partes[0] else 0
+    if len(partes) == 1:
+        maximo = minimo
+    else:
+        maximo = int(partes[1]) if partes[1] else None
+    if maximo is not None and maximo < minimo:
+        raise ErrorSintaxis("Repetición con mínimo mayor que el máximo", inicio)
+    if max(minimo, maximo or 0) > MAXIMO_REPETICION:
+        raise ErrorSintaxis(f"Repetición mayor que {MAXIMO_REPETICION}", inicio)
+    return Repeticion(minimo, maximo), fin + 1
+
+
+def leer_clase(expresion, inicio):
+    # Lee la clase de caracteres que empieza con '[' en inicio. Dentro de la clase '\' escapa el
+    # carácter siguiente y 'a-z' es un rango; '[^...]' es el complemento y '[^]' cualquier carácter.
+    # Devuelve (ConjuntoSimbolos, posición siguiente a ']').
+    posicion = inicio + 1
+    negada = posicion < len(expresion) and expresion[posicion] == '^'
+    if negada:
+        posicion += 1
+    rangos = []
+
+    def leer_caracter():
+        nonlocal posicion
+        if expresion[posicion] == '\\':
+            posicion += 1
+            if posicion >= len(expresion):
+                raise ErrorSintaxis("Escape sin carácter", posicion - 1)
+        caracter = expresion[posicion]
+        posicion += 1
+        return caracter
+
+    while True:
+        if posicion >= len(expresion):
+            raise ErrorSintaxis("Clase de caracteres sin cerrar", inicio)
+        if expresion[posicion] == ']':
+            break
+        desde = posicion
+        primero = leer_caracter()
+        ultimo = primero
+        if posicion + 1 < len(expresion) and expresion[posicion] == '-' and expresion[posicion + 1] != ']':
+            posicion += 1
+            ultimo = leer_caracter()
+            if ord(ultimo) < ord(primero):
+                raise ErrorSintaxis(f"Rango invertido '{primero}-{ultimo}'", desde)
+        rangos.append((ord(primero), ord(ultimo) + 1))
+    if not rangos and not negada:
+        raise ErrorSintaxis("Clase de caracteres vacía", inicio)
+    conjunto = ConjuntoSimbolos(rangos)
+    return (conjunto.complemento() if negada else conjunto), posicion + 1
+
+
+def simbolo_desde_texto(texto):
+    # Símbolo de una transición a partir de su texto (inverso de str): un carácter o una clase
+    if len(texto) > 1 and texto[0] == '[':
+        return leer_clase(texto, 0)[0]
+    return texto
+
+
+def analizar(expresion, alfabeto=None):
+    # Devuelve el postfijo de la expresión como lista de tokens: caracteres, operadores,
+    # ConjuntoSimbolos para las clases y Repeticion para {m,n}. Una clase de un solo carácter
+    # del alfabeto se reduce a él.
+    # Lanza ErrorSintaxis si hay paréntesis desbalanceados, grupos vacíos, operadores sin operandos,
+    # si la expresión con las repeticiones expandidas supera MAXIMO_EXPANSION caracteres o, si se
+    # indica el alfabeto, símbolos que no pertenecen a él.
+    salida = []
+    pila = []           # Operadores pendientes; los paréntesis se guardan como ('(', posicion)
+    hay_operando = False  # True si lo último leído termina un operando (concatenación implícita)
+    agregar = salida.append
+    # Solo las repeticiones agrandan la expresión al expandirse. Si hay alguna, se lleva el tamaño
+    # (símbolos, con sus repeticiones expandidas) de cada operando ya emitido a la salida, en una
+    # pila paralela al postfijo, y cuántos símbolos agregan las copias de las repeticiones.
+    tamanos = [] if '{' in expresion else None
+    copiados = 0
+
+    def sacar_operador():
+        # Pasa el operador binario del tope de la pila a la salida; une los tamaños de sus operandos
+        agregar(pila.pop())
+        if tamanos is not None:
+            derecho = tamanos.pop()
+            tamanos[-1] += derecho
+
+    def apilar_binario(operador):
+        # Shunting Yard: saca los operadores de mayor o igual precedencia antes de apilar
+        precedencia = PRECEDENCIAS[operador]
+        while pila and pila[-1] != '(' and PRECEDENCIAS[pila[-1]] >= precedencia:
+            sacar_operador()
+        pila.append(operador)
+
+    posiciones_parentesis = []
+    posicion = 0
+    while posicion < len(expresion):
+        caracter = expresion[posicion]
+        if caracter == '[':
+            # Clase de caracteres: un solo operando
+            conjunto, siguiente = leer_clase(expresion, posicion)
+            if hay_operando:
+                apilar_binario(CONCATENACION)
+            rangos = conjunto.rangos
+            if (alfabeto is not None and len(rangos) == 1 and rangos[0][1] - rangos[0][0] == 1
+                    and chr(rangos[0][0]) in alfabeto):
+                agregar(chr(rangos[0][0]))
+            else:
+                agregar(conjunto)
+            if tamanos is not None:
+                tamanos.append(1)
+            hay_operando = True
+            posicion = siguiente
+            continue
+        if caracter == '{':
+            # Repetición acotada: posfija, igual que '*', '+' y '?'
+            if not hay_operando:
+                raise ErrorSintaxis("Operador '{' sin operando", posicion)
+            repeticion, siguiente = leer_repeticion(expresion, posicion)
+            # El operando se copia maximo veces (minimo + 1 si no hay máximo)
+            copias = max(repeticion.minimo + 1 if repeticion.maximo is None else repeticion.maximo, 1)
+            copiados += tamanos[-1] * (copias - 1)
+            tamanos[-1] *= copias
+            if len(expresion) + copiados > MAXIMO_EXPANSION:
+                raise ErrorSintaxis(f"La expresión expandida supera {MAXIMO_EXPANSION} caracteres", posicion)
+            agregar(repeticion)
+            posicion = siguiente
+            continue
+        if caracter == '}':
+            raise ErrorSintaxis("Llave de cierre sin apertura", posicion)
+        if caracter in OPERADORES_POSFIJOS:
+            if not hay_operando:
+                raise ErrorSintaxis(f"Operador '{caracter}' sin operando", posicion)
+            # Los posfijos tienen la mayor precedencia: se aplican de inmediato al operando anterior
+            agregar(caracter)
+        elif caracter in OPERADORES_BINARIOS:
+            if not hay_operando:
+                raise ErrorSintaxis(f"Operador '{caracter}' sin operando izquierdo", posicion)
+            apilar_binario(caracter)
+            hay_operando = False
+        elif caracter == '(':
+            if hay_operando:
+                apilar_binario(CONCATENACION)
+            pila.append('(')
+            posiciones_parentesis.append(posicion)
+            hay_operando = False
+        elif caracter == ')':
+            if not posiciones_parentesis:
+                raise ErrorSintaxis("Paréntesis de cierre sin apertura", posicion)
+            if not hay_operando:
+                raise ErrorSintaxis("Grupo vacío u operador sin operando derecho", posicion)
+            while pila[-1] != '(':
+                sacar_operador()
+            pila.pop()
+            posiciones_parentesis.pop()
+            hay_operando = True
+        else:
+            # Símbolo del alfabeto o '^' (cadena vacía): ambos son operandos
+            if alfabeto is not None and caracter != '^' and caracter not in alfabeto:
+                raise ErrorSintaxis(f"Símbolo '{caracter}' fuera del alfabeto", posicion)
+            if hay_operando:
+                apilar_binario(CONCATENACION)
+            agregar(caracter)
+            if tamanos is not None:
+                tamanos.append(1)
+            hay_operando = True
+        posicion += 1
+
+    if posiciones_parentesis:
+        raise ErrorSintaxis("Paréntesis sin cerrar", posiciones_parentesis[-1])
+    if not hay_operando:
+        raise ErrorSintaxis("Falta un operando", len(expresion))
+    while pila:
+        sacar_operador()
+    return salida
+
+
+def expandir_repeticiones(postfijo):
+    # Reescribe cada Repeticion del postfijo con copias de su operando y los operadores básicos:
+    # X{m,n} = X...X (m veces) seguido de (n-m) copias opcionales anidadas X(X(X)?)?,
+    # X{m,} = X...X X* y X{0,0} = ^. Sirve a las construcciones que necesitan una posición
+    # por aparición de cada símbolo (Glushkov); Thompson clona el fragmento ya construido.
+    salida = []
+    inicios = []    # Índice en salida donde empieza cada operando de la pila
+    for token in postfijo:
+        if isinstance(token, Repeticion):
+            inicio = inicios[-1]
+            operando = salida[inicio:]
+            del salida[inicio:]
+            minimo, maximo = token.minimo, token.maximo
+            for indice in range(minimo):
+                salida.extend(operando)
+                if indice:
+                    salida.append(CONCATENACION)
+            if maximo is None:
+                salida.extend(operando)
+                salida.append('*')
+                if minimo:
+                    salida.append(CONCATENACION)
+            elif maximo > minimo:
+                opcionales = maximo - minimo
+                for _ in range(opcionales):
+                    salida.extend(operando)
+                salida.append('?')
+                for _ in range(opcionales - 1):
+                    salida.extend((CONCATENACION, '?'))
+                if minimo:
+                    salida.append(CONCATENACION)
+            elif minimo == 0:
+                salida.append('^')
+        elif isinstance(token, str) and token in OPERADORES_BINARIOS:
+            inicios.pop()
+            salida.append(token)
+        elif isinstance(token, str) and token in OPERADORES_POSFIJOS:
+            salida.append(token)
+        else:
+            inicios.append(len(salida))
+            salida.append(token)
+    return salida
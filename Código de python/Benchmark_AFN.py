@@ -0,0 +1,222 @@
+import json
+import math
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from Conversion_ER_AFN import ExpresionRegularAFN
+from Renderizado_AFN import RenderizadorPasos, MODO_APAGADO, MODOS
+
+# Símbolos de las expresiones sintéticas
+LETRAS = 'abcdefghij'
+# Un tiempo que crece más rápido que longitud ** EXPONENTE_ALERTA se marca como posible regresión
+EXPONENTE_ALERTA = 1.5
+
+
+def generar_expresion(longitud, profundidad=2, anchura=2, densidad=0.3, semilla=0):
+    # Expresión regular sintética con alrededor de `longitud` símbolos del alfabeto:
+    # profundidad = niveles máximos de paréntesis anidados, anchura = ramas de cada alternativa,
+    # densidad = probabilidad de que un símbolo o grupo lleve '*', '+' o '?'.
+    # La misma semilla produce siempre la misma expresión.
+    generador = random.Random(semilla)
+    return _generar(generador, max(1, longitud), profundidad, anchura, densidad)
+
+
+def _generar(generador, simbolos, profundidad, anchura, densidad):
+    ramas = max(1, min(anchura, simbolos))
+    partes = []
+    for rama in range(ramas):
+        # Reparte los símbolos entre las ramas de la alternativa
+        presupuesto = simbolos // ramas + (1 if rama < simbolos % ramas else 0)
+        pieza = []
+        while presupuesto > 0:
+            if profundidad > 0 and presupuesto > 1 and generador.random() < 0.5:
+                parte = generador.randint(2, presupuesto)
+                texto = '(' + _generar(generador, parte, profundidad - 1, anchura, densidad) + ')'
+                presupuesto -= parte
+            else:
+                texto = generador.choice(LETRAS)
+                presupuesto -= 1
+            if generador.random() < densidad:
+                texto += generador.choice('*+?')
+            pieza.append(texto)
+        partes.append(''.join(pieza))
+    return '|'.join(partes)
+
+
+def _cronometrar(funcion, repeticiones):
+    # Mejor tiempo (segundos) de varias ejecuciones y el resultado de la última
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor, resultado
+
+
+def medir(expresion, repeticiones=3, modo_render=MODO_APAGADO):
+    # Tiempos de cada etapa del pipeline, memoria pico y tamaño del AFN para una expresión.
+    # Con un modo de render distinto de 'apagado' la conversión registra la traza y además se mide
+    # el tiempo de generar las imágenes (proyeccion_grafica_paso_a_paso) hasta que terminan.
+    tiempos = {}
+    base = ExpresionRegularAFN(expresion, RenderizadorPasos(MODO_APAGADO))
+    tiempos['insertar_concatenacion'], _ = _cronometrar(lambda: base.insertar_concatenacion(expresion), repeticiones)
+    tiempos['cambiar_a_postfijo'], _ = _cronometrar(lambda: base.cambiar_a_postfijo(expresion), repeticiones)
+
+    def analizar():
+        automata = ExpresionRegularAFN(expresion, RenderizadorPasos(MODO_APAGADO))
+        automata.obtener_postfijo()
+        return automata
+    tiempos['analizar'], _ = _cronometrar(analizar, repeticiones)
+
+    resultado = {'expresion_longitud': len(expresion), 'modo_render': modo_render, 'tiempos': tiempos}
+    with tempfile.TemporaryDirectory() as directorio:
+        # Solo se cronometra la conversión: el análisis se hace antes, fuera de la medición
+        mejor = None
+        for _ in range(repeticiones):
+            renderizador = RenderizadorPasos(modo_render, directorio=directorio)
+            automata = ExpresionRegularAFN(expresion, renderizador)
+            automata.obtener_postfijo()
+            inicio = time.perf_counter()
+            automata.conversion_a_afn()
+            transcurrido = time.perf_counter() - inicio
+            mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+            if renderizador.activo:
+                inicio = time.perf_counter()
+                try:
+                    imagenes = len(renderizador.cerrar())
+                except Exception as error:  # Graphviz no instalado, dot ausente, etc.
+                    resultado['error_render'] = f"{type(error).__name__}: {error}"
+                    imagenes = None
+                renderizado = time.perf_counter() - inicio
+                tiempos['renderizado'] = renderizado if 'renderizado' not in tiempos else min(tiempos['renderizado'], renderizado)
+                resultado['imagenes'] = imagenes
+        tiempos['conversion_a_afn'] = mejor
+
+    resultado['estados'] = len(automata.numeros_estados())
+    resultado['aristas'] = len(automata.transiciones)
+
+    # Memoria pico de análisis + conversión en una ejecución aparte (tracemalloc altera los tiempos)
+    tracemalloc.start()
+    try:
+        automata = ExpresionRegularAFN(expresion, RenderizadorPasos(MODO_APAGADO))
+        automata.conversion_a_afn()
+        resultado['memoria_pico'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return resultado
+
+
+def exponente(puntos):
+    # Pendiente de la recta de mínimos cuadrados en escala log-log: ~1 es lineal, ~2 cuadrático
+    puntos = [(math.log(x), math.log(y)) for x, y in puntos if x > 0 and y > 0]
+    if len(puntos) < 2:
+        return None
+    media_x = sum(x for x, _ in puntos) / len(puntos)
+    media_y = sum(y for _, y in puntos) / len(puntos)
+    varianza = sum((x - media_x) ** 2 for x, _ in puntos)
+    if varianza == 0:
+        return None
+    return sum((x - media_x) * (y - media_y) for x, y in puntos) / varianza
+
+
+def ejecutar_suite(longitudes, profundidad=2, anchura=2, densidad=0.3, semilla=0, repeticiones=3,
+                   modos_render=(MODO_APAGADO,)):
+    # Mide una curva de escalado: una expresión sintética por longitud y modo de render.
+    # Devuelve un diccionario serializable con los parámetros, el entorno, los resultados y el
+    # exponente de crecimiento de cada etapa (ver exponente).
+    resultados = []
+    for modo in modos_render:
+        for longitud in longitudes:
+            expresion = generar_expresion(longitud, profundidad, anchura, densidad, semilla)
+            medicion = medir(expresion, repeticiones, modo)
+            medicion['longitud'] = longitud
+            resultados.append(medicion)
+
+    exponentes = {}
+    for modo in modos_render:
+        propios = [medicion for medicion in resultados if medicion['modo_render'] == modo]
+        # Las curvas usan la longitud real de cada expresión (con paréntesis y operadores)
+        curvas = {}
+        for medicion in propios:
+            for etapa, segundos in medicion['tiempos'].items():
+                curvas.setdefault(etapa, []).append((medicion['expresion_longitud'], segundos))
+        curvas['memoria_pico'] = [(medicion['expresion_longitud'], medicion['memoria_pico']) for medicion in propios]
+        curvas['aristas'] = [(medicion['expresion_longitud'], medicion['aristas']) for medicion in propios]
+        exponentes[modo] = {nombre: exponente(puntos) for nombre, puntos in curvas.items()}
+
+    return {
+        'parametros': {
+            'longitudes': list(longitudes), 'profundidad': profundidad, 'anchura': anchura,
+            'densidad': densidad, 'semilla': semilla, 'repeticiones': repeticiones,
+            'modos_render': list(modos_render),
+        },
+        'entorno': {'python': sys.version.split()[0], 'plataforma': platform.platform()},
+        'resultados': resultados,
+        'exponentes': exponentes,
+    }
+
+
+def comparar(actual, anterior, tolerancia=0.25):
+    # Compara dos ejecuciones con los mismos parámetros. Devuelve una lista de avisos: etapas
+    # cuyo tiempo creció más que la tolerancia y curvas que pasan a crecer de forma superlineal.
+    avisos = []
+    previos = {(medicion['modo_render'], medicion['longitud']): medicion for medicion in anterior['resultados']}
+    for medicion in actual['resultados']:
+        previa = previos.get((medicion['modo_render'], medicion['longitud']))
+        if previa is None:
+            continue
+        for etapa, segundos in medicion['tiempos'].items():
+            antes = previa['tiempos'].get(etapa)
+            if antes and segundos > antes * (1 + tolerancia):
+                avisos.append(f"{medicion['modo_render']} longitud {medicion['longitud']}: {etapa} "
+                              f"{antes * 1000:.2f} ms -> {segundos * 1000:.2f} ms")
+    for modo, curvas in actual['exponentes'].items():
+        for nombre, valor in curvas.items():
+            antes = anterior.get('exponentes', {}).get(modo, {}).get(nombre)
+            if valor is not None and valor > EXPONENTE_ALERTA and (antes is None or antes <= EXPONENTE_ALERTA):
+                avisos.append(f"{modo}: {nombre} crece con exponente {valor:.2f} (antes {antes})")
+    return avisos
+
+
+def ejecutar_cli(argumentos=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark de la conversión de expresiones regulares a AFN.")
+    parser.add_argument('--longitudes', type=int, nargs='+', default=[100, 200, 400, 800, 1600],
+                        help="símbolos de cada expresión sintética (por defecto 100 200 400 800 1600)")
+    parser.add_argument('--profundidad', type=int, default=2, help="anidamiento máximo de paréntesis")
+    parser.add_argument('--anchura', type=int, default=2, help="ramas de cada alternativa")
+    parser.add_argument('--densidad', type=float, default=0.3, help="probabilidad de '*', '+' o '?' tras cada símbolo o grupo")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=3, help="se guarda el mejor tiempo de N ejecuciones")
+    parser.add_argument('--render', nargs='+', choices=sorted(MODOS), default=[MODO_APAGADO], metavar='MODO',
+                        help="modos de render a medir (apagado, final, cada_n, todos)")
+    parser.add_argument('--salida', metavar='ARCHIVO', help="archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument('--comparar', metavar='ARCHIVO', help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="aumento de tiempo tolerado al comparar (0.25 = 25%%)")
+    opciones = parser.parse_args(argumentos)
+
+    informe = ejecutar_suite(opciones.longitudes, opciones.profundidad, opciones.anchura, opciones.densidad,
+                             opciones.semilla, opciones.repeticiones, opciones.render)
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto + '\n')
+    else:
+        print(texto)
+
+    if opciones.comparar:
+        with open(opciones.comparar, encoding='utf-8') as archivo:
+            avisos = comparar(informe, json.load(archivo), opciones.tolerancia)
+        for aviso in avisos:
+            print(f"Regresión: {aviso}", file=sys.stderr)
+        return 1 if avisos else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(ejecutar_cli())
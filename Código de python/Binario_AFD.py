@@ -0,0 +1,93 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from AFD_Minimo import AFD, TIPO_INT32
+from Clases_AFN import Particion
+
+# Formato binario de un AFD (little-endian):
+#   cabecera   : magia 'AFDB', versión u16, reservado u16, estados u32, columnas u32,
+#                inicial i32, estado muerto i32, longitud del mapa de columnas u32
+#   columnas   : partición del alfabeto en JSON UTF-8 ({"limites", "clases", "num_clases"}: el intervalo
+#                de puntos de código que empieza en limites[i] es la columna clases[i]), con relleno hasta múltiplo de 4
+#   tabla      : estados * columnas enteros int32
+#   aceptacion : mapa de bits de estados finales, (estados + 7) // 8 bytes
+MAGIA = b'AFDB'
+VERSION_BINARIO = 2
+CABECERA = struct.Struct('<4sHHIIiiI')
+
+
+def _relleno(longitud):
+    return (-longitud) % 4
+
+
+def guardar_binario(afd, ruta):
+    # Escribe el AFD en el formato binario plano
+    if afd.etiquetas is not None:
+        raise ValueError("El formato binario no guarda las etiquetas de un AFD de varios patrones")
+    columnas = json.dumps(afd.particion.a_diccionario(), separators=(',', ':')).encode('utf-8')
+    tabla = array(TIPO_INT32, afd.tabla)
+    if sys.byteorder != 'little':
+        tabla.byteswap()
+    with open(ruta, 'wb') as archivo:
+        archivo.write(CABECERA.pack(MAGIA, VERSION_BINARIO, 0, afd.num_estados, afd.num_columnas,
+                                    afd.inicial, afd.estado_muerto, len(columnas)))
+        archivo.write(columnas + b'\0' * _relleno(len(columnas)))
+        archivo.write(tabla.tobytes())
+        archivo.write(bytes(afd.aceptacion))
+
+
+class AFDMapeado(AFD):
+    # AFD cuya tabla y mapa de aceptación son vistas (memoryview) sobre un archivo mapeado en memoria.
+    # No se copia nada al cargar: varios procesos que abren el mismo archivo comparten las páginas.
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, 'rb')
+        self.mapa = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self.mapa)
+        magia, version, _, num_estados, num_columnas, inicial, estado_muerto, longitud = CABECERA.unpack_from(vista)
+        if magia != MAGIA:
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un AFD binario")
+        if version != VERSION_BINARIO:
+            self.cerrar()
+            raise ValueError(f"Versión de AFD binario no soportada: {version}")
+        inicio = CABECERA.size
+        particion = Particion.desde_diccionario(json.loads(bytes(vista[inicio:inicio + longitud]).decode('utf-8')))
+        inicio += longitud + _relleno(longitud)
+        fin_tabla = inicio + 4 * num_estados * num_columnas
+        if sys.byteorder == 'little':
+            tabla = vista[inicio:fin_tabla].cast('i')
+        else:
+            # En máquinas big-endian no es posible evitar la copia
+            tabla = array(TIPO_INT32, bytes(vista[inicio:fin_tabla]))
+            tabla.byteswap()
+        aceptacion = vista[fin_tabla:fin_tabla + (num_estados + 7) // 8]
+        super().__init__(particion, tabla, aceptacion, num_estados, inicial, estado_muerto)
+
+    def cerrar(self):
+        # Libera las vistas y el mapeo del archivo
+        for atributo in ('tabla', 'aceptacion'):
+            vista = getattr(self, atributo, None)
+            if isinstance(vista, memoryview):
+                vista.release()
+        if getattr(self, 'mapa', None) is not None:
+            try:
+                self.mapa.close()
+            except BufferError:
+                # Aún hay vistas externas (por ejemplo, de NumPy); se cerrará al liberarlas
+                pass
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+
+def cargar_binario(ruta):
+    # Abre un AFD binario mediante mmap, sin copiar la tabla
+    return AFDMapeado(ruta)
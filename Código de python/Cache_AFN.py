@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from Conversion_ER_AFN import ExpresionRegularAFN, compilar, CONSTRUCCION_THOMPSON
+from Analizador_ER import analizar
+
+# Cambiar esta versión cada vez que cambie el algoritmo de construcción: las entradas
+# guardadas con otra versión se ignoran y se eliminan.
+VERSION_CACHE = 3
+
+
+class CacheAutomatas:
+    # Caché de dos niveles de autómatas compilados: una LRU en memoria y un almacén en disco
+    # direccionado por contenido. La clave es el hash del postfijo de la expresión, así que
+    # escrituras triviales distintas ("ab", "(a)(b)") comparten la misma entrada.
+
+    def __init__(self, directorio=None, max_entradas=256, max_bytes_disco=64 * 1024 * 1024,
+                 edad_maxima=30 * 24 * 3600, escrituras_por_poda=1000):
+        self.directorio = directorio
+        self.max_entradas = max_entradas
+        self.max_bytes_disco = max_bytes_disco
+        self.edad_maxima = edad_maxima
+        self.escrituras_por_poda = escrituras_por_poda
+        self.memoria = OrderedDict()
+        # Estadísticas
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.desalojos = 0
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def estadisticas(self):
+        return {
+            'aciertos_memoria': self.aciertos_memoria,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+            'escrituras': self.escrituras,
+            'desalojos': self.desalojos,
+            'entradas_memoria': len(self.memoria),
+        }
+
+    def normalizar(self, expresion):
+        # Forma normalizada de la expresión: su postfijo con concatenaciones explícitas
+        # (las clases de caracteres se escriben en su forma canónica)
+        return ''.join(str(token) for token in analizar(expresion))
+
+    def clave(self, expresion, optimizar=False, construccion=CONSTRUCCION_THOMPSON, compartir=False):
+        # Hash del postfijo junto con la versión de la caché; cada construcción y los AFN
+        # optimizados o con subexpresiones compartidas tienen su propia entrada
+        postfijo = self.normalizar(expresion)
+        variante = (('o' if optimizar else '') + ('c' if compartir else '')
+                    + ('' if construccion == CONSTRUCCION_THOMPSON else construccion))
+        return hashlib.sha256(f'{VERSION_CACHE}{variante}\0{postfijo}'.encode('utf-8')).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave + '.json')
+
+    def compilar(self, expresion, afd=False, optimizar=False, construccion=CONSTRUCCION_THOMPSON, compartir=False):
+        # Devuelve el autómata de la expresión desde la caché, o lo compila y lo guarda.
+        # El objeto devuelto puede estar compartido con otras llamadas: no modificarlo.
+        clave = self.clave(expresion, optimizar, construccion, compartir)
+        automata = self.memoria.get(clave)
+        if automata is not None:
+            self.memoria.move_to_end(clave)
+            self.aciertos_memoria += 1
+        else:
+            datos = self._leer_disco(clave)
+            if datos is not None:
+                self.aciertos_disco += 1
+                automata = ExpresionRegularAFN.desde_diccionario(datos)
+            else:
+                self.fallos += 1
+                automata = compilar(expresion, afd=afd, optimizar=optimizar, construccion=construccion,
+                                    compartir=compartir)
+                self._escribir_disco(clave, automata)
+            self._guardar_memoria(clave, automata)
+        if afd and automata.afd is None:
+            # La entrada existía sin AFD: se calcula una vez y se actualiza
+            automata.conversion_a_afd()
+            self._escribir_disco(clave, automata)
+        return automata
+
+    def _guardar_memoria(self, clave, automata):
+        self.memoria[clave] = automata
+        self.memoria.move_to_end(clave)
+        while len(self.memoria) > self.max_entradas:
+            self.memoria.popitem(last=False)
+            self.desalojos += 1
+
+    def _leer_disco(self, clave):
+        # Lee una entrada del disco; las de otra versión o corruptas se eliminan y cuentan como fallo
+        if self.directorio is None:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            # Las entradas sin usar durante más de edad_maxima se consideran vencidas
+            if self.edad_maxima is not None and time.time() - os.stat(ruta).st_mtime > self.edad_maxima:
+                self._eliminar(ruta)
+                return None
+            with open(ruta, encoding='utf-8') as archivo:
+                entrada = json.load(archivo)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._eliminar(ruta)
+            return None
+        if entrada.get('version') != VERSION_CACHE:
+            self._eliminar(ruta)
+            return None
+        # Marca de uso para la poda por tamaño (menos usadas primero)
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        return entrada['automata']
+
+    def _escribir_disco(self, clave, automata):
+        # Escritura atómica: archivo temporal y reemplazo
+        if self.directorio is None:
+            return
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        entrada = {'version': VERSION_CACHE, 'creado': time.time(), 'automata': automata.a_diccionario()}
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(entrada, archivo, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self.escrituras += 1
+        if self.escrituras % self.escrituras_por_poda == 0:
+            self.podar()
+
+    def _eliminar(self, ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def podar(self):
+        # Elimina del disco las entradas sin usar durante más de edad_maxima y, si se supera
+        # el tamaño máximo, las usadas hace más tiempo. Devuelve cuántas se eliminaron.
+        if self.directorio is None:
+            return 0
+        ahora = time.time()
+        entradas = []
+        eliminadas = 0
+        for carpeta, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                if not nombre.endswith('.json'):
+                    continue
+                ruta = os.path.join(carpeta, nombre)
+                try:
+                    info = os.stat(ruta)
+                except OSError:
+                    continue
+                if self.edad_maxima is not None and ahora - info.st_mtime > self.edad_maxima:
+                    self._eliminar(ruta)
+                    eliminadas += 1
+                else:
+                    entradas.append((info.st_mtime, info.st_size, ruta))
+        total = sum(tamano for _, tamano, _ in entradas)
+        if self.max_bytes_disco is not None and total > self.max_bytes_disco:
+            for _, tamano, ruta in sorted(entradas):
+                if total <= self.max_bytes_disco:
+                    break
+                self._eliminar(ruta)
+                total -= tamano
+                eliminadas += 1
+        return eliminadas
+
+    def vaciar(self):
+        # Vacía la memoria y borra todas las entradas del disco
+        self.memoria.clear()
+        if self.directorio is None:
+            return
+        for carpeta, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                if nombre.endswith('.json'):
+                    self._eliminar(os.path.join(carpeta, nombre))
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from Benchmark_AFN import generar_expresion, LETRAS
+from Servidor_AFN import ServidorAFN, leer_direccion
+
+
+def percentil(valores, proporcion):
+    # Percentil por rango más cercano de una lista ya ordenada (None si está vacía)
+    if not valores:
+        return None
+    return valores[max(0, math.ceil(proporcion * len(valores)) - 1)]
+
+
+def generar_peticiones(cantidad, expresiones, proporcion_compilar=0.2, proporcion_lote=0.2, tamano_lote=16,
+                       longitud_expresion=20, longitud_texto=200, semilla=0):
+    # Mezcla de peticiones sobre un conjunto fijo de expresiones sintéticas (se repiten, como en un
+    # servicio real, así que se ejercitan la LRU y la unión de compilaciones)
+    generador = random.Random(semilla)
+    patrones = [generar_expresion(longitud_expresion, semilla=semilla + indice) for indice in range(expresiones)]
+
+    def texto():
+        return ''.join(generador.choice(LETRAS) for _ in range(longitud_texto))
+
+    peticiones = []
+    for _ in range(cantidad):
+        expresion = generador.choice(patrones)
+        sorteo = generador.random()
+        if sorteo < proporcion_compilar:
+            peticiones.append({'op': 'compilar', 'expresion': expresion})
+        elif sorteo < proporcion_compilar + proporcion_lote:
+            peticiones.append({'op': 'coincidir_lote', 'expresion': expresion, 'modo': 'search',
+                               'textos': [texto() for _ in range(tamano_lote)]})
+        else:
+            peticiones.append({'op': 'coincidir', 'expresion': expresion, 'modo': 'search', 'texto': texto()})
+    return peticiones
+
+
+async def _conectar(direccion):
+    host, puerto, ruta_unix = leer_direccion(direccion)
+    if ruta_unix is not None:
+        return await asyncio.open_unix_connection(ruta_unix, limit=1 << 24)
+    return await asyncio.open_connection(host, puerto, limit=1 << 24)
+
+
+async def _cliente(direccion, numero, peticiones, ventana, latencias, errores):
+    # Una conexión con hasta `ventana` peticiones sin responder; mide la latencia de cada una
+    lector, escritor = await _conectar(direccion)
+    enviadas = {}
+    libres = asyncio.Semaphore(ventana)
+
+    async def leer():
+        for _ in range(len(peticiones)):
+            linea = await lector.readline()
+            if not linea:
+                raise ConnectionError("El servidor cerró la conexión")
+            respuesta = json.loads(linea)
+            latencias.append(time.perf_counter() - enviadas.pop(respuesta['id']))
+            if not respuesta['ok']:
+                errores.append(respuesta['error'])
+            libres.release()
+
+    lectura = asyncio.create_task(leer())
+    for indice, peticion in enumerate(peticiones):
+        await libres.acquire()
+        identificador = f'{numero}-{indice}'
+        enviadas[identificador] = time.perf_counter()
+        escritor.write((json.dumps({**peticion, 'id': identificador}, ensure_ascii=False) + '\n').encode('utf-8'))
+        await escritor.drain()
+    await lectura
+    escritor.close()
+    await escritor.wait_closed()
+
+
+async def _estadisticas_servidor(direccion):
+    lector, escritor = await _conectar(direccion)
+    escritor.write(b'{"op": "estadisticas"}\n')
+    await escritor.drain()
+    respuesta = json.loads(await lector.readline())
+    escritor.close()
+    await escritor.wait_closed()
+    return respuesta
+
+
+async def medir_carga(direccion, peticiones, conexiones=8, ventana=16):
+    # Reparte las peticiones entre varias conexiones simultáneas y devuelve peticiones por segundo,
+    # latencias (p50, p99, máxima, en segundos), errores y los contadores del servidor
+    latencias = []
+    errores = []
+    repartos = [peticiones[indice::conexiones] for indice in range(conexiones)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(direccion, numero, reparto, ventana, latencias, errores)
+                           for numero, reparto in enumerate(repartos) if reparto))
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'duracion': duracion,
+        'peticiones_por_segundo': len(latencias) / duracion if duracion > 0 else 0.0,
+        'latencia_p50': percentil(latencias, 0.50),
+        'latencia_p99': percentil(latencias, 0.99),
+        'latencia_maxima': latencias[-1] if latencias else None,
+        'errores': len(errores),
+        'primer_error': errores[0] if errores else None,
+        'servidor': await _estadisticas_servidor(direccion),
+    }
+
+
+def ejecutar_cli(argumentos=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de Servidor_AFN.")
+    parser.add_argument('--direccion', help="HOST:PUERTO, PUERTO o unix:RUTA de un servidor en marcha")
+    parser.add_argument('--trabajadores', type=int, metavar='N',
+                        help="sin --direccion se inicia un servidor local con N procesos (por defecto uno por CPU)")
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--conexiones', type=int, default=8)
+    parser.add_argument('--ventana', type=int, default=16, help="peticiones sin responder por conexión")
+    parser.add_argument('--expresiones', type=int, default=50, help="expresiones distintas de la mezcla")
+    parser.add_argument('--compilar', type=float, default=0.2, help="proporción de peticiones de compilación")
+    parser.add_argument('--lote', type=float, default=0.2, help="proporción de peticiones coincidir_lote")
+    parser.add_argument('--tamano-lote', type=int, default=16, help="textos por petición coincidir_lote")
+    parser.add_argument('--longitud-texto', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=0)
+    opciones = parser.parse_args(argumentos)
+
+    peticiones = generar_peticiones(opciones.peticiones, opciones.expresiones, opciones.compilar, opciones.lote,
+                                    opciones.tamano_lote, longitud_texto=opciones.longitud_texto,
+                                    semilla=opciones.semilla)
+
+    async def principal():
+        if opciones.direccion is not None:
+            return await medir_carga(opciones.direccion, peticiones, opciones.conexiones, opciones.ventana)
+        servidor = ServidorAFN(opciones.trabajadores)
+        await servidor.iniciar('127.0.0.1', 0)
+        try:
+            host, puerto = servidor.direcciones()[0][:2]
+            return await medir_carga(f'{host}:{puerto}', peticiones, opciones.conexiones, opciones.ventana)
+        finally:
+            await servidor.cerrar()
+
+    informe = asyncio.run(principal())
+    print(json.dumps(informe, ensure_ascii=False, indent=2))
+    print(f"{informe['peticiones_por_segundo']:.1f} peticiones/s, p99 {informe['latencia_p99'] * 1000:.2f} ms",
+          file=sys.stderr)
+    return 1 if informe['errores'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(ejecutar_cli())
@@ -0,0 +1,180 @@
+from bisect import bisect_right
+
+# Puntos de código Unicode: los conjuntos de símbolos son rangos [inicio, fin) dentro de [0, MAXIMO_CODIGO)
+MAXIMO_CODIGO = 0x110000
+# Caracteres que se escapan con '\' al escribir una clase
+ESPECIALES_CLASE = {']', '\\', '-', '^'}
+
+
+class ConjuntoSimbolos:
+    # Conjunto de caracteres usado como símbolo de una transición ([a-z], [^0-9], [^] ...).
+    # Se guarda como tupla ordenada de rangos disjuntos [inicio, fin) de puntos de código, así que
+    # una clase amplia cuesta una sola arista en el AFN sin importar cuántos caracteres abarque.
+    __slots__ = ('rangos', '_hash')
+
+    def __init__(self, rangos):
+        # Ordena y une los rangos solapados o contiguos
+        unidos = []
+        for inicio, fin in sorted(rangos):
+            if inicio >= fin:
+                continue
+            if unidos and inicio <= unidos[-1][1]:
+                if fin > unidos[-1][1]:
+                    unidos[-1] = (unidos[-1][0], fin)
+            else:
+                unidos.append((inicio, fin))
+        self.rangos = tuple(unidos)
+        self._hash = hash(self.rangos)
+
+    @classmethod
+    def de_caracter(cls, caracter):
+        codigo = ord(caracter)
+        return cls([(codigo, codigo + 1)])
+
+    def complemento(self):
+        # Caracteres que no pertenecen al conjunto
+        rangos = []
+        anterior = 0
+        for inicio, fin in self.rangos:
+            if inicio > anterior:
+                rangos.append((anterior, inicio))
+            anterior = fin
+        if anterior < MAXIMO_CODIGO:
+            rangos.append((anterior, MAXIMO_CODIGO))
+        return ConjuntoSimbolos(rangos)
+
+    def __contains__(self, caracter):
+        codigo = ord(caracter)
+        indice = bisect_right(self.rangos, (codigo, MAXIMO_CODIGO)) - 1
+        return indice >= 0 and self.rangos[indice][0] <= codigo < self.rangos[indice][1]
+
+    def __eq__(self, otro):
+        if not isinstance(otro, ConjuntoSimbolos):
+            return NotImplemented
+        return self.rangos == otro.rangos
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        # Texto canónico de la clase; se vuelve a leer con Analizador_ER.simbolo_desde_texto
+        complemento = self.complemento()
+        if not complemento.rangos:
+            return '[^]'
+        if len(complemento.rangos) < len(self.rangos) or (self.rangos and self.rangos[-1][1] == MAXIMO_CODIGO):
+            return '[^' + complemento._cuerpo() + ']'
+        return '[' + self._cuerpo() + ']'
+
+    def __repr__(self):
+        return f'ConjuntoSimbolos({self})'
+
+    def _cuerpo(self):
+        partes = []
+        for inicio, fin in self.rangos:
+            partes.append(_escapar(chr(inicio)))
+            if fin - inicio == 2:
+                partes.append(_escapar(chr(inicio + 1)))
+            elif fin - inicio > 2:
+                partes.append('-' + _escapar(chr(fin - 1)))
+        return ''.join(partes)
+
+
+def _escapar(caracter):
+    return '\\' + caracter if caracter in ESPECIALES_CLASE else caracter
+
+
+def rangos_de(simbolo):
+    # Rangos de puntos de código de un símbolo: un carácter o un ConjuntoSimbolos
+    if isinstance(simbolo, ConjuntoSimbolos):
+        return simbolo.rangos
+    codigo = ord(simbolo)
+    return ((codigo, codigo + 1),)
+
+
+class TablaClases(dict):
+    # Diccionario carácter -> clase que se completa bajo demanda: los bucles de simulación hacen
+    # una sola consulta de diccionario por carácter y la búsqueda binaria solo ocurre la primera
+    # vez que aparece cada carácter
+    __slots__ = ('particion',)
+
+    def __init__(self, particion):
+        super().__init__()
+        self.particion = particion
+
+    def __missing__(self, caracter):
+        clase = self[caracter] = self.particion.clase(caracter)
+        return clase
+
+
+class Particion:
+    # Partición mínima del alfabeto de entrada (todo Unicode) en clases de equivalencia: dos
+    # caracteres están en la misma clase si pertenecen exactamente a los mismos símbolos del
+    # autómata. Las tablas de transición se indexan por clase y no por carácter.
+    #   limites[i]: primer punto de código del intervalo i (los intervalos cubren todo Unicode)
+    #   clases[i]: clase del intervalo i
+    #   miembros[simbolo]: clases que componen cada símbolo (solo si se construyó desde símbolos)
+
+    def __init__(self, simbolos=()):
+        simbolos = list(dict.fromkeys(simbolos))
+        # Barrido por los extremos de los rangos manteniendo los símbolos activos
+        eventos = {0: []}
+        for indice, simbolo in enumerate(simbolos):
+            for inicio, fin in rangos_de(simbolo):
+                eventos.setdefault(inicio, []).append((indice, True))
+                if fin < MAXIMO_CODIGO:
+                    eventos.setdefault(fin, []).append((indice, False))
+        activos = set()
+        firmas = {}
+        self.limites = []
+        self.clases = []
+        for punto in sorted(eventos):
+            for indice, entra in eventos[punto]:
+                if entra:
+                    activos.add(indice)
+                else:
+                    activos.discard(indice)
+            clase = firmas.setdefault(frozenset(activos), len(firmas))
+            if self.clases and self.clases[-1] == clase:
+                continue
+            self.limites.append(punto)
+            self.clases.append(clase)
+        self.num_clases = len(firmas)
+        self.miembros = {simbolo: [] for simbolo in simbolos}
+        for firma, clase in firmas.items():
+            for indice in firma:
+                self.miembros[simbolos[indice]].append(clase)
+        self.columnas = TablaClases(self)
+
+    def clase(self, caracter):
+        # Clase de un carácter (búsqueda binaria en los límites de los intervalos)
+        return self.clases[bisect_right(self.limites, ord(caracter)) - 1]
+
+    def conjunto(self, clase):
+        # Caracteres de una clase como ConjuntoSimbolos
+        fines = self.limites[1:] + [MAXIMO_CODIGO]
+        return ConjuntoSimbolos([(inicio, fin) for inicio, fin, c in zip(self.limites, fines, self.clases) if c == clase])
+
+    def textos(self):
+        # Texto de cada clase para mostrarla: el carácter si es uno solo, o la clase [...]
+        textos = []
+        for clase in range(self.num_clases):
+            conjunto = self.conjunto(clase)
+            if len(conjunto.rangos) == 1 and conjunto.rangos[0][1] - conjunto.rangos[0][0] == 1:
+                textos.append(chr(conjunto.rangos[0][0]))
+            else:
+                textos.append(str(conjunto))
+        return textos
+
+    def a_diccionario(self):
+        return {'limites': self.limites, 'clases': self.clases, 'num_clases': self.num_clases}
+
+    @classmethod
+    def desde_diccionario(cls, datos):
+        # Reconstruye la partición guardada (sin la relación con los símbolos originales)
+        particion = cls.__new__(cls)
+        particion.limites = list(datos['limites'])
+        particion.clases = list(datos['clases'])
+        particion.num_clases = datos['num_clases']
+        particion.miembros = None
+        particion.columnas = TablaClases(particion)
+        return particion
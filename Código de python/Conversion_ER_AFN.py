@@ -1,18 +1,55 @@
 import re
-import os
-from graphviz import Digraph
+import time
+from Grafo_AFN import GrafoAFN, Fragmento, ID_EPSILON, nombre_estado, numero_estado
+from Renderizado_AFN import RenderizadorPasos, renderizar_paso, MODO_APAGADO
+from Traza_AFN import TrazaConstruccion
+from Simulacion_AFN import SimuladorAFN
+from AFD_Minimo import AFD, determinizar, minimizar
+from Binario_AFD import guardar_binario
+from Analizador_ER import (analizar, ErrorSintaxis, simbolo_desde_texto, Repeticion, expandir_repeticiones,
+                          leer_clase)
+from Clases_AFN import ConjuntoSimbolos
+from Optimizacion_AFN import optimizar
+from Glushkov_AFN import construir_glushkov
+from Instrumentacion_AFN import EstadisticasConstruccion, PLANTILLA
+from Subexpresiones_AFN import subexpresiones_repetidas
+from Prefiltro_AFN import Prefiltro
+
+# Construcciones disponibles del AFN: Thompson (con transiciones ε, paso a paso) o
+# Glushkov (autómata de posiciones sin transiciones ε, un estado por símbolo de la expresión)
+CONSTRUCCION_THOMPSON = 'thompson'
+CONSTRUCCION_GLUSHKOV = 'glushkov'
+CONSTRUCCIONES = (CONSTRUCCION_THOMPSON, CONSTRUCCION_GLUSHKOV)
 
 class ExpresionRegularAFN:
 
-    def __init__(self): 
+    def __init__(self, expresion=None, renderizador=None): 
         # Constructor: inicializa los atributos necesarios para el AFN.
-        self.expresion = input("Ingrese la expresión regular: ") 
+        # Si no se indica la expresión, se pide por consola.
+        self.expresion = expresion if expresion is not None else input("Ingrese la expresión regular: ") 
         self.alfabeto = set(re.findall(r'[a-zA-Z0-9]', self.expresion)) 
         # Extrae el alfabeto de la expresión regular 
-        self.estado_inicial = None 
-        self.estados_finales = set() 
-        self.transiciones = []
-        self.estados = set()
+        # Estado inicial y estados finales como enteros (ver las propiedades estado_inicial y estados_finales)
+        self.inicio = None 
+        self.finales = set() 
+        # Genera las imágenes paso a paso en segundo plano a partir de la traza
+        self.renderizador = renderizador if renderizador is not None else RenderizadorPasos()
+        # Traza de cambios de la construcción (solo se registra si se van a generar imágenes)
+        self.traza = TrazaConstruccion(self.expresion) if self.renderizador.activo else None
+        # Grafo de transiciones indexado por estado (se recorre como lista de tuplas)
+        self.transiciones = GrafoAFN(self.traza)
+        # Postfijo de la expresión como lista de tokens (se calcula con obtener_postfijo)
+        self.postfijo = None
+        # AFD mínimo equivalente (se calcula con conversion_a_afd)
+        self.afd = None
+        # Conteos de estados y transiciones antes y después de optimizar() (None si no se optimizó)
+        self.optimizacion = None
+        # Observador de la construcción por operador (ver Instrumentacion_AFN); None = sin medir
+        self.instrumentacion = None
+        # Con compartir_subexpresiones, las subexpresiones repetidas se construyen una vez y se copian;
+        # subexpresiones guarda cuántas se reutilizaron (None si no se usó)
+        self.compartir_subexpresiones = False
+        self.subexpresiones = None
 
     def balanceoParentesis(self): 
         # Verifica si la expresión regular tiene paréntesis balanceados 
@@ -27,135 +64,165 @@ class ExpresionRegularAFN:
 
     def esOperador(self, caracter):
         # Verifica si un carácter es un operador de la expresión regular
-        return caracter in {'|', ',', '*', '+', '?', '^', '.', '(', ')'}
+        return caracter in {'|', ',', '*', '+', '?', '^', '.', '(', ')', '{', '}'}
 
     def insertar_concatenacion(self, regex):
-        # Inserta operadores de concatenación explícitos (.) donde sea necesario
-        resultado = ''
-        for i in range(len(regex)):
+        # Inserta operadores de concatenación explícitos (.) donde sea necesario.
+        # La conversión ya no lo necesita (Analizador_ER lo hace en la misma pasada); se conserva
+        # para mostrar la expresión con las concatenaciones explícitas.
+        resultado = []
+        # Posición del próximo '}' (len(regex) si no queda ninguno): se busca de nuevo solo al
+        # pasarla, así que el recorrido sigue siendo lineal con muchas repeticiones
+        cierre = -1
+        i = 0
+        while i < len(regex):
             c1 = regex[i]
-            resultado += c1
+            if c1 == '{' and cierre < i:
+                cierre = regex.find('}', i)
+                if cierre < 0:
+                    cierre = len(regex)
+            if c1 == '{' and cierre < len(regex):
+                # Una repetición {m,n} se copia entera (sus dígitos no son símbolos)
+                resultado.append(regex[i:cierre])
+                i = cierre
+                c1 = '}'
+            elif c1 == '[':
+                # Una clase [...] es un solo operando: se copia entera, con sus rangos y escapes
+                try:
+                    fin = leer_clase(regex, i)[1] - 1
+                except ErrorSintaxis:
+                    fin = i
+                resultado.append(regex[i:fin])
+                i = fin
+                c1 = regex[i]
+            resultado.append(c1)
             if i + 1 < len(regex):
                 c2 = regex[i + 1]
                 # Insertar '.' si es necesario por reglas de concatenación
-                if (not self.esOperador(c1) or c1 in ')*+?') and (not self.esOperador(c2) or c2 == '(' or c2 == '^'):
-                    resultado += '.'
-        return resultado
+                if (not self.esOperador(c1) or c1 in ')*+?}') and (not self.esOperador(c2) or c2 == '(' or c2 == '^'):
+                    resultado.append('.')
+            i += 1
+        return ''.join(resultado)
     
+    def obtener_postfijo(self):
+        # Analiza la expresión una sola vez (paréntesis, concatenación implícita y precedencias)
+        # y guarda el postfijo como lista de tokens. Lanza ErrorSintaxis si la expresión es inválida.
+        if self.postfijo is None:
+            self.postfijo = analizar(self.expresion, self.alfabeto)
+            # El alfabeto queda con los símbolos realmente usados: caracteres sueltos y clases
+            # (las letras dentro de una clase como [a-z] no son símbolos por sí mismas)
+            self.alfabeto = {token for token in self.postfijo
+                             if token in self.alfabeto or isinstance(token, ConjuntoSimbolos)}
+        return self.postfijo
+
     def analizar_expresion(self):
-        # Llama a balanceoParentesis y devuelve False si hay error de sintaxis.
-        if not self.balanceoParentesis():
-            print("Error: Paréntesis no balanceados en la expresión regular.")
+        # Valida la expresión y devuelve False si hay error de sintaxis, señalando la posición.
+        try:
+            self.obtener_postfijo()
+        except ErrorSintaxis as error:
+            print(f"Error: {error}.")
+            print(error.senalar(self.expresion))
             return False
         return True
     
     def cambiar_a_postfijo(self, regex):
         # Convierte una expresión regular en notación postfija usando el algoritmo Shunting Yard
-        # Se utiliza para asignar prioridad a los operadores de la expresion regular
-        precedencias = {'*':3, '+':3, '?': 3, '^':3, '.':2, '|':1, ',':1}
-        salida = ''
-        pila = []
-        for caracter in regex:
-            if not self.esOperador(caracter):
-                salida += caracter
-            elif caracter == '(':
-                pila.append(caracter)
-            elif caracter == ')':
-                while pila and pila[-1] != '(':
-                    salida += pila.pop()
-                pila.pop()
-            else:
-                while pila and pila[-1] != '(' and precedencias.get(caracter, 0) <= precedencias.get(pila[-1], 0):
-                    salida += pila.pop()
-                pila.append(caracter)
-        while pila:
-            salida += pila.pop()
-        return salida
+        # Se utiliza para asignar prioridad a los operadores de la expresion regular.
+        # Acepta la expresión con o sin concatenaciones explícitas (ver Analizador_ER.analizar).
+        return ''.join(str(token) for token in analizar(regex))
 
     def proyeccion_grafica_paso_a_paso(self, transiciones_parciales, estados_finales, estado_inicial, paso):
-        # Crear un grafo orientado a la derecha
-        dot = Digraph(comment='Construccion del AFN', format='png')
-        dot.attr(rankdir ='LR') # Visualización horizontal, representación izquierda a derecha
-        dot.attr('node', shape='circle')
-
-        # Nodo ficticio para la flecha de inicio
-        dot.node('', shape='none')
-
-        # Flecha desde el nodo ficticio al estado incial
-        dot.edge('', estado_inicial)
-
-        # Recopilar todos los estados involucrados en las transiciones
-        estados_involucrados = set()
-        for origen, simbolo, destino in transiciones_parciales:
-            estados_involucrados.update([origen, destino])
-
-        # Dibujar estados como nodos
-        for estado in estados_involucrados:
-            if estado in estados_finales:
-                dot.node(name=estado, label=estado, shape='doublecircle') # Forma par a los estados finales
-            else:
-                dot.node(name=estado, label=estado)
-
-        # Dibujar las transiciones
-        for origen, simbolo, destino in transiciones_parciales:
-            label = simbolo
-            dot.edge(origen, destino, label=label)
-
-        # Guardar las imagenes
-        # Crear el directorio sino existe
-        if not os.path.exists("AFN_paso_por_paso"):
-            os.makedirs("AFN_paso_por_paso")
-        # Ruta completa del archivo de salida
-        ruta_salida = os.path.join("AFN_paso_por_paso", f'AFN_paso_{paso:02}')
-        dot.render(filename=ruta_salida, cleanup=True)
+        # Renderiza un paso de la construcción de forma síncrona (ver Renderizado_AFN.renderizar_paso)
+        return renderizar_paso(transiciones_parciales, estados_finales, estado_inicial, paso)
+
+    def registrar_paso(self, estados_finales, estado_inicial, paso):
+        # Marca el fin de un paso en la traza; las imágenes se generan a partir de ella
+        if self.traza is not None:
+            self.traza.marcar_paso(paso, estado_inicial, estados_finales)
 
     def conversion_a_afn(self):
         # Método principal para construir el AFN paso a paso desde la expresión regular en postfijo.
-        postfijo = self.cambiar_a_postfijo(self.expresion)
+        # Los estados son enteros y los fragmentos de la pila son objetos Fragmento; los nombres
+        # qN solo se generan al mostrar o dibujar el autómata.
+        postfijo = self.obtener_postfijo()
+        transiciones = self.transiciones
+        epsilon = ID_EPSILON
         contador = 0
         paso = 1
+        observador = self.instrumentacion
+        if observador is not None and hasattr(observador, 'renderizador'):
+            observador.renderizador = self.renderizador
+        reloj = time.perf_counter
+        if self.compartir_subexpresiones:
+            # Subárboles repetidos del postfijo y fragmentos modelo ya construidos de cada uno
+            identificadores, candidatos, repetidas = subexpresiones_repetidas(postfijo)
+            plantillas = {}
+            self.subexpresiones = {'repetidas': len(repetidas), 'aciertos': 0, 'tokens_ahorrados': 0,
+                                   'aristas_copiadas': 0}
+        else:
+            candidatos = None
+        saltar_hasta = 0
 
         def nuevo_estado():
-            # Crea un nuevo estado con nombre único (q0, q1, ...).
+            # Crea un nuevo estado con número único (0, 1, ...).
             nonlocal contador
-            estado = f'q{contador}'
+            estado = contador
             contador += 1
             return estado
         
         pila = []
 
          # Recorre cada símbolo en la expresión postfija para construir el AFN.
-        for caracter in postfijo:
+        for indice, caracter in enumerate(postfijo):
+            if indice < saltar_hasta:
+                # Token de una subexpresión que ya se copió de su plantilla
+                continue
+            if observador is not None:
+                recorridas, creadas, movidas = (transiciones.aristas_recorridas, transiciones.aristas_creadas,
+                                                transiciones.aristas_movidas)
+                inicio = reloj()
+            if candidatos is not None and indice in candidatos:
+                # Si la subexpresión más larga que empieza aquí ya se construyó antes, se copia
+                fin_subexpresion = next((fin for fin in candidatos[indice] if identificadores[fin] in plantillas), None)
+                if fin_subexpresion is not None:
+                    modelo, modelo_inicio, modelo_fin = plantillas[identificadores[fin_subexpresion]]
+                    mapa = transiciones.copiar_aristas(modelo, {}, nuevo_estado)
+                    pila.append(Fragmento(mapa[modelo_inicio], mapa[modelo_fin]))
+                    self.registrar_paso({mapa[modelo_fin]}, mapa[modelo_inicio], paso)
+                    paso += 1
+                    self.subexpresiones['aciertos'] += 1
+                    self.subexpresiones['tokens_ahorrados'] += fin_subexpresion - indice + 1
+                    self.subexpresiones['aristas_copiadas'] += len(modelo)
+                    saltar_hasta = fin_subexpresion + 1
+                    if observador is not None:
+                        observador.operador(PLANTILLA, reloj() - inicio, transiciones.aristas_recorridas - recorridas,
+                                            transiciones.aristas_creadas - creadas,
+                                            transiciones.aristas_movidas - movidas, len(pila))
+                    continue
             if caracter in self.alfabeto:
                 # Si el carácter es parte del alfabeto, se crea una transición
                 Q1, Q2 = nuevo_estado(), nuevo_estado()
 
                 # Agrega la transición (Q1 --caracter--> Q2)
-                self.transiciones.append((Q1, caracter, Q2))
+                transiciones.agregar(Q1, transiciones.simbolo(caracter), Q2)
 
                 # Empuja el nuevo fragmento del AFN a la pila
-                pila.append((Q1, Q2))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {Q2}, Q1, paso)
+                pila.append(Fragmento(Q1, Q2))
+                self.registrar_paso({Q2}, Q1, paso)
                 paso += 1
             elif caracter == '.':
                 # Operador de concatenación
                 expresion_2 = pila.pop()
                 expresion_1 = pila.pop()
-                transiciones_actualizadas = []
 
                 # Redirige transiciones de expresion_2 para conectarlas con el final de expresion_1
-                for origen, simbolo, destino in self.transiciones:
-                    if origen == expresion_2[0]:
-                        origen = expresion_1[1]
-                        transiciones_actualizadas.append((origen, simbolo, destino))
-                
-                # Elimina las transiciones viejas del segundo fragmento
-                self.transiciones = [t for t in self.transiciones if t[0] not in {expresion_2[0]}]
-                self.transiciones.extend(transiciones_actualizadas)
+                # (elimina las transiciones viejas del segundo fragmento)
+                transiciones.mover_salientes(expresion_2.inicio, expresion_1.fin)
 
-                # Empuja el nuevo fragmento concatenado a la pila
-                pila.append((expresion_1[0], expresion_2[1]))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {expresion_2[1]}, expresion_1[0], paso)
+                # El fragmento concatenado reutiliza el objeto del primero
+                expresion_1.fin = expresion_2.fin
+                pila.append(expresion_1)
+                self.registrar_paso({expresion_1.fin}, expresion_1.inicio, paso)
                 paso += 1
 
             elif caracter == '|' or caracter == ',':
@@ -168,22 +235,16 @@ class ExpresionRegularAFN:
                 expresion_1 = pila.pop()
                 
                 # Redirigir transiciones de expresion_1
-                for i in range(len(self.transiciones)):
-                    if self.transiciones[i][0] == expresion_1[0]:
-                        self.transiciones[i] = (estado_inicial, self.transiciones[i][1], self.transiciones[i][2])
-                    if self.transiciones[i][2] == expresion_1[1]:
-                        self.transiciones[i] = (self.transiciones[i][0], self.transiciones[i][1], estado_final)
+                transiciones.redirigir_origen(expresion_1.inicio, estado_inicial)
+                transiciones.redirigir_destino(expresion_1.fin, estado_final)
                 
                 # Redirigir transiciones de expresion_2
-                for i in range(len(self.transiciones)):
-                    if self.transiciones[i][0] == expresion_2[0]:
-                        self.transiciones[i] = (estado_inicial, self.transiciones[i][1], self.transiciones[i][2])
-                    if self.transiciones[i][2] == expresion_2[1]:
-                        self.transiciones[i] = (self.transiciones[i][0], self.transiciones[i][1], estado_final)
+                transiciones.redirigir_origen(expresion_2.inicio, estado_inicial)
+                transiciones.redirigir_destino(expresion_2.fin, estado_final)
                 
                 # Empuja el fragmento resultante
-                pila.append((estado_inicial, estado_final))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {estado_final}, estado_inicial, paso)
+                pila.append(Fragmento(estado_inicial, estado_final))
+                self.registrar_paso({estado_final}, estado_inicial, paso)
                 paso += 1
                 
             elif caracter == '*':
@@ -193,56 +254,37 @@ class ExpresionRegularAFN:
                 expresion = pila.pop()
                 
                 # Redirigimos todas las transiciones internas hacia el nuevo estado de repetición
-                for i in range(len(self.transiciones)):
-                    if self.transiciones[i][0] == expresion[0]:
-                        self.transiciones[i] = (estado_repeticion, self.transiciones[i][1], self.transiciones[i][2])
-                    if self.transiciones[i][2] == expresion[1]:
-                        self.transiciones[i] = (self.transiciones[i][0], self.transiciones[i][1], estado_repeticion)
+                transiciones.redirigir_origen(expresion.inicio, estado_repeticion)
+                transiciones.redirigir_destino(expresion.fin, estado_repeticion)
 
                 # Transiciones ε para entrada y salida del bucle
-                self.transiciones.append((estado_inicial, 'ε', estado_repeticion))
-                self.transiciones.append((estado_repeticion, 'ε', estado_final))
+                transiciones.agregar(estado_inicial, epsilon, estado_repeticion)
+                transiciones.agregar(estado_repeticion, epsilon, estado_final)
 
                 # Empuja el nuevo bloque a la pila
-                pila.append((estado_inicial, estado_final))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {estado_final}, estado_inicial, paso)
+                pila.append(Fragmento(estado_inicial, estado_final))
+                self.registrar_paso({estado_final}, estado_inicial, paso)
                 paso += 1
 
             elif caracter == '+':
-                # Operador de cerradura positiva
+                # Operador de cerradura positiva: X+ = X seguido de cero o más X.
+                # Solo se agregan transiciones ε alrededor del fragmento (no se recorren sus aristas):
+                # el final del fragmento vuelve a su inicio para repetir o sale al nuevo estado final.
+                # El nuevo estado inicial evita que el inicio del fragmento, que ahora tiene
+                # transiciones entrantes, quede como inicio de un operador exterior.
                 estado_inicial, estado_final = nuevo_estado(), nuevo_estado()
-                estado_intermedio = nuevo_estado()
-                estado_retorno = nuevo_estado()
                 expresion = pila.pop()
 
-                inicio_sub_afn, fin_sub_afn = expresion
-                
-                # Redirige las transiciones desde el nuevo estado inicial
-                for i in range(len(self.transiciones)):
-                    if self.transiciones[i][0] == inicio_sub_afn:
-                        self.transiciones[i] = (estado_inicial, self.transiciones[i][1], self.transiciones[i][2])
-                
-                # Cambiamos el sub estado inicial por el nuevo estado inicial
-                inicio_sub_afn = estado_inicial
-
-                # Evalua si exite una concatenación entre dos o mas caracteres, de los contrario
-                # solo colocara una repetición al mismo estado.
-                for i in range(len(self.transiciones)):
-                    if (self.transiciones[i][0] == inicio_sub_afn and self.transiciones[i][2] == fin_sub_afn):
-                        self.transiciones.append((estado_intermedio, self.transiciones[i][1], estado_intermedio))
-                    if self.transiciones[i][2] != fin_sub_afn:
-                        self.transiciones.append((estado_intermedio, self.transiciones[i][1], estado_retorno))
-                    if self.transiciones[i][0] != inicio_sub_afn:
-                        self.transiciones.append((estado_retorno, self.transiciones[i][1], estado_intermedio))
-
-                # Entrada de la transicion vacia al estado intermedio
-                self.transiciones.append((fin_sub_afn, 'ε', estado_intermedio))
+                # Entrada al fragmento
+                transiciones.agregar(estado_inicial, epsilon, expresion.inicio)
+                # Repetición del fragmento
+                transiciones.agregar(expresion.fin, epsilon, expresion.inicio)
                 # Salida de la transicion vacia al estado final
-                self.transiciones.append((estado_intermedio, 'ε', estado_final))
-                
+                transiciones.agregar(expresion.fin, epsilon, estado_final)
+
                 # Empujar el nuevo bloque a la pila
-                pila.append((estado_inicial, estado_final))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {estado_final}, estado_inicial, paso)
+                pila.append(Fragmento(estado_inicial, estado_final))
+                self.registrar_paso({estado_final}, estado_inicial, paso)
                 paso += 1
 
             elif caracter == '?':
@@ -251,60 +293,369 @@ class ExpresionRegularAFN:
                 expresion = pila.pop()
 
                 # Redirige transiciones de entrada
-                for i in range(len(self.transiciones)):
-                    if self.transiciones[i][0] == expresion[0]:
-                        self.transiciones[i] = (estado_inicial, self.transiciones[i][1], self.transiciones[i][2])
-                    if self.transiciones[i][2] == expresion[1]:
-                        self.transiciones[i] = (self.transiciones[i][0], self.transiciones[i][1], estado_final)
+                transiciones.redirigir_origen(expresion.inicio, estado_inicial)
+                transiciones.redirigir_destino(expresion.fin, estado_final)
 
                 # Transición ε directa que representa "cero veces"
-                self.transiciones.append((estado_inicial, 'ε', estado_final))
+                transiciones.agregar(estado_inicial, epsilon, estado_final)
 
                 # Empuja resultado a la pila
-                pila.append((estado_inicial, estado_final))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {estado_final}, estado_inicial, paso)
+                pila.append(Fragmento(estado_inicial, estado_final))
+                self.registrar_paso({estado_final}, estado_inicial, paso)
+                paso += 1
+            elif isinstance(caracter, Repeticion):
+                # Repetición acotada X{m,n}: copias del fragmento ya construido (ver repetir_fragmento)
+                expresion = pila.pop()
+                fragmento = self.repetir_fragmento(expresion, caracter.minimo, caracter.maximo, nuevo_estado)
+                pila.append(fragmento)
+                self.registrar_paso({fragmento.fin}, fragmento.inicio, paso)
                 paso += 1
             elif caracter == '^':
                 # Operador de nada (cadena vacía)
                 estado_inicial, estado_final = nuevo_estado(), nuevo_estado()
 
                 # Transicion ε de algo o nada
-                self.transiciones.append((estado_inicial, 'ε', estado_final))
+                transiciones.agregar(estado_inicial, epsilon, estado_final)
                     
-                pila.append((estado_inicial, estado_final))
-                self.proyeccion_grafica_paso_a_paso(self.transiciones.copy(), {estado_final}, estado_inicial, paso)
+                pila.append(Fragmento(estado_inicial, estado_final))
+                self.registrar_paso({estado_final}, estado_inicial, paso)
                 paso += 1
 
+            if candidatos is not None and identificadores[indice] in repetidas and identificadores[indice] not in plantillas:
+                # Primera aparición de una subexpresión repetida: sus aristas quedan como modelo
+                fragmento = pila[-1]
+                plantillas[identificadores[indice]] = (transiciones.aristas_alcanzables(fragmento.inicio),
+                                                       fragmento.inicio, fragmento.fin)
+
+            if observador is not None:
+                observador.operador(caracter, reloj() - inicio, transiciones.aristas_recorridas - recorridas,
+                                    transiciones.aristas_creadas - creadas, transiciones.aristas_movidas - movidas,
+                                    len(pila))
+
         # Finaliza la construcción del AFN: define estado inicial y estados finales
-        inicio, fin = pila.pop()
-        self.estado_inicial = inicio
-        self.estados_finales.add(fin)
-
-        # Agrega todos los estados encontrados a la lista de estados del autómata
-        for origen, _, destino in self.transiciones:
-            self.estados.update([origen, destino])
-
-    def mostrar_AFN(self):
-        # Imprime los cinco componentes principales del AFN en consola.
-        lista_estados_ordenados = sorted(self.estados, key=lambda k: int(k[1:]))
-        alfabeto_ordenado = sorted(self.alfabeto)
-        print("AFN: ")
+        if len(pila) != 1:
+            raise ValueError("Expresión regular mal formada: faltan o sobran operandos.")
+        fragmento = pila.pop()
+        self.inicio = fragmento.inicio
+        self.finales.add(fragmento.fin)
+        if self.traza is not None:
+            self.renderizador.renderizar_traza(self.traza)
+
+    def repetir_fragmento(self, expresion, minimo, maximo, nuevo_estado):
+        # Construye X{minimo,maximo} a partir del fragmento X ya construido, sin volver a procesar
+        # su parte del postfijo: las aristas de X se leen una vez de los índices del grafo y cada
+        # copia solo renumera estados (una arista nueva por arista de X).
+        #   X{m,n}: m copias encadenadas y luego n-m copias opcionales, cada una con una salida ε
+        #           al estado final común (X(X(X)?)?), así que las aristas crecen linealmente.
+        #   X{m,}:  m copias y un bucle sobre el final de la última (como '*'); X{0,0} = ε.
+        # La primera copia es el propio X. Como en los demás operadores, el inicio del fragmento
+        # no tiene aristas entrantes y el final no tiene salientes.
+        transiciones = self.transiciones
+        epsilon = ID_EPSILON
+        if maximo == 0:
+            # X{0} solo reconoce la cadena vacía: X se descarta
+            for id_arista in transiciones.ids_alcanzables(expresion.inicio):
+                transiciones.eliminar(id_arista)
+            estado_inicial, estado_final = nuevo_estado(), nuevo_estado()
+            transiciones.agregar(estado_inicial, epsilon, estado_final)
+            return Fragmento(estado_inicial, estado_final)
+
+        if minimo == 0 and maximo is None:
+            # X{0,} es X*: el bucle se arma igual que en el operador '*'
+            estado_inicial, estado_final = nuevo_estado(), nuevo_estado()
+            estado_repeticion = nuevo_estado()
+            transiciones.redirigir_origen(expresion.inicio, estado_repeticion)
+            transiciones.redirigir_destino(expresion.fin, estado_repeticion)
+            transiciones.agregar(estado_inicial, epsilon, estado_repeticion)
+            transiciones.agregar(estado_repeticion, epsilon, estado_final)
+            return Fragmento(estado_inicial, estado_final)
+
+        modelo = transiciones.aristas_alcanzables(expresion.inicio)
+
+        def copiar(inicio, fin=None):
+            # Agrega una copia de X que empieza en inicio (y termina en fin, si se indica); devuelve su final
+            mapa = {expresion.inicio: inicio}
+            if fin is not None:
+                mapa[expresion.fin] = fin
+            return transiciones.copiar_aristas(modelo, mapa, nuevo_estado)[expresion.fin]
+
+        estado_inicial = expresion.inicio
+        salidas = []
+        if minimo == 0:
+            # El propio X es la primera copia opcional: nuevo inicio con salida directa al final
+            estado_inicial = nuevo_estado()
+            transiciones.redirigir_origen(expresion.inicio, estado_inicial)
+            salidas.append(estado_inicial)
+        actual = expresion.fin
+        for _ in range(minimo - 1):
+            actual = copiar(actual)
+
+        if maximo is None:
+            # Bucle de X sobre el final de la última copia obligatoria
+            copiar(actual, actual)
+            estado_final = nuevo_estado()
+            transiciones.agregar(actual, epsilon, estado_final)
+            return Fragmento(estado_inicial, estado_final)
+        opcionales = maximo - max(minimo, 1)
+        if not opcionales and not salidas:
+            return Fragmento(estado_inicial, actual)
+
+        estado_final = nuevo_estado()
+        for estado in salidas:
+            transiciones.agregar(estado, epsilon, estado_final)
+        for _ in range(opcionales):
+            transiciones.agregar(actual, epsilon, estado_final)
+            actual = copiar(actual)
+        transiciones.agregar(actual, epsilon, estado_final)
+        return Fragmento(estado_inicial, estado_final)
+
+    def conversion_a_afn_glushkov(self):
+        # Construcción alternativa sin transiciones ε: el autómata de posiciones (Glushkov) tiene un
+        # estado por cada símbolo de la expresión más el inicial q0, y cada transición entra a la
+        # posición de su símbolo. Da la misma estructura K/Σ/S/F/δ que conversion_a_afn.
+        # Las repeticiones {m,n} se expanden: cada copia aporta sus propias posiciones
+        postfijo = expandir_repeticiones(self.obtener_postfijo())
+        self.inicio, self.finales = construir_glushkov(postfijo, self.alfabeto, self.transiciones)
+        # No hay pasos intermedios: se registra y dibuja solo el autómata final
+        self.registrar_paso(self.finales, self.inicio, 1)
+        if self.traza is not None:
+            self.renderizador.renderizar_traza(self.traza)
+
+    def construir_afn(self, construccion=CONSTRUCCION_THOMPSON):
+        # Construye el AFN con la construcción indicada (ver CONSTRUCCIONES)
+        if construccion == CONSTRUCCION_THOMPSON:
+            self.conversion_a_afn()
+        elif construccion == CONSTRUCCION_GLUSHKOV:
+            self.conversion_a_afn_glushkov()
+        else:
+            raise ValueError(f"Construcción desconocida: {construccion}")
+
+    @property
+    def estado_inicial(self):
+        # Nombre qN del estado inicial (internamente es un entero)
+        return None if self.inicio is None else nombre_estado(self.inicio)
+
+    @property
+    def estados_finales(self):
+        return {nombre_estado(estado) for estado in self.finales}
+
+    @property
+    def estados(self):
+        # Nombres qN de todos los estados del autómata
+        return {nombre_estado(estado) for estado in self.numeros_estados()}
+
+    def numeros_estados(self):
+        # Estados (enteros) que participan en alguna transición, más el inicial y los finales,
+        # que tras optimizar() pueden quedar sin transiciones (por ejemplo, en '^')
+        estados = self.transiciones.estados() | self.finales
+        if self.inicio is not None:
+            estados.add(self.inicio)
+        return estados
+
+    def optimizar(self):
+        # Limpia el AFN construido (transiciones duplicadas, cadenas de ε, estados inalcanzables
+        # y muertos) sin cambiar su lenguaje; devuelve los conteos de estados y transiciones
+        # antes y después. Si ya se calculó un AFD se descarta, porque se obtuvo del AFN anterior.
+        self.optimizacion = optimizar(self)
+        self.afd = None
+        return self.optimizacion
+
+    def crear_simulador(self, prefiltro=True):
+        # Devuelve un simulador del AFN construido para evaluar cadenas (fullmatch, search, finditer).
+        # Con prefiltro, search usa los literales de la expresión (ver Prefiltro_AFN); el postfijo
+        # se vuelve a analizar sin alfabeto si el autómata se cargó de un diccionario.
+        simulador = SimuladorAFN.desde_afn(self)
+        if prefiltro:
+            postfijo = self.postfijo if self.postfijo is not None else analizar(self.expresion)
+            simulador.prefiltro = Prefiltro.desde_postfijo(postfijo)
+        return simulador
+
+    def conversion_a_afd(self, minimizado=True):
+        # Determiniza el AFN construido (subconjuntos) y, opcionalmente, lo minimiza con Hopcroft.
+        # El resultado es una tabla densa de enteros lista para evaluar cadenas.
+        self.afd = determinizar(self.crear_simulador())
+        if minimizado:
+            self.afd = minimizar(self.afd)
+        return self.afd
+
+    def fullmatch_lote(self, textos):
+        # Evalúa muchas cadenas a la vez con el AFD mínimo y NumPy (se calcula si hace falta);
+        # devuelve un vector booleano con un resultado por cadena
+        if self.afd is None:
+            self.conversion_a_afd()
+        return self.afd.fullmatch_lote(textos)
+
+    def exportar_binario(self, ruta):
+        # Guarda el AFD mínimo en el formato binario de Binario_AFD (se calcula si hace falta);
+        # se carga con Binario_AFD.cargar_binario sin volver a convertir la expresión
+        if self.afd is None:
+            self.conversion_a_afd()
+        guardar_binario(self.afd, ruta)
+
+    def mostrar_AFN(self, afd=None):
+        # Imprime los cinco componentes principales del AFN (o del AFD indicado) en consola.
+        if afd is None:
+            titulo = "AFN: "
+            lista_estados_ordenados = [nombre_estado(estado) for estado in sorted(self.numeros_estados())]
+            alfabeto_ordenado = sorted(str(simbolo) for simbolo in self.alfabeto)
+            estado_inicial, estados_finales, transiciones = self.estado_inicial, self.estados_finales, self.transiciones
+        else:
+            titulo = "AFD: "
+            lista_estados_ordenados, alfabeto_ordenado, estado_inicial, estados_finales, transiciones = afd.componentes()
+        print(titulo)
         print("K (Estados): ", lista_estados_ordenados)
         print("Σ (Alfabeto): ", alfabeto_ordenado)
-        print("S (Estado inicial): ", self.estado_inicial)
-        print("F (Estados finales): ", self.estados_finales)
+        print("S (Estado inicial): ", estado_inicial)
+        print("F (Estados finales): ", estados_finales)
         print("δ (Transiciones): ")
         
-        for transicion in self.transiciones:
+        for transicion in transiciones:
             print(f"{transicion[0]} --{transicion[1]}--> {transicion[2]}")
+
+    def a_diccionario(self):
+        # Devuelve los componentes K/Σ/S/F/δ del AFN (y del AFD si ya se calculó) listos para JSON
+        resultado = {
+            'expresion': self.expresion,
+            'afn': {
+                'estados': [nombre_estado(estado) for estado in sorted(self.numeros_estados())],
+                'alfabeto': sorted(str(simbolo) for simbolo in self.alfabeto),
+                'estado_inicial': self.estado_inicial,
+                'estados_finales': [nombre_estado(estado) for estado in sorted(self.finales)],
+                'transiciones': [[origen, str(simbolo), destino] for origen, simbolo, destino in self.transiciones],
+            },
+        }
+        if self.afd is not None:
+            estados, alfabeto, inicial, finales, transiciones = self.afd.componentes()
+            resultado['afd'] = {
+                'estados': estados,
+                'alfabeto': alfabeto,
+                'estado_inicial': inicial,
+                'estados_finales': sorted(finales, key=lambda k: int(k[1:])),
+                'transiciones': [list(transicion) for transicion in transiciones],
+            }
+            resultado['tabla_afd'] = self.afd.a_diccionario()
+        if self.optimizacion is not None:
+            resultado['optimizacion'] = self.optimizacion
+        if self.subexpresiones is not None:
+            resultado['subexpresiones'] = self.subexpresiones
+        return resultado
+
+    @classmethod
+    def desde_diccionario(cls, datos):
+        # Reconstruye un autómata ya convertido a partir de a_diccionario() (sin volver a convertir)
+        automata = cls(datos['expresion'], RenderizadorPasos(MODO_APAGADO))
+        afn = datos['afn']
+        automata.alfabeto = {simbolo_desde_texto(simbolo) for simbolo in afn['alfabeto']}
+        automata.inicio = numero_estado(afn['estado_inicial'])
+        automata.finales = {numero_estado(estado) for estado in afn['estados_finales']}
+        transiciones = automata.transiciones
+        for origen, simbolo, destino in afn['transiciones']:
+            transiciones.agregar(numero_estado(origen), transiciones.simbolo(simbolo_desde_texto(simbolo)),
+                                 numero_estado(destino))
+        if 'tabla_afd' in datos:
+            automata.afd = AFD.desde_diccionario(datos['tabla_afd'])
+        automata.optimizacion = datos.get('optimizacion')
+        automata.subexpresiones = datos.get('subexpresiones')
+        return automata
         
-    def main(self):
+    def main(self, optimizar=False, construccion=CONSTRUCCION_THOMPSON, compartir=False, afd=False):
         # Ejecuta el flujo principal del programa: análisis, conversión y visualización.
+        # Con afd también se determiniza y se muestra el AFD mínimo (la construcción de
+        # subconjuntos puede crecer de forma exponencial, así que no se hace por defecto).
         if self.analizar_expresion():
-            self.expresion = self.insertar_concatenacion(self.expresion)
-            self.conversion_a_afn()
+            self.compartir_subexpresiones = compartir
+            self.construir_afn(construccion)
+            if self.subexpresiones is not None:
+                print(f"Subexpresiones repetidas: {self.subexpresiones['repetidas']}, "
+                      f"reutilizadas {self.subexpresiones['aciertos']} veces "
+                      f"({self.subexpresiones['tokens_ahorrados']} tokens sin construir)")
+            if optimizar:
+                conteos = self.optimizar()
+                print(f"Optimización: {conteos['estados_antes']} -> {conteos['estados_despues']} estados, "
+                      f"{conteos['aristas_antes']} -> {conteos['aristas_despues']} transiciones")
             self.mostrar_AFN()
+            if afd:
+                self.conversion_a_afd()
+                self.mostrar_AFN(self.afd)
+            # Espera a que se terminen de escribir las imágenes paso a paso
+            self.renderizador.cerrar()
+
+
+def compilar(expresion, render=False, afd=False, optimizar=False, construccion=CONSTRUCCION_THOMPSON,
+             instrumentar=False, compartir=False):
+    # Punto de entrada programático: analiza, convierte y devuelve el ExpresionRegularAFN construido
+    # sin pedir datos por consola. render puede ser False, True (todos los pasos) o un modo de
+    # RenderizadorPasos ('todos', 'cada_n', 'final', 'apagado'). Con optimizar se aplica la pasada
+    # de Optimizacion_AFN antes del AFD; construccion elige Thompson o Glushkov (sin ε).
+    # instrumentar puede ser True (EstadisticasConstruccion en automata.instrumentacion) o un
+    # observador propio con el método operador(). Con compartir, las subexpresiones repetidas se
+    # construyen una sola vez (Thompson). Lanza ValueError si la expresión es inválida.
+    if render is True:
+        renderizador = RenderizadorPasos()
+    elif not render:
+        renderizador = RenderizadorPasos(MODO_APAGADO)
+    elif isinstance(render, RenderizadorPasos):
+        renderizador = render
+    else:
+        renderizador = RenderizadorPasos(render)
+    automata = ExpresionRegularAFN(expresion, renderizador)
+    if instrumentar is True:
+        automata.instrumentacion = EstadisticasConstruccion()
+    elif instrumentar:
+        automata.instrumentacion = instrumentar
+    automata.compartir_subexpresiones = compartir
+    # Los errores de sintaxis (ErrorSintaxis, subclase de ValueError) indican la posición
+    automata.construir_afn(construccion)
+    if optimizar:
+        automata.optimizar()
+    if afd:
+        automata.conversion_a_afd()
+    return automata
+
+
+def ejecutar_cli(argumentos=None):
+    # Sin argumentos conserva el modo interactivo; con --lote convierte un archivo de patrones y con
+    # --servidor atiende peticiones de compilación y búsqueda (ver Servidor_AFN)
+    import argparse
+    parser = argparse.ArgumentParser(description="Conversión de expresiones regulares a AFN.")
+    parser.add_argument('--lote', metavar='ARCHIVO', help="archivo de patrones (una expresión por línea o JSONL); '-' para stdin")
+    parser.add_argument('--formato', choices=['lineas', 'jsonl'], help="formato del archivo de lote (por defecto según la extensión)")
+    parser.add_argument('--salida', metavar='ARCHIVO', help="archivo JSONL de resultados (por defecto stdout)")
+    parser.add_argument('--afd', action='store_true',
+                        help="calcular el AFD mínimo: se muestra en el modo interactivo y se incluye en cada resultado del lote")
+    parser.add_argument('--optimizar', action='store_true',
+                        help="optimizar el AFN (duplicadas, cadenas de ε, estados inútiles) e informar los conteos")
+    parser.add_argument('--construccion', choices=CONSTRUCCIONES, default=CONSTRUCCION_THOMPSON,
+                        help="construcción del AFN: thompson (con ε, por defecto) o glushkov (sin ε)")
+    parser.add_argument('--compartir', action='store_true',
+                        help="construir una sola vez cada subexpresión repetida y copiarla (informa los aciertos)")
+    parser.add_argument('--trabajadores', type=int, metavar='N', help="convertir el lote en un pool de N procesos")
+    parser.add_argument('--bloque', type=int, default=64, metavar='N', help="patrones por tarea enviada al pool (por defecto 64)")
+    parser.add_argument('--desordenado', action='store_true', help="escribir los resultados en el orden en que terminan")
+    parser.add_argument('--cache', metavar='DIRECTORIO', help="reutilizar autómatas ya compilados guardados en este directorio")
+    parser.add_argument('--servidor', metavar='DIRECCION',
+                        help="servicio de JSON por líneas en HOST:PUERTO, PUERTO o unix:RUTA (usa --trabajadores y --cache)")
+    parser.add_argument('--max-entradas', type=int, default=1024, metavar='N',
+                        help="autómatas en la LRU del servidor (por defecto 1024)")
+    parser.add_argument('--cola', type=int, default=64, metavar='N',
+                        help="peticiones en espera por conexión antes de dejar de leer el socket (por defecto 64)")
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.servidor is not None:
+        from Servidor_AFN import ejecutar_servidor
+        return ejecutar_servidor(opciones.servidor, opciones.trabajadores, opciones.cache, opciones.max_entradas,
+                                 cola_por_conexion=opciones.cola)
+
+    if opciones.lote is None:
+        clase_principal = ExpresionRegularAFN()
+        clase_principal.main(opciones.optimizar, opciones.construccion, opciones.compartir, opciones.afd)
+        return 0
+
+    from Lote_AFN import convertir_archivo
+    return convertir_archivo(opciones.lote, opciones.salida, opciones.formato, opciones.afd,
+                             opciones.trabajadores, opciones.bloque, not opciones.desordenado, opciones.cache,
+                             opciones.optimizar, opciones.construccion, opciones.compartir)
+
 
 if __name__ == "__main__":
-    clase_principal = ExpresionRegularAFN()
-    clase_principal.main()
\ No newline at end of file
+    raise SystemExit(ejecutar_cli())
\ No newline at end of file
@@ -0,0 +1,175 @@
+import codecs
+import mmap
+from AFD_Perezoso import AFDPerezoso
+
+# Tamaño de los fragmentos que se leen de archivos, mmap y buffers de bytes
+TAMANO_FRAGMENTO = 1 << 16
+
+
+def fragmentos_de(fuente, tamano=TAMANO_FRAGMENTO, codificacion=None):
+    # Genera fragmentos de texto (str) desde una cadena, bytes, un mmap o memoryview, un archivo
+    # abierto (texto o binario) o cualquier iterable de fragmentos str/bytes (por ejemplo un socket:
+    # iter(lambda: conexion.recv(65536), b'')).
+    # Sin codificacion cada byte es un carácter (latin-1), así que las posiciones son desplazamientos
+    # en bytes; con codificacion los bytes se decodifican de forma incremental (un carácter partido
+    # entre dos fragmentos se une) y las posiciones cuentan caracteres.
+    if codificacion is None:
+        decodificar = lambda datos, final=False: str(datos, 'latin-1')
+    else:
+        decodificar = codecs.getincrementaldecoder(codificacion)().decode
+
+    if isinstance(fuente, str):
+        yield fuente
+        return
+    if isinstance(fuente, (bytes, bytearray, memoryview, mmap.mmap)):
+        for inicio in range(0, len(fuente), tamano):
+            yield decodificar(fuente[inicio:inicio + tamano])
+        yield decodificar(b'', True)
+        return
+    if hasattr(fuente, 'read'):
+        archivo = fuente
+        fuente = iter(lambda: archivo.read(tamano), archivo.read(0))
+    for fragmento in fuente:
+        yield fragmento if isinstance(fragmento, str) else decodificar(fragmento)
+    yield decodificar(b'', True)
+
+
+class _Nivel:
+    # Una búsqueda de BuscadorFlujo: la principal o la que se reanuda al fin de la coincidencia
+    # provisional del nivel anterior
+    __slots__ = ('desde', 'grupos', 'ocupados', 'mejor', 'pendientes')
+
+    def __init__(self, desde):
+        self.desde = desde         # primera posición donde siembra hilos
+        self.grupos = []           # (inicio, mapa_de_bits) ordenados por inicio
+        self.ocupados = 0          # unión de los mapas de bits de los grupos
+        self.mejor = None          # coincidencia provisional (inicio, fin)
+        self.pendientes = []       # coincidencias ya confirmadas de niveles siguientes que terminaron
+
+
+class BuscadorFlujo:
+    # Búsqueda de coincidencias sobre un flujo de fragmentos sin cargar la entrada completa.
+    # coincidencias() da exactamente las coincidencias (inicio, fin) de SimuladorAFN.finditer sobre
+    # el texto concatenado, sin guardar texto ni volver a leerlo. Mientras la coincidencia en curso
+    # pueda alargarse, la búsqueda que se reanudaría en su fin avanza a la vez en un nivel
+    # siguiente (y así sucesivamente): si la coincidencia cambia se descartan los niveles
+    # siguientes, y si se confirma el siguiente nivel pasa a ser el principal.
+    # Un estado que ya está en un nivel anterior se quita de los siguientes: si llega a un estado
+    # final, el nivel anterior cambia su coincidencia y descarta los siguientes de todos modos.
+    # Así entre todos los niveles hay como mucho un hilo por estado del AFN y cada carácter cuesta
+    # O(estados). Solo se acumulan las posiciones de las coincidencias que no pueden darse hasta
+    # que se decida la anterior (a|a*b sobre 'aaaa...' no confirma ninguna hasta ver una b o el fin).
+    # fines() da solo las posiciones donde termina alguna coincidencia con el AFD perezoso no
+    # anclado, con memoria constante sin importar el tamaño de la entrada.
+
+    def __init__(self, simulador):
+        self.simulador = simulador
+        self.perezoso = None
+        self.reiniciar()
+
+    @classmethod
+    def desde_afn(cls, afn):
+        return cls(afn.crear_simulador())
+
+    def reiniciar(self):
+        # Vuelve al principio de un flujo nuevo
+        self.posicion = 0      # posición absoluta del siguiente carácter a procesar
+        self.niveles = [_Nivel(0)]
+
+    def alimentar(self, texto):
+        # Procesa un fragmento y devuelve las coincidencias que ya son definitivas
+        resultados = []
+        paso = self.simulador.paso
+        registrar = self._registrar
+        niveles = self.niveles
+        posicion = self.posicion
+        for caracter in texto:
+            registrar(posicion, resultados)
+            vistos = 0
+            for nivel in niveles:
+                siguientes = []
+                ocupados = vistos
+                for origen, mascara in nivel.grupos:
+                    mascara = paso(mascara, caracter) & ~ocupados
+                    if mascara:
+                        siguientes.append((origen, mascara))
+                        ocupados |= mascara
+                nivel.grupos = siguientes
+                nivel.ocupados = ocupados & ~vistos
+                vistos = ocupados
+            posicion += 1
+        self.posicion = posicion
+        return resultados
+
+    def terminar(self):
+        # Indica el fin del flujo: devuelve las coincidencias pendientes y reinicia el buscador
+        resultados = []
+        self._registrar(self.posicion, resultados)
+        for nivel in self.niveles:
+            if nivel.mejor is not None:
+                resultados.append(nivel.mejor)
+                resultados.extend(nivel.pendientes)
+        self.reiniciar()
+        return resultados
+
+    def _registrar(self, posicion, resultados):
+        # Siembra y registra coincidencias en posicion (antes de leer su carácter), igual que
+        # SimuladorAFN.search en cada nivel; confirma los niveles sin hilos vivos
+        inicial, finales = self.simulador.inicial, self.simulador.finales
+        niveles = self.niveles
+        vistos = 0
+        indice = 0
+        while indice < len(niveles):
+            nivel = niveles[indice]
+            # Sembrar un nuevo hilo mientras no haya coincidencia (solo el último nivel). Un estado
+            # final del hilo nuevo cuenta aunque ya esté en un nivel anterior: ese nivel ya registró
+            # su coincidencia en esta posición y aquí da una vacía (b* tras la coincidencia ab)
+            vacia = False
+            if nivel.mejor is None and posicion >= nivel.desde:
+                vacia = bool(inicial & finales)
+                nuevos = inicial & ~(vistos | nivel.ocupados)
+                if nuevos:
+                    nivel.grupos.append((posicion, nuevos))
+                    nivel.ocupados |= nuevos
+            # El grupo más antiguo con estado final gana
+            for origen, mascara in nivel.grupos:
+                if mascara & finales:
+                    break
+            else:
+                origen = posicion if vacia else None
+            mejor = nivel.mejor
+            if origen is not None and (mejor is None or origen < mejor[0]
+                                       or (origen == mejor[0] and posicion > mejor[1])):
+                mejor = nivel.mejor = (origen, posicion)
+                nivel.grupos = [(inicio, mascara) for inicio, mascara in nivel.grupos if inicio <= origen]
+                nivel.ocupados = 0
+                for _, mascara in nivel.grupos:
+                    nivel.ocupados |= mascara
+                nivel.pendientes = []
+                del niveles[indice + 1:]
+            if mejor is not None and indice == len(niveles) - 1:
+                # La búsqueda se reanuda en el fin de la coincidencia (un carácter después si es vacía)
+                niveles.append(_Nivel(mejor[1] if mejor[1] > mejor[0] else mejor[1] + 1))
+            if mejor is not None and not nivel.grupos:
+                # Coincidencia confirmada: sale si es del nivel principal y, si no, queda pendiente
+                # detrás de la del nivel anterior
+                confirmadas = resultados if indice == 0 else niveles[indice - 1].pendientes
+                confirmadas.append(mejor)
+                confirmadas.extend(nivel.pendientes)
+                del niveles[indice]
+                continue
+            vistos |= nivel.ocupados
+            indice += 1
+
+    def coincidencias(self, fuente, tamano=TAMANO_FRAGMENTO, codificacion=None):
+        # Genera las coincidencias (inicio, fin) sin solapamiento de un flujo (ver fragmentos_de)
+        self.reiniciar()
+        for fragmento in fragmentos_de(fuente, tamano, codificacion):
+            yield from self.alimentar(fragmento)
+        yield from self.terminar()
+
+    def fines(self, fuente, tamano=TAMANO_FRAGMENTO, codificacion=None):
+        # Genera la posición final de cada coincidencia (todas, incluidas las solapadas) con memoria constante
+        if self.perezoso is None:
+            self.perezoso = AFDPerezoso(self.simulador)
+        return self.perezoso.fines(fragmentos_de(fuente, tamano, codificacion))
@@ -0,0 +1,72 @@
+# Construcción de Glushkov (autómata de posiciones): un estado por cada aparición de un símbolo
+# en la expresión más el estado inicial 0, sin transiciones ε. Se calcula en una pasada sobre el
+# postfijo con los conjuntos anulable / primeros / últimos de cada subexpresión y las parejas
+# de posiciones consecutivas (siguientes). Los conjuntos de posiciones son enteros usados como
+# mapas de bits (bit p = posición p).
+
+
+def _posiciones(mascara):
+    # Posiciones contenidas en un mapa de bits, en orden creciente
+    while mascara:
+        bit = mascara & -mascara
+        yield bit.bit_length() - 1
+        mascara ^= bit
+
+
+def posiciones(postfijo, alfabeto):
+    # Devuelve (simbolos, primeros, anulable, ultimos, siguientes) de la expresión en postfijo:
+    # simbolos[p] es el símbolo de la posición p (la posición 0 es el estado inicial, sin símbolo)
+    # y siguientes[p] el mapa de bits de posiciones que pueden venir después de p.
+    simbolos = [None]
+    siguientes = [0]
+    pila = []
+    for caracter in postfijo:
+        if caracter in alfabeto:
+            posicion = len(simbolos)
+            simbolos.append(caracter)
+            siguientes.append(0)
+            bit = 1 << posicion
+            pila.append((False, bit, bit))
+        elif caracter == '^':
+            # Cadena vacía: anulable y sin posiciones
+            pila.append((True, 0, 0))
+        elif caracter == '.':
+            anulable_2, primeros_2, ultimos_2 = pila.pop()
+            anulable_1, primeros_1, ultimos_1 = pila.pop()
+            for posicion in _posiciones(ultimos_1):
+                siguientes[posicion] |= primeros_2
+            pila.append((anulable_1 and anulable_2,
+                         primeros_1 | primeros_2 if anulable_1 else primeros_1,
+                         ultimos_1 | ultimos_2 if anulable_2 else ultimos_2))
+        elif caracter == '|' or caracter == ',':
+            anulable_2, primeros_2, ultimos_2 = pila.pop()
+            anulable_1, primeros_1, ultimos_1 = pila.pop()
+            pila.append((anulable_1 or anulable_2, primeros_1 | primeros_2, ultimos_1 | ultimos_2))
+        elif caracter == '*' or caracter == '+':
+            # Las repeticiones enlazan el final de la subexpresión con su principio
+            anulable, primeros, ultimos = pila.pop()
+            for posicion in _posiciones(ultimos):
+                siguientes[posicion] |= primeros
+            pila.append((anulable or caracter == '*', primeros, ultimos))
+        elif caracter == '?':
+            _, primeros, ultimos = pila.pop()
+            pila.append((True, primeros, ultimos))
+    if len(pila) != 1:
+        raise ValueError("Expresión regular mal formada: faltan o sobran operandos.")
+    anulable, primeros, ultimos = pila.pop()
+    return simbolos, primeros, anulable, ultimos, siguientes
+
+
+def construir_glushkov(postfijo, alfabeto, grafo):
+    # Agrega al GrafoAFN las transiciones del autómata de posiciones y devuelve
+    # (estado_inicial, estados_finales) como enteros
+    simbolos, primeros, anulable, ultimos, siguientes = posiciones(postfijo, alfabeto)
+    ids = [None] + [grafo.simbolo(simbolo) for simbolo in simbolos[1:]]
+    siguientes[0] = primeros
+    for origen, mascara in enumerate(siguientes):
+        for destino in _posiciones(mascara):
+            grafo.agregar(origen, ids[destino], destino)
+    finales = set(_posiciones(ultimos))
+    if anulable:
+        finales.add(0)
+    return 0, finales
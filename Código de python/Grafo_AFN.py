@@ -0,0 +1,319 @@
+from array import array
+
+# Tipos de evento que el grafo registra en una traza (ver Traza_AFN). Cada evento
+# corresponde a una operación del grafo, así que reproducir la traza cuesta lo mismo
+# que la construcción original.
+AGREGAR = '+'           # ('+', origen, simbolo, destino)
+ELIMINAR = '-'          # ('-', id_arista)
+REDIRIGIR_ORIGEN = 'o'  # ('o', estado_viejo, estado_nuevo)
+REDIRIGIR_DESTINO = 'd' # ('d', estado_viejo, estado_nuevo)
+MOVER_SALIENTES = 'm'   # ('m', estado_viejo, estado_nuevo)
+SIMBOLO = 's'           # ('s', caracter): se registra un símbolo nuevo en la tabla de símbolos
+
+# Los estados son enteros y los símbolos se internan como enteros pequeños; el símbolo 0 es ε.
+EPSILON = 'ε'
+ID_EPSILON = 0
+# Marca de lista vacía o de arista eliminada en las columnas de enteros del grafo
+SIN_ARISTA = -1
+
+
+def nombre_estado(estado):
+    # Nombre qN de un estado, solo para mostrar o dibujar
+    return f'q{estado}'
+
+
+def numero_estado(nombre):
+    # Número de un estado a partir de su nombre qN
+    return int(nombre[1:])
+
+
+class Fragmento:
+    # Fragmento de AFN en construcción: estado de entrada y estado de salida
+    __slots__ = ('inicio', 'fin')
+
+    def __init__(self, inicio, fin):
+        self.inicio = inicio
+        self.fin = fin
+
+
+class ListasAristas:
+    # Listas de aristas por estado (salientes o entrantes) guardadas en columnas de enteros: cada
+    # estado tiene su primera y su última arista, y cada arista la siguiente y la anterior de su
+    # lista. Agregar, quitar y pasar todas las aristas de un estado a otro no crea objetos.
+    __slots__ = ('primera', 'ultima', 'siguiente', 'anterior')
+
+    def __init__(self):
+        # Por estado
+        self.primera = array('i')
+        self.ultima = array('i')
+        # Por arista
+        self.siguiente = array('i')
+        self.anterior = array('i')
+
+    def asegurar_estado(self, estado):
+        # Las columnas por estado crecen un octavo de más (como list) para que agregar estados
+        # cueste O(1) amortizado
+        if estado >= len(self.primera):
+            faltan = estado + 1 + (len(self.primera) >> 3) - len(self.primera)
+            relleno = array('i', (SIN_ARISTA,)) * faltan
+            self.primera.extend(relleno)
+            self.ultima.extend(relleno)
+
+    def agregar(self, estado, id_arista):
+        # Agrega al final de la lista del estado una arista recién creada (id_arista es el siguiente
+        # id); el estado ya debe tener lugar en las columnas (asegurar_estado)
+        ultima = self.ultima[estado]
+        self.siguiente.append(SIN_ARISTA)
+        self.anterior.append(ultima)
+        if ultima == SIN_ARISTA:
+            self.primera[estado] = id_arista
+        else:
+            self.siguiente[ultima] = id_arista
+        self.ultima[estado] = id_arista
+
+    def quitar(self, estado, id_arista):
+        # Desengancha una arista de la lista del estado
+        siguiente = self.siguiente[id_arista]
+        anterior = self.anterior[id_arista]
+        if anterior == SIN_ARISTA:
+            self.primera[estado] = siguiente
+        else:
+            self.siguiente[anterior] = siguiente
+        if siguiente == SIN_ARISTA:
+            self.ultima[estado] = anterior
+        else:
+            self.anterior[siguiente] = anterior
+
+    def mover(self, estado_viejo, estado_nuevo):
+        # Pasa toda la lista de estado_viejo al final de la de estado_nuevo
+        # (estado_nuevo ya debe tener lugar en las columnas)
+        if self.vacia(estado_viejo):
+            return
+        primera = self.primera[estado_viejo]
+        ultima_nueva = self.ultima[estado_nuevo]
+        if ultima_nueva == SIN_ARISTA:
+            self.primera[estado_nuevo] = primera
+        else:
+            self.siguiente[ultima_nueva] = primera
+            self.anterior[primera] = ultima_nueva
+        self.ultima[estado_nuevo] = self.ultima[estado_viejo]
+        self.primera[estado_viejo] = self.ultima[estado_viejo] = SIN_ARISTA
+
+    def ids(self, estado):
+        # Identificadores de las aristas del estado, en el orden de la lista
+        if estado >= len(self.primera):
+            return
+        siguiente = self.siguiente
+        id_arista = self.primera[estado]
+        while id_arista != SIN_ARISTA:
+            yield id_arista
+            id_arista = siguiente[id_arista]
+
+    def unica(self, estado):
+        # Identificador de la única arista del estado, o None si tiene cero o varias
+        if estado >= len(self.primera):
+            return None
+        primera = self.primera[estado]
+        if primera == SIN_ARISTA or primera != self.ultima[estado]:
+            return None
+        return primera
+
+    def vacia(self, estado):
+        # True si el estado no tiene aristas en esta lista
+        return estado >= len(self.primera) or self.primera[estado] == SIN_ARISTA
+
+
+class GrafoAFN:
+    # Grafo de transiciones del AFN con listas de aristas salientes y entrantes por estado.
+    # Las aristas se guardan en columnas paralelas de enteros (origen, símbolo y destino por
+    # identificador de arista), así que cada una ocupa unos pocos bytes y no un objeto. Cada
+    # arista tiene un identificador estable; redirigir o eliminar aristas solo toca las aristas
+    # del estado involucrado, sin recorrer todo el autómata. Una arista eliminada deja su
+    # identificador libre (origen SIN_ARISTA) y no se reutiliza.
+    # Al recorrerlo se obtienen tuplas ('qN', simbolo, 'qM').
+
+    def __init__(self, traza=None):
+        # Traza opcional donde se registran los cambios del grafo
+        self.traza = traza
+        # Tabla de símbolos: id -> carácter y carácter -> id
+        self.simbolos = [EPSILON]
+        self.ids_simbolos = {EPSILON: ID_EPSILON}
+        # Columnas de las aristas, indexadas por identificador
+        self.origenes = array('i')
+        self.etiquetas = array('i')
+        self.destinos = array('i')
+        # Listas por estado de aristas salientes y entrantes
+        self.salientes = ListasAristas()
+        self.entrantes = ListasAristas()
+        self.cantidad = 0
+        # Contadores para la instrumentación de la construcción: aristas visitadas al redirigir,
+        # mover o copiar; aristas nuevas (agregar); aristas que cambian de origen o destino
+        # (redirigir y mover_salientes, que no cuentan como creadas)
+        self.aristas_recorridas = 0
+        self.aristas_creadas = 0
+        self.aristas_movidas = 0
+
+    @property
+    def siguiente_id(self):
+        return len(self.origenes)
+
+    def simbolo(self, caracter):
+        # Devuelve el id del símbolo, registrándolo si es nuevo
+        id_simbolo = self.ids_simbolos.get(caracter)
+        if id_simbolo is None:
+            if self.traza is not None:
+                self.traza.registrar(SIMBOLO, caracter)
+            id_simbolo = self.ids_simbolos[caracter] = len(self.simbolos)
+            self.simbolos.append(caracter)
+        return id_simbolo
+
+    def agregar(self, origen, simbolo, destino):
+        # Agrega la transición (origen --simbolo--> destino) y devuelve su identificador
+        if self.traza is not None:
+            self.traza.registrar(AGREGAR, origen, simbolo, destino)
+        self.aristas_creadas += 1
+        return self._agregar(origen, simbolo, destino)
+
+    def _agregar(self, origen, simbolo, destino):
+        id_arista = len(self.origenes)
+        self.origenes.append(origen)
+        self.etiquetas.append(simbolo)
+        self.destinos.append(destino)
+        mayor = origen if origen > destino else destino
+        if mayor >= len(self.salientes.primera):
+            self._asegurar_estado(mayor)
+        self.salientes.agregar(origen, id_arista)
+        self.entrantes.agregar(destino, id_arista)
+        self.cantidad += 1
+        return id_arista
+
+    def _asegurar_estado(self, estado):
+        # Las columnas por estado de salientes y entrantes tienen siempre el mismo largo
+        if estado >= len(self.salientes.primera):
+            self.salientes.asegurar_estado(estado)
+            self.entrantes.asegurar_estado(estado)
+
+    def arista(self, id_arista):
+        # Arista (origen, simbolo, destino) de un identificador vigente
+        origen = self.origenes[id_arista]
+        if origen == SIN_ARISTA:
+            raise KeyError(id_arista)
+        return origen, self.etiquetas[id_arista], self.destinos[id_arista]
+
+    def ids(self):
+        # Identificadores de las aristas vigentes, en orden de creación
+        origenes = self.origenes
+        return (id_arista for id_arista in range(len(origenes)) if origenes[id_arista] != SIN_ARISTA)
+
+    def eliminar(self, id_arista):
+        # Elimina una arista y la quita de las listas de sus estados
+        if self.traza is not None:
+            self.traza.registrar(ELIMINAR, id_arista)
+        self._eliminar(id_arista)
+
+    def _eliminar(self, id_arista):
+        origen, _, destino = self.arista(id_arista)
+        self.salientes.quitar(origen, id_arista)
+        self.entrantes.quitar(destino, id_arista)
+        self.origenes[id_arista] = SIN_ARISTA
+        self.cantidad -= 1
+
+    def redirigir_origen(self, estado_viejo, estado_nuevo):
+        # Cambia el origen de todas las aristas que salen de estado_viejo (conserva su posición)
+        if estado_viejo == estado_nuevo:
+            return
+        if self.traza is not None:
+            self.traza.registrar(REDIRIGIR_ORIGEN, estado_viejo, estado_nuevo)
+        origenes = self.origenes
+        for id_arista in self.salientes.ids(estado_viejo):
+            origenes[id_arista] = estado_nuevo
+            self.aristas_recorridas += 1
+            self.aristas_movidas += 1
+        self._asegurar_estado(estado_nuevo)
+        self.salientes.mover(estado_viejo, estado_nuevo)
+
+    def redirigir_destino(self, estado_viejo, estado_nuevo):
+        # Cambia el destino de todas las aristas que llegan a estado_viejo (conserva su posición)
+        if estado_viejo == estado_nuevo:
+            return
+        if self.traza is not None:
+            self.traza.registrar(REDIRIGIR_DESTINO, estado_viejo, estado_nuevo)
+        destinos = self.destinos
+        for id_arista in self.entrantes.ids(estado_viejo):
+            destinos[id_arista] = estado_nuevo
+            self.aristas_recorridas += 1
+            self.aristas_movidas += 1
+        self._asegurar_estado(estado_nuevo)
+        self.entrantes.mover(estado_viejo, estado_nuevo)
+
+    def mover_salientes(self, estado_viejo, estado_nuevo):
+        # Reemplaza las aristas que salen de estado_viejo por aristas nuevas desde estado_nuevo,
+        # agregadas al final (mismo orden que el filtrado y extend de la lista original)
+        if self.traza is not None:
+            self.traza.registrar(MOVER_SALIENTES, estado_viejo, estado_nuevo)
+        ids = sorted(self.salientes.ids(estado_viejo))
+        self.aristas_recorridas += len(ids)
+        self.aristas_movidas += len(ids)
+        movidas = [self.arista(id_arista) for id_arista in ids]
+        for id_arista in ids:
+            self._eliminar(id_arista)
+        for _, simbolo, destino in movidas:
+            self._agregar(estado_nuevo, simbolo, destino)
+
+    def ids_alcanzables(self, estado):
+        # Identificadores de las aristas alcanzables desde estado, en orden de creación
+        ids = []
+        pendientes = [estado]
+        visitados = {estado}
+        destinos = self.destinos
+        while pendientes:
+            actual = pendientes.pop()
+            for id_arista in self.salientes.ids(actual):
+                ids.append(id_arista)
+                destino = destinos[id_arista]
+                if destino not in visitados:
+                    visitados.add(destino)
+                    pendientes.append(destino)
+        ids.sort()
+        self.aristas_recorridas += len(ids)
+        return ids
+
+    def aristas_alcanzables(self, estado):
+        # Aristas (origen, simbolo, destino) alcanzables desde estado. Para un fragmento de la
+        # construcción son exactamente sus aristas: sirven de modelo para copiarlo.
+        return [self.arista(id_arista) for id_arista in self.ids_alcanzables(estado)]
+
+    def copiar_aristas(self, modelo, mapa, nuevo_estado):
+        # Agrega una copia de las aristas del modelo renumerando sus estados: mapa fija algunos
+        # estados (se completa con los nuevos que crea nuevo_estado()). Devuelve el mapa.
+        for origen, simbolo, destino in modelo:
+            nuevo_origen = mapa.get(origen)
+            if nuevo_origen is None:
+                nuevo_origen = mapa[origen] = nuevo_estado()
+            nuevo_destino = mapa.get(destino)
+            if nuevo_destino is None:
+                nuevo_destino = mapa[destino] = nuevo_estado()
+            self.agregar(nuevo_origen, simbolo, nuevo_destino)
+        return mapa
+
+    def estados(self):
+        # Todos los estados (enteros) que participan en alguna transición
+        return {estado for estado, (saliente, entrante) in enumerate(zip(self.salientes.primera, self.entrantes.primera))
+                if saliente != SIN_ARISTA or entrante != SIN_ARISTA}
+
+    def transiciones_numericas(self):
+        # Transiciones (origen, caracter, destino) con estados enteros, para los simuladores
+        simbolos, origenes, etiquetas, destinos = self.simbolos, self.origenes, self.etiquetas, self.destinos
+        return [(origenes[id_arista], simbolos[etiquetas[id_arista]], destinos[id_arista]) for id_arista in self.ids()]
+
+    def copy(self):
+        # Copia de las transiciones como lista de tuplas ('qN', simbolo, 'qM') para mostrar o dibujar
+        simbolos, origenes, etiquetas, destinos = self.simbolos, self.origenes, self.etiquetas, self.destinos
+        return [(nombre_estado(origenes[id_arista]), simbolos[etiquetas[id_arista]], nombre_estado(destinos[id_arista]))
+                for id_arista in self.ids()]
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def __len__(self):
+        return self.cantidad
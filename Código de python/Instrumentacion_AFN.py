@@ -0,0 +1,98 @@
+import json
+import marshal
+from Analizador_ER import Repeticion
+
+# Nombre de cada token del postfijo en las estadísticas (los símbolos del alfabeto se agrupan)
+OPERANDO = 'simbolo'
+REPETICION = '{m,n}'
+# Copia de una subexpresión repetida desde su plantilla (compartir_subexpresiones)
+PLANTILLA = 'plantilla'
+NOMBRES_OPERADORES = {'.': '.', '|': '|', ',': '|', '*': '*', '+': '+', '?': '?', '^': '^', PLANTILLA: PLANTILLA}
+
+
+class EstadisticaOperador:
+    # Acumulados de un tipo de operador durante la construcción. Las aristas movidas (redirigidas o
+    # pasadas a otro origen) se cuentan aparte de las creadas.
+    __slots__ = ('invocaciones', 'tiempo', 'aristas_recorridas', 'aristas_creadas', 'aristas_movidas',
+                 'profundidad_maxima')
+
+    def __init__(self):
+        self.invocaciones = 0
+        self.tiempo = 0.0
+        self.aristas_recorridas = 0
+        self.aristas_creadas = 0
+        self.aristas_movidas = 0
+        self.profundidad_maxima = 0
+
+    def a_diccionario(self):
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__}
+
+
+class EstadisticasConstruccion:
+    # Observador de conversion_a_afn: se asigna a ExpresionRegularAFN.instrumentacion (o se usa
+    # compilar(..., instrumentar=True)) y recibe una llamada a operador() por cada token del postfijo.
+    # Cualquier objeto con el mismo método operador() sirve como observador propio.
+    # Sin observador la conversión no mide nada (solo compara con None una vez por token).
+    # El tiempo de las imágenes paso a paso se lee del renderizador y se informa aparte, porque
+    # se generan en segundo plano después de la conversión.
+
+    def __init__(self):
+        self.operadores = {}
+        self.tiempo_total = 0.0
+        self.profundidad_maxima = 0
+        self.renderizador = None
+
+    def operador(self, token, segundos, aristas_recorridas, aristas_creadas, aristas_movidas, profundidad):
+        # Registra una aplicación de un operador (o la lectura de un símbolo del alfabeto)
+        if isinstance(token, str):
+            nombre = NOMBRES_OPERADORES.get(token, OPERANDO)
+        else:
+            nombre = REPETICION if isinstance(token, Repeticion) else OPERANDO
+        estadistica = self.operadores.get(nombre)
+        if estadistica is None:
+            estadistica = self.operadores[nombre] = EstadisticaOperador()
+        estadistica.invocaciones += 1
+        estadistica.tiempo += segundos
+        estadistica.aristas_recorridas += aristas_recorridas
+        estadistica.aristas_creadas += aristas_creadas
+        estadistica.aristas_movidas += aristas_movidas
+        if profundidad > estadistica.profundidad_maxima:
+            estadistica.profundidad_maxima = profundidad
+        if profundidad > self.profundidad_maxima:
+            self.profundidad_maxima = profundidad
+        self.tiempo_total += segundos
+
+    def renderizado(self):
+        # Imágenes generadas y tiempo acumulado de Graphviz (None si no hubo renderizado)
+        if self.renderizador is None or not self.renderizador.activo:
+            return None
+        return {'imagenes': self.renderizador.imagenes, 'tiempo': self.renderizador.tiempo_imagenes}
+
+    def a_diccionario(self):
+        return {
+            'operadores': {nombre: estadistica.a_diccionario() for nombre, estadistica in self.operadores.items()},
+            'tiempo_total': self.tiempo_total,
+            'profundidad_maxima': self.profundidad_maxima,
+            'renderizado': self.renderizado(),
+        }
+
+    def a_json(self, **opciones):
+        return json.dumps(self.a_diccionario(), ensure_ascii=False, **opciones)
+
+    def create_stats(self):
+        # Protocolo de pstats: pstats.Stats(estadisticas) lee self.stats después de llamar a este método.
+        # Cada operador es una "función" (archivo, línea, nombre) con sus llamadas y tiempos.
+        self.stats = {}
+        for nombre, estadistica in self.operadores.items():
+            self.stats[('Conversion_ER_AFN.py', 0, f"conversion_a_afn[{nombre}]")] = (
+                estadistica.invocaciones, estadistica.invocaciones, estadistica.tiempo, estadistica.tiempo, {})
+        datos_render = self.renderizado()
+        if datos_render is not None:
+            self.stats[('Renderizado_AFN.py', 0, 'renderizar_paso')] = (
+                datos_render['imagenes'], datos_render['imagenes'], datos_render['tiempo'], datos_render['tiempo'], {})
+
+    def guardar_pstats(self, ruta):
+        # Guarda las estadísticas en el formato de cProfile (se abren con pstats.Stats(ruta) o snakeviz)
+        self.create_stats()
+        with open(ruta, 'wb') as archivo:
+            marshal.dump(self.stats, archivo)
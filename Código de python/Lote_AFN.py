@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from Conversion_ER_AFN import compilar, CONSTRUCCION_THOMPSON
+from Cache_AFN import CacheAutomatas
+
+
+def leer_patrones(archivo, formato=None):
+    # Genera (identificador, expresion) desde un archivo abierto. En formato 'lineas' cada línea
+    # no vacía es una expresión; en 'jsonl' cada línea es un objeto con "expresion" y opcionalmente "id".
+    # Una línea JSONL ilegible genera (número de línea, ValueError) en lugar de detener la lectura;
+    # convertir_lote la convierte en un resultado con "error".
+    for numero, linea in enumerate(archivo, start=1):
+        linea = linea.rstrip('\r\n')
+        if not linea.strip():
+            continue
+        if formato == 'jsonl':
+            try:
+                registro = json.loads(linea)
+            except ValueError as error:
+                yield numero, ValueError(f"Línea {numero}: JSON inválido ({error})")
+                continue
+            if not isinstance(registro, dict) or 'expresion' not in registro:
+                yield numero, ValueError(f"Línea {numero}: se esperaba un objeto con el campo \"expresion\"")
+                continue
+            yield registro.get('id', numero), registro['expresion']
+        else:
+            yield numero, linea
+
+
+# Caché de autómatas de cada proceso trabajador, por directorio
+_caches = {}
+
+
+def cache_de_proceso(directorio):
+    # CacheAutomatas del proceso actual para el directorio (se crea una vez por proceso)
+    if directorio not in _caches:
+        _caches[directorio] = CacheAutomatas(directorio)
+    return _caches[directorio]
+
+
+def convertir_lote(patrones, afd=False, cache=None, optimizar=False, construccion=CONSTRUCCION_THOMPSON,
+                   compartir=False):
+    # Convierte cada (identificador, expresion) en el mismo proceso y genera un resultado por patrón.
+    # Un patrón inválido produce un resultado con "error" sin detener el lote.
+    # Con una CacheAutomatas los patrones repetidos no se vuelven a convertir.
+    for identificador, expresion in patrones:
+        if isinstance(expresion, Exception):
+            # Línea ilegible del archivo de entrada (ver leer_patrones)
+            yield {'id': identificador, 'ok': False, 'expresion': None,
+                   'error': f"{type(expresion).__name__}: {expresion}"}
+            continue
+        try:
+            if cache is not None:
+                automata = cache.compilar(expresion, afd=afd, optimizar=optimizar, construccion=construccion,
+                                          compartir=compartir)
+            else:
+                automata = compilar(expresion, afd=afd, optimizar=optimizar, construccion=construccion,
+                                    compartir=compartir)
+            resultado = automata.a_diccionario()
+            resultado['expresion'] = expresion
+            resultado = {'id': identificador, 'ok': True, **resultado}
+        except Exception as error:
+            # Cualquier fallo queda aislado en el resultado de su patrón
+            resultado = {'id': identificador, 'ok': False, 'expresion': expresion,
+                         'error': f"{type(error).__name__}: {error}"}
+        yield resultado
+
+
+def _convertir_bloque(bloque, afd, directorio_cache=None, optimizar=False, construccion=CONSTRUCCION_THOMPSON,
+                      compartir=False):
+    # Tarea de un proceso trabajador: convierte un bloque de patrones completo
+    cache = cache_de_proceso(directorio_cache) if directorio_cache is not None else None
+    return list(convertir_lote(bloque, afd, cache, optimizar, construccion, compartir))
+
+
+def convertir_lote_paralelo(patrones, trabajadores=None, tamano_bloque=64, ordenado=True, afd=False, directorio_cache=None,
+                            optimizar=False, construccion=CONSTRUCCION_THOMPSON, compartir=False):
+    # Reparte los patrones en bloques entre un pool de procesos y genera los resultados a medida
+    # que terminan: en el orden de entrada si ordenado, o en el orden en que se completan.
+    # Solo hay unos pocos bloques en vuelo a la vez, así que la entrada se lee de forma incremental.
+    patrones = iter(patrones)
+    trabajadores = trabajadores or os.cpu_count() or 1
+    en_vuelo = 2 * trabajadores
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        pendientes = {}
+        siguiente_envio = 0
+        siguiente_entrega = 0
+        terminados = {}
+        agotado = False
+        while True:
+            # Mantener el pool alimentado con bloques nuevos
+            while not agotado and len(pendientes) < en_vuelo:
+                bloque = list(islice(patrones, tamano_bloque))
+                if not bloque:
+                    agotado = True
+                    break
+                futuro = ejecutor.submit(_convertir_bloque, bloque, afd, directorio_cache, optimizar, construccion,
+                                         compartir)
+                pendientes[futuro] = (siguiente_envio, bloque)
+                siguiente_envio += 1
+            if not pendientes:
+                return
+            listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                numero, bloque = pendientes.pop(futuro)
+                try:
+                    resultados = futuro.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as error:
+                    # Fallo al transportar el bloque: se reporta en cada patrón del bloque
+                    resultados = [{'id': identificador, 'ok': False, 'expresion': expresion,
+                                   'error': f"{type(error).__name__}: {error}"} for identificador, expresion in bloque]
+                if ordenado:
+                    terminados[numero] = resultados
+                else:
+                    yield from resultados
+            # Entregar en orden los bloques consecutivos ya terminados
+            while siguiente_entrega in terminados:
+                yield from terminados.pop(siguiente_entrega)
+                siguiente_entrega += 1
+
+
+def convertir_archivo(ruta, ruta_salida=None, formato=None, afd=False, trabajadores=None, tamano_bloque=64, ordenado=True,
+                      directorio_cache=None, optimizar=False, construccion=CONSTRUCCION_THOMPSON, compartir=False):
+    # Lee un archivo de patrones y escribe los resultados como JSON por líneas a medida que se generan.
+    # Con trabajadores se usa un pool de procesos. Al final informa el rendimiento por stderr.
+    # Devuelve 0 si todos los patrones se convirtieron y 1 si alguno falló.
+    if formato is None:
+        formato = 'jsonl' if ruta.endswith('.jsonl') else 'lineas'
+    entrada = sys.stdin if ruta == '-' else open(ruta, encoding='utf-8')
+    salida = sys.stdout if ruta_salida is None else open(ruta_salida, 'w', encoding='utf-8')
+    patrones = leer_patrones(entrada, formato)
+    if trabajadores:
+        resultados = convertir_lote_paralelo(patrones, trabajadores, tamano_bloque, ordenado, afd, directorio_cache,
+                                             optimizar, construccion, compartir)
+    else:
+        cache = cache_de_proceso(directorio_cache) if directorio_cache is not None else None
+        resultados = convertir_lote(patrones, afd, cache, optimizar, construccion, compartir)
+    total = 0
+    fallidos = 0
+    aciertos = tokens_ahorrados = 0
+    inicio = time.perf_counter()
+    try:
+        for resultado in resultados:
+            total += 1
+            if not resultado['ok']:
+                fallidos += 1
+            elif 'subexpresiones' in resultado:
+                aciertos += resultado['subexpresiones']['aciertos']
+                tokens_ahorrados += resultado['subexpresiones']['tokens_ahorrados']
+            salida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+        salida.flush()
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    duracion = time.perf_counter() - inicio
+    velocidad = total / duracion if duracion > 0 else 0.0
+    print(f"Convertidos {total} patrones ({fallidos} con error) en {duracion:.3f} s: {velocidad:.1f} patrones/s",
+          file=sys.stderr)
+    if compartir:
+        print(f"Subexpresiones reutilizadas: {aciertos} ({tokens_ahorrados} tokens sin construir)", file=sys.stderr)
+    return 1 if fallidos else 0
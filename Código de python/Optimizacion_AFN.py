@@ -0,0 +1,129 @@
+from Grafo_AFN import ID_EPSILON
+
+
+def contar(afn):
+    # Número de estados y de transiciones del AFN
+    return len(afn.numeros_estados()), len(afn.transiciones)
+
+
+def eliminar_duplicadas(grafo):
+    # Quita las transiciones repetidas y los bucles ε (q --ε--> q), que no cambian el lenguaje.
+    # Devuelve cuántas se eliminaron.
+    vistas = set()
+    repetidas = []
+    for id_arista in grafo.ids():
+        clave = origen, simbolo, destino = grafo.arista(id_arista)
+        if clave in vistas or (simbolo == ID_EPSILON and origen == destino):
+            repetidas.append(id_arista)
+        else:
+            vistas.add(clave)
+    for id_arista in repetidas:
+        grafo.eliminar(id_arista)
+    return len(repetidas)
+
+
+def colapsar_epsilon(afn):
+    # Fusiona los estados unidos por una transición ε que es el único camino posible:
+    #  - si p solo tiene la salida p --ε--> q y p no es final, p se reemplaza por q;
+    #  - si q solo tiene la entrada p --ε--> q y q no es el inicial, q se reemplaza por p
+    #    (p pasa a ser final si q lo era).
+    # Cada fusión deja un estado aislado; las cadenas de ε se recorren con una lista de trabajo.
+    grafo = afn.transiciones
+    pendientes = list(grafo.estados())
+    colapsadas = 0
+    while pendientes:
+        estado = pendientes.pop()
+        for fusion in (_fusionar_salida, _fusionar_entrada):
+            superviviente = fusion(afn, grafo, estado)
+            if superviviente is not None:
+                colapsadas += 1
+                pendientes.append(superviviente)
+                break
+    return colapsadas
+
+
+def _unica_arista(listas, grafo, estado):
+    # Arista única (id, (origen, simbolo, destino)) de un estado en sus salientes o entrantes,
+    # o (None, None) si tiene cero o varias
+    id_arista = listas.unica(estado)
+    if id_arista is None:
+        return None, None
+    return id_arista, grafo.arista(id_arista)
+
+
+def _fusionar_salida(afn, grafo, estado):
+    id_arista, arista = _unica_arista(grafo.salientes, grafo, estado)
+    if arista is None or arista[1] != ID_EPSILON or estado in afn.finales:
+        return None
+    destino = arista[2]
+    if destino == estado:
+        return None
+    grafo.eliminar(id_arista)
+    grafo.redirigir_destino(estado, destino)
+    if afn.inicio == estado:
+        afn.inicio = destino
+    return destino
+
+
+def _fusionar_entrada(afn, grafo, estado):
+    id_arista, arista = _unica_arista(grafo.entrantes, grafo, estado)
+    if arista is None or arista[1] != ID_EPSILON or estado == afn.inicio:
+        return None
+    origen = arista[0]
+    if origen == estado:
+        return None
+    grafo.eliminar(id_arista)
+    grafo.redirigir_origen(estado, origen)
+    if estado in afn.finales:
+        afn.finales.discard(estado)
+        afn.finales.add(origen)
+    return origen
+
+
+def _alcanzables(listas, extremos, iniciales):
+    # Estados alcanzables desde iniciales siguiendo las listas de aristas (salientes o entrantes);
+    # extremos es la columna del otro extremo de cada arista (destinos u orígenes)
+    visitados = set(iniciales)
+    pila = list(iniciales)
+    while pila:
+        estado = pila.pop()
+        for id_arista in listas.ids(estado):
+            siguiente = extremos[id_arista]
+            if siguiente not in visitados:
+                visitados.add(siguiente)
+                pila.append(siguiente)
+    return visitados
+
+
+def podar(afn):
+    # Elimina las transiciones de estados inalcanzables desde el inicial o desde los que no se
+    # llega a ningún estado final (estados muertos). Devuelve cuántas transiciones se quitaron.
+    grafo = afn.transiciones
+    accesibles = _alcanzables(grafo.salientes, grafo.destinos, [afn.inicio])
+    utiles = _alcanzables(grafo.entrantes, grafo.origenes, afn.finales)
+    vivos = accesibles & utiles
+    sobrantes = [id_arista for id_arista in grafo.ids()
+                 if grafo.origenes[id_arista] not in vivos or grafo.destinos[id_arista] not in vivos]
+    for id_arista in sobrantes:
+        grafo.eliminar(id_arista)
+    afn.finales &= accesibles
+    return len(sobrantes)
+
+
+def optimizar(afn):
+    # Pasada de limpieza sobre un AFN ya construido (ExpresionRegularAFN): quita transiciones
+    # duplicadas, colapsa cadenas de ε y poda estados inalcanzables y muertos. El lenguaje no cambia.
+    # Devuelve los conteos de estados y transiciones antes y después.
+    estados_antes, aristas_antes = contar(afn)
+    eliminar_duplicadas(afn.transiciones)
+    colapsar_epsilon(afn)
+    podar(afn)
+    # Las fusiones pueden dejar nuevas transiciones repetidas
+    eliminar_duplicadas(afn.transiciones)
+    estados_despues, aristas_despues = contar(afn)
+    return {
+        'estados_antes': estados_antes,
+        'aristas_antes': aristas_antes,
+        'estados_despues': estados_despues,
+        'aristas_despues': aristas_despues,
+    }
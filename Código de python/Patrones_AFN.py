@@ -0,0 +1,141 @@
+from Conversion_ER_AFN import compilar, CONSTRUCCION_THOMPSON
+from Simulacion_AFN import SimuladorAFN, EPSILON
+from AFD_Minimo import determinizar, minimizar
+
+
+class ConjuntoPatrones:
+    # Varias expresiones regulares compiladas en un solo autómata: un estado inicial común con
+    # transiciones ε hacia el inicio de cada patrón. Cada estado final sabe qué patrones acepta,
+    # así que una sola pasada sobre el texto responde por todos los patrones a la vez.
+    # Con afd=True además se determiniza y minimiza el conjunto (cada estado del AFD lleva la
+    # tupla de patrones que acepta) y las consultas recorren la tabla del AFD. No es el valor por
+    # defecto: la construcción de subconjuntos sobre la unión de todos los patrones puede crecer
+    # de forma exponencial, igual que en compilar(afd=...).
+
+    def __init__(self, patrones, construccion=CONSTRUCCION_THOMPSON, optimizar=False, afd=False, cache=None):
+        # patrones: lista de expresiones (el identificador es su posición) o de pares (identificador, expresion).
+        # Con una CacheAutomatas los patrones ya compilados no se vuelven a convertir.
+        self.identificadores = []
+        self.expresiones = []
+        for indice, patron in enumerate(patrones):
+            identificador, expresion = patron if isinstance(patron, tuple) else (indice, patron)
+            self.identificadores.append(identificador)
+            self.expresiones.append(expresion)
+
+        # Se copian las transiciones de cada patrón desplazando la numeración de sus estados
+        transiciones = []
+        inicios = []
+        finales_patrones = []
+        desplazamiento = 0
+        for expresion in self.expresiones:
+            if cache is not None:
+                automata = cache.compilar(expresion, optimizar=optimizar, construccion=construccion)
+            else:
+                automata = compilar(expresion, optimizar=optimizar, construccion=construccion)
+            for origen, simbolo, destino in automata.transiciones.transiciones_numericas():
+                transiciones.append((origen + desplazamiento, simbolo, destino + desplazamiento))
+            inicios.append(automata.inicio + desplazamiento)
+            finales_patrones.append([estado + desplazamiento for estado in automata.finales])
+            desplazamiento += max(automata.numeros_estados()) + 1
+        self.inicio = desplazamiento
+        transiciones.extend((self.inicio, EPSILON, inicio) for inicio in inicios)
+
+        finales = {estado for finales_patron in finales_patrones for estado in finales_patron}
+        self.simulador = SimuladorAFN(self.inicio, finales, transiciones)
+        numeros = self.simulador.numeros
+        # Mapa de bits de los estados finales de cada patrón y, al revés, patrones de cada bit final
+        self.finales_patrones = [sum(1 << numeros[estado] for estado in finales_patron)
+                                 for finales_patron in finales_patrones]
+        self.patrones_de_bit = {}
+        for indice, finales_patron in enumerate(finales_patrones):
+            for estado in finales_patron:
+                self.patrones_de_bit.setdefault(numeros[estado], []).append(indice)
+
+        self.afd = minimizar(determinizar(self.simulador, self.finales_patrones)) if afd else None
+
+    def __len__(self):
+        return len(self.expresiones)
+
+    def _indices(self, mascara):
+        # Índices (ordenados) de los patrones con algún estado final en el mapa de bits
+        indices = set()
+        mascara &= self.simulador.finales
+        while mascara:
+            bit = mascara & -mascara
+            indices.update(self.patrones_de_bit[bit.bit_length() - 1])
+            mascara ^= bit
+        return sorted(indices)
+
+    def coincidencias(self, texto):
+        # Identificadores de los patrones que reconocen el texto completo, en el orden de la lista
+        if self.afd is not None:
+            afd = self.afd
+            tabla, columnas, k, muerto = afd.tabla, afd.columnas, afd.num_columnas, afd.estado_muerto
+            estado = afd.inicial
+            for caracter in texto:
+                estado = tabla[estado * k + columnas[caracter]]
+                if estado == muerto:
+                    return []
+            indices = afd.etiquetas[estado]
+        else:
+            simulador = self.simulador
+            mascara = simulador.inicial
+            for caracter in texto:
+                mascara = simulador.paso(mascara, caracter)
+                if not mascara:
+                    return []
+            indices = self._indices(mascara)
+        return [self.identificadores[indice] for indice in indices]
+
+    def presentes(self, texto):
+        # Identificadores de los patrones que aparecen en alguna parte del texto. Una sola pasada
+        # simulando el AFN sin anclar (se vuelve a sembrar el estado inicial en cada posición);
+        # termina antes si ya se alcanzaron todos los estados finales.
+        simulador = self.simulador
+        inicial, finales = simulador.inicial, simulador.finales
+        mascara = inicial
+        vistos = mascara & finales
+        for caracter in texto:
+            if vistos == finales:
+                break
+            mascara = simulador.paso(mascara, caracter) | inicial
+            vistos |= mascara & finales
+        return [self.identificadores[indice] for indice in self._indices(vistos)]
+
+    def _mas_larga(self, texto, inicio):
+        # Fin y patrón de la coincidencia más larga y no vacía desde inicio (el primer patrón de la
+        # lista gana los empates), o (None, None)
+        mejor_fin, mejor_indice = None, None
+        if self.afd is not None:
+            afd = self.afd
+            tabla, columnas, k, muerto, etiquetas = (afd.tabla, afd.columnas, afd.num_columnas,
+                                                     afd.estado_muerto, afd.etiquetas)
+            estado = afd.inicial
+            for posicion in range(inicio, len(texto)):
+                estado = tabla[estado * k + columnas[texto[posicion]]]
+                if estado == muerto:
+                    break
+                if etiquetas[estado]:
+                    mejor_fin, mejor_indice = posicion + 1, etiquetas[estado][0]
+        else:
+            simulador = self.simulador
+            mascara = simulador.inicial
+            for posicion in range(inicio, len(texto)):
+                mascara = simulador.paso(mascara, texto[posicion])
+                if not mascara:
+                    break
+                if mascara & simulador.finales:
+                    mejor_fin, mejor_indice = posicion + 1, self._indices(mascara)[0]
+        return mejor_fin, mejor_indice
+
+    def tokenizar(self, texto, inicio=0):
+        # Divide el texto en tokens con la regla de la coincidencia más larga (en un empate gana el
+        # patrón que aparece primero en la lista). Genera (identificador, inicio, fin) y lanza
+        # ValueError si en alguna posición ningún patrón reconoce al menos un carácter.
+        posicion = inicio
+        while posicion < len(texto):
+            fin, indice = self._mas_larga(texto, posicion)
+            if fin is None:
+                raise ValueError(f"Ningún patrón reconoce la entrada en la posición {posicion}")
+            yield self.identificadores[indice], posicion, fin
+            posicion = fin
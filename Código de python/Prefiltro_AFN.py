@@ -0,0 +1,215 @@
+from Analizador_ER import OPERADORES_BINARIOS, OPERADORES_POSFIJOS, Repeticion
+from Clases_AFN import ConjuntoSimbolos
+
+# Análisis de literales para acelerar search: de cada expresión se obtienen los prefijos
+# literales con los que empieza toda coincidencia (ab en ab(c|d)*) y las subcadenas literales
+# que toda coincidencia contiene (una de ellas, si hay varias). La búsqueda salta con str.find
+# a las posiciones donde aparece un prefijo y solo ahí simula el autómata.
+
+# Máximo de literales de cada conjunto (cadenas exactas, prefijos, subcadenas requeridas)
+MAXIMO_LITERALES = 16
+# Una clase de caracteres con más caracteres que esto no se enumera como literales
+MAXIMO_CLASE = 8
+
+
+def _producto(primeras, segundas):
+    # Concatenaciones de cada cadena de primeras con cada una de segundas (None si son demasiadas)
+    if len(primeras) * len(segundas) > MAXIMO_LITERALES:
+        return None
+    return frozenset(primera + segunda for primera in primeras for segunda in segundas)
+
+
+def _union(primeras, segundas):
+    if primeras is None or segundas is None or len(primeras) + len(segundas) > MAXIMO_LITERALES:
+        return None
+    return primeras | segundas
+
+
+def _utiles(literales):
+    # Un conjunto sirve como prefiltro solo si ninguna de sus cadenas es vacía
+    if literales is None or '' in literales:
+        return None
+    return literales
+
+
+def _mejor(*conjuntos):
+    # El conjunto más selectivo: la cadena más corta es la más larga posible y, a igualdad, menos cadenas
+    utiles = [conjunto for conjunto in conjuntos if _utiles(conjunto) is not None]
+    if not utiles:
+        return None
+    return max(utiles, key=lambda conjunto: (min(map(len, conjunto)), -len(conjunto)))
+
+
+def _caracteres(conjunto):
+    # Caracteres de una clase pequeña como cadenas de un carácter (None si la clase es grande)
+    if sum(fin - inicio for inicio, fin in conjunto.rangos) > MAXIMO_CLASE:
+        return None
+    return frozenset(chr(codigo) for inicio, fin in conjunto.rangos for codigo in range(inicio, fin))
+
+
+def _potencias(literales, minimo, maximo):
+    # Cadenas de X{minimo,maximo} a partir de las cadenas exactas de X (None si son demasiadas)
+    if literales == frozenset(('',)):
+        return literales
+    actual = frozenset(('',))
+    for _ in range(minimo):
+        actual = _producto(actual, literales)
+        if actual is None:
+            return None
+    resultado = actual
+    for _ in range(maximo - minimo):
+        actual = _producto(actual, literales)
+        resultado = _union(resultado, actual)
+        if resultado is None:
+            return None
+    return resultado
+
+
+def extraer_literales(postfijo):
+    # Recorre el postfijo con una pila de (exactas, prefijos, sufijos, requeridas) por subexpresión:
+    #   exactas: todas las cadenas que reconoce, si son pocas y finitas
+    #   prefijos / sufijos: toda coincidencia empieza / termina con una de estas cadenas (no vacías)
+    #   requeridas: toda coincidencia contiene una de estas cadenas (no vacías)
+    # Cualquiera de ellos es None cuando no se puede garantizar. En una concatenación XY también
+    # se requiere un sufijo de X seguido de un prefijo de Y, así que los literales se unen aunque
+    # la concatenación se agrupe por la izquierda (a[^]*zzzz requiere zzzz).
+    # Devuelve (prefijos, requeridas).
+    pila = []
+    for token in postfijo:
+        if isinstance(token, Repeticion) or (isinstance(token, str) and token in OPERADORES_POSFIJOS):
+            exactas, prefijos, sufijos, requeridas = pila.pop()
+            if token == '?':
+                exactas = _union(exactas, frozenset(('',)))
+                prefijos = sufijos = requeridas = None
+            elif token == '*':
+                exactas = prefijos = sufijos = requeridas = None
+            elif token == '+':
+                exactas = None
+            else:
+                if exactas is not None:
+                    exactas = None if token.maximo is None else _potencias(exactas, token.minimo, token.maximo)
+                if token.minimo == 0:
+                    prefijos = sufijos = requeridas = None
+        elif isinstance(token, str) and token in OPERADORES_BINARIOS:
+            exactas_2, prefijos_2, sufijos_2, requeridas_2 = pila.pop()
+            exactas_1, prefijos_1, sufijos_1, requeridas_1 = pila.pop()
+            if token == '.':
+                exactas = None if exactas_1 is None or exactas_2 is None else _producto(exactas_1, exactas_2)
+                if exactas_1 is None:
+                    prefijos = prefijos_1
+                elif prefijos_2 is not None:
+                    prefijos = _producto(exactas_1, prefijos_2) or _utiles(exactas_1)
+                else:
+                    prefijos = _utiles(exactas_1)
+                if exactas_2 is None:
+                    sufijos = sufijos_2
+                elif sufijos_1 is not None:
+                    sufijos = _producto(sufijos_1, exactas_2) or _utiles(exactas_2)
+                else:
+                    sufijos = _utiles(exactas_2)
+                unidas = None if sufijos_1 is None or prefijos_2 is None else _producto(sufijos_1, prefijos_2)
+                requeridas = _mejor(requeridas_1, requeridas_2, unidas)
+            else:
+                exactas = _union(exactas_1, exactas_2)
+                prefijos = _union(prefijos_1, prefijos_2)
+                sufijos = _union(sufijos_1, sufijos_2)
+                requeridas = _union(requeridas_1, requeridas_2)
+        elif token == '^':
+            exactas = frozenset(('',))
+            prefijos = sufijos = requeridas = None
+        else:
+            exactas = _caracteres(token) if isinstance(token, ConjuntoSimbolos) else frozenset((token,))
+            prefijos = sufijos = requeridas = None
+        # Las cadenas exactas son a la vez los prefijos, sufijos y subcadenas requeridas más precisos
+        if _utiles(exactas) is not None:
+            prefijos = sufijos = exactas
+            requeridas = _mejor(requeridas, exactas)
+        pila.append((exactas, prefijos, sufijos, requeridas))
+    _, prefijos, _, requeridas = pila.pop()
+    return _reducir(prefijos, str.startswith), _reducir(requeridas, str.__contains__)
+
+
+def _reducir(literales, cubre):
+    # Quita las cadenas que ya cubre otra más corta del conjunto (para prefijos, las que empiezan
+    # con otra; para requeridas, las que contienen otra): las posiciones candidatas no cambian
+    if literales is None:
+        return None
+    resultado = []
+    for literal in sorted(literales, key=len):
+        if not any(cubre(literal, otro) for otro in resultado):
+            resultado.append(literal)
+    return tuple(resultado)
+
+
+class BuscadorLiterales:
+    # Posiciones donde aparece alguno de varios literales, con str.find (velocidad de C).
+    # Con varios literales se guarda la próxima aparición de cada uno y se avanza siempre el menor,
+    # así que cada literal recorre el texto una sola vez.
+
+    def __init__(self, literales):
+        self.literales = tuple(literales)
+
+    def primera(self, texto, inicio=0):
+        # Posición de la primera aparición de cualquier literal desde inicio, o -1
+        mejor = -1
+        for literal in self.literales:
+            posicion = texto.find(literal, inicio, len(texto) if mejor < 0 else mejor + len(literal))
+            if posicion >= 0 and (mejor < 0 or posicion < mejor):
+                mejor = posicion
+        return mejor
+
+    def posiciones(self, texto, inicio=0):
+        # Genera en orden creciente (y sin repetir) las posiciones donde empieza algún literal,
+        # incluidas las apariciones solapadas
+        find = texto.find
+        if len(self.literales) == 1:
+            literal = self.literales[0]
+            posicion = find(literal, inicio)
+            while posicion >= 0:
+                yield posicion
+                posicion = find(literal, posicion + 1)
+            return
+        proximas = {literal: find(literal, inicio) for literal in self.literales}
+        proximas = {literal: posicion for literal, posicion in proximas.items() if posicion >= 0}
+        while proximas:
+            menor = min(proximas.values())
+            yield menor
+            for literal, posicion in list(proximas.items()):
+                if posicion == menor:
+                    siguiente = find(literal, menor + 1)
+                    if siguiente < 0:
+                        del proximas[literal]
+                    else:
+                        proximas[literal] = siguiente
+
+
+class Prefiltro:
+    # Literales de una expresión listos para filtrar la búsqueda:
+    #   prefijos: toda coincidencia empieza en una posición donde aparece uno de ellos
+    #   requeridas: si ninguna aparece en el texto, no hay coincidencias
+    # Las subcadenas requeridas solo se consultan si aportan algo distinto de los prefijos.
+
+    def __init__(self, prefijos=None, requeridas=None):
+        self.prefijos = prefijos or None
+        self.requeridas = requeridas if requeridas and requeridas != prefijos else None
+        self.buscador_prefijos = BuscadorLiterales(self.prefijos) if self.prefijos else None
+        self.buscador_requeridas = BuscadorLiterales(self.requeridas) if self.requeridas else None
+
+    @classmethod
+    def desde_postfijo(cls, postfijo):
+        # Prefiltro de una expresión ya analizada, o None si no tiene literales útiles
+        prefijos, requeridas = extraer_literales(postfijo)
+        if not prefijos and not requeridas:
+            return None
+        return cls(prefijos, requeridas)
+
+    def posible(self, texto, inicio=0):
+        # False si el texto desde inicio no contiene ninguna de las subcadenas requeridas
+        return self.buscador_requeridas is None or self.buscador_requeridas.primera(texto, inicio) >= 0
+
+    def candidatos(self, texto, inicio=0):
+        # Posiciones (en orden creciente) donde puede empezar una coincidencia
+        return self.buscador_prefijos.posiciones(texto, inicio)
+
+    def a_diccionario(self):
+        return {'prefijos': list(self.prefijos or ()), 'requeridas': list(self.requeridas or ())}
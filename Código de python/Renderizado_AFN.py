@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from Grafo_AFN import nombre_estado
+
+# Modos de renderizado de la construcción paso a paso
+MODO_TODOS = 'todos'        # Una imagen por cada símbolo del postfijo
+MODO_CADA_N = 'cada_n'      # Una imagen cada N pasos (y siempre el último)
+MODO_FINAL = 'final'        # Solo la imagen del AFN terminado
+MODO_APAGADO = 'apagado'    # Sin imágenes
+MODOS = {MODO_TODOS, MODO_CADA_N, MODO_FINAL, MODO_APAGADO}
+
+DIRECTORIO_PASOS = "AFN_paso_por_paso"
+
+
+def renderizar_paso(transiciones_parciales, estados_finales, estado_inicial, paso, directorio=DIRECTORIO_PASOS):
+    # Dibuja un paso de la construcción del AFN con Graphviz y lo guarda como PNG.
+    # Es una función de módulo para que pueda ejecutarse en un pool de hilos o de procesos.
+    from graphviz import Digraph
+
+    # Crear un grafo orientado a la derecha
+    dot = Digraph(comment='Construccion del AFN', format='png')
+    dot.attr(rankdir ='LR') # Visualización horizontal, representación izquierda a derecha
+    dot.attr('node', shape='circle')
+
+    # Nodo ficticio para la flecha de inicio
+    dot.node('', shape='none')
+
+    # Flecha desde el nodo ficticio al estado incial
+    dot.edge('', estado_inicial)
+
+    # Recopilar todos los estados involucrados en las transiciones
+    estados_involucrados = set()
+    for origen, simbolo, destino in transiciones_parciales:
+        estados_involucrados.update([origen, destino])
+
+    # Dibujar estados como nodos
+    for estado in estados_involucrados:
+        if estado in estados_finales:
+            dot.node(name=estado, label=estado, shape='doublecircle') # Forma par a los estados finales
+        else:
+            dot.node(name=estado, label=estado)
+
+    # Dibujar las transiciones
+    for origen, simbolo, destino in transiciones_parciales:
+        label = str(simbolo)
+        dot.edge(origen, destino, label=label)
+
+    # Guardar las imagenes
+    # Crear el directorio sino existe
+    os.makedirs(directorio, exist_ok=True)
+    # Ruta completa del archivo de salida
+    ruta_salida = os.path.join(directorio, f'AFN_paso_{paso:02}')
+    dot.render(filename=ruta_salida, cleanup=True)
+    return ruta_salida
+
+
+def _renderizar_cronometrado(*argumentos):
+    # Ejecuta renderizar_paso en el trabajador y devuelve (ruta, segundos)
+    inicio = time.perf_counter()
+    ruta = renderizar_paso(*argumentos)
+    return ruta, time.perf_counter() - inicio
+
+
+class RenderizadorPasos:
+    # Genera las imágenes paso a paso a partir de la traza de construcción (ver Traza_AFN).
+    # La conversión solo registra cambios en la traza; al terminar, un hilo productor reproduce
+    # la traza una sola vez y envía los pasos elegidos a un pool de hilos (o procesos) que
+    # ejecuta Graphviz en paralelo. El número de instantáneas en espera está acotado, así que
+    # la memoria sigue siendo lineal en el tamaño de la traza.
+
+    def __init__(self, modo=MODO_TODOS, cada_n=1, max_trabajadores=None, usar_procesos=False, directorio=DIRECTORIO_PASOS):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de renderizado desconocido: {modo}")
+        if cada_n < 1:
+            raise ValueError("cada_n debe ser mayor o igual a 1")
+        self.modo = modo
+        self.cada_n = cada_n
+        self.max_trabajadores = max_trabajadores or os.cpu_count() or 1
+        self.usar_procesos = usar_procesos
+        self.directorio = directorio
+        self.ejecutor = None
+        self.productor = None
+        self.pendientes = []
+        self.error_productor = None
+        # Imágenes terminadas y tiempo acumulado de Graphviz en los trabajadores
+        self.imagenes = 0
+        self.tiempo_imagenes = 0.0
+
+    @property
+    def activo(self):
+        return self.modo != MODO_APAGADO
+
+    def _obtener_ejecutor(self):
+        # El pool se crea solo cuando hay una imagen que renderizar
+        if self.ejecutor is None:
+            tipo = ProcessPoolExecutor if self.usar_procesos else ThreadPoolExecutor
+            self.ejecutor = tipo(max_workers=self.max_trabajadores)
+        return self.ejecutor
+
+    def pasos_a_renderizar(self, pasos):
+        # Selecciona, según el modo, qué pasos de la traza se convierten en imagen
+        if not pasos or self.modo == MODO_APAGADO:
+            return set()
+        ultimo = max(pasos)
+        if self.modo == MODO_FINAL:
+            return {ultimo}
+        if self.modo == MODO_CADA_N:
+            return {paso for paso in pasos if paso % self.cada_n == 0} | {ultimo}
+        return set(pasos)
+
+    def renderizar_traza(self, traza):
+        # Inicia en segundo plano el renderizado de la traza y regresa de inmediato
+        elegidos = self.pasos_a_renderizar(traza.lista_pasos())
+        if not elegidos:
+            return
+        self.productor = threading.Thread(target=self._producir, args=(traza, elegidos), daemon=True)
+        self.productor.start()
+
+    def _producir(self, traza, elegidos):
+        # Reproduce la traza y encola una copia de cada paso elegido; el semáforo
+        # limita cuántas instantáneas pueden estar esperando en el pool a la vez.
+        limite = threading.BoundedSemaphore(2 * self.max_trabajadores)
+        ultimo = max(elegidos)
+        try:
+            for paso, grafo, estado_inicial, estados_finales in traza.reproducir(ultimo):
+                if paso not in elegidos:
+                    continue
+                limite.acquire()
+                # Los nombres qN solo se generan aquí, al preparar la imagen
+                futuro = self._obtener_ejecutor().submit(
+                    _renderizar_cronometrado, grafo.copy(), {nombre_estado(estado) for estado in estados_finales},
+                    nombre_estado(estado_inicial), paso, self.directorio)
+                futuro.add_done_callback(lambda _: limite.release())
+                self.pendientes.append(futuro)
+        except Exception as error:
+            self.error_productor = error
+
+    def esperar(self):
+        # Espera a que terminen todas las imágenes pendientes y devuelve sus rutas.
+        # Si algún renderizado falló, la excepción se propaga aquí.
+        if self.productor is not None:
+            self.productor.join()
+            self.productor = None
+        if self.error_productor is not None:
+            error, self.error_productor = self.error_productor, None
+            raise error
+        rutas = []
+        for futuro in self.pendientes:
+            ruta, segundos = futuro.result()
+            rutas.append(ruta)
+            self.imagenes += 1
+            self.tiempo_imagenes += segundos
+        self.pendientes = []
+        return rutas
+
+    def cerrar(self):
+        # Espera los renderizados pendientes y libera el pool
+        try:
+            return self.esperar()
+        finally:
+            if self.ejecutor is not None:
+                self.ejecutor.shutdown(wait=True)
+                self.ejecutor = None
@@ -0,0 +1,356 @@
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import AFD_Minimo
+from Conversion_ER_AFN import ExpresionRegularAFN, CONSTRUCCION_THOMPSON, CONSTRUCCIONES
+from Cache_AFN import CacheAutomatas
+from Analizador_ER import ErrorSintaxis
+from Lote_AFN import cache_de_proceso
+
+# Servicio local de compilación y búsqueda: JSON por líneas sobre TCP o un socket Unix.
+# Cada petición es un objeto con "op" y un "id" opcional que se copia en la respuesta:
+#   {"op": "compilar", "expresion": "ab(c|d)*"}                        -> el autómata (como a_diccionario)
+#   {"op": "coincidir", "expresion": ..., "texto": ..., "modo": ...}   -> "resultado"
+#   {"op": "coincidir_lote", "expresion": ..., "textos": [...], "modo": ...} -> "resultados"
+#   {"op": "estadisticas"}                                             -> contadores del servidor
+# Las peticiones con expresión aceptan las opciones de compilar: afd, optimizar, construccion y
+# compartir. Los modos son fullmatch (bool), match y search ([inicio, fin] o null) y finditer
+# (lista de [inicio, fin]). Cada respuesta lleva "ok" (y "error" si falló); las de una misma
+# conexión pueden llegar en otro orden que las peticiones.
+
+OPERACIONES = ('compilar', 'coincidir', 'coincidir_lote', 'estadisticas')
+MODOS_COINCIDENCIA = ('fullmatch', 'match', 'search', 'finditer')
+# Longitud máxima de una línea de petición en bytes (las más largas cierran la conexión)
+LIMITE_LINEA = 16 * 1024 * 1024
+# Simuladores que guarda cada proceso trabajador
+MAX_SIMULADORES = 256
+
+
+# Simuladores de cada proceso trabajador por clave de caché (LRU)
+_simuladores = OrderedDict()
+
+
+def _compilar_en_proceso(expresion, opciones, directorio_cache):
+    # Autómata de la caché del proceso trabajador (y, si hay directorio, de la caché en disco
+    # compartida por todos los procesos). ErrorSintaxis no se puede reconstruir al volver del
+    # pool (su constructor pide la posición), así que viaja como ValueError con el mismo mensaje.
+    try:
+        return cache_de_proceso(directorio_cache).compilar(expresion, **opciones)
+    except ErrorSintaxis as error:
+        raise ValueError(str(error)) from None
+
+
+def _compilar_tarea(expresion, opciones, directorio_cache):
+    # Tarea de un proceso trabajador: compila la expresión y la devuelve como diccionario
+    return _compilar_en_proceso(expresion, opciones, directorio_cache).a_diccionario()
+
+
+def _coincidir_tarea(clave, datos, modo, textos):
+    # Tarea de un proceso trabajador: evalúa los textos con el autómata de la clave. El simulador
+    # (con su prefiltro) se crea una vez por proceso y clave a partir de datos, el a_diccionario de
+    # la LRU del servidor (así el trabajador no vuelve a convertir). El servidor solo envía datos
+    # cuando el trabajador no tiene la clave: sin datos y sin la clave se devuelve None.
+    entrada = _simuladores.get(clave)
+    if entrada is None:
+        if datos is None:
+            return None
+        automata = ExpresionRegularAFN.desde_diccionario(datos)
+        entrada = _simuladores[clave] = (automata, automata.crear_simulador())
+        while len(_simuladores) > MAX_SIMULADORES:
+            _simuladores.popitem(last=False)
+    else:
+        _simuladores.move_to_end(clave)
+    automata, simulador = entrada
+    if modo == 'fullmatch':
+        if automata.afd is not None:
+            if len(textos) > 1 and AFD_Minimo.numpy is not None:
+                return automata.fullmatch_lote(textos).tolist()
+            return [automata.afd.fullmatch(texto) for texto in textos]
+        return [simulador.fullmatch(texto) for texto in textos]
+    if modo == 'finditer':
+        return [[list(coincidencia) for coincidencia in simulador.finditer(texto)] for texto in textos]
+    evaluar = simulador.match if modo == 'match' else simulador.search
+    resultados = []
+    for texto in textos:
+        coincidencia = evaluar(texto)
+        resultados.append(None if coincidencia is None else list(coincidencia))
+    return resultados
+
+
+def _opciones(peticion):
+    # Opciones de compilar de una petición, validadas
+    construccion = peticion.get('construccion', CONSTRUCCION_THOMPSON)
+    if construccion not in CONSTRUCCIONES:
+        raise ValueError(f"Construcción desconocida '{construccion}'")
+    return {
+        'afd': bool(peticion.get('afd', False)),
+        'optimizar': bool(peticion.get('optimizar', False)),
+        'construccion': construccion,
+        'compartir': bool(peticion.get('compartir', False)),
+    }
+
+
+def _texto(valor, campo):
+    if not isinstance(valor, str):
+        raise ValueError(f"El campo '{campo}' debe ser una cadena")
+    return valor
+
+
+class ServidorAFN:
+    # Servidor asyncio de compilación y búsqueda. La conversión y las búsquedas (trabajo de CPU)
+    # se ejecutan en un pool de procesos; el bucle de eventos solo lee, valida y responde.
+    #   - LRU compartida por todas las conexiones con los autómatas ya compilados, por la clave
+    #     normalizada de CacheAutomatas (escrituras equivalentes comparten entrada)
+    #   - Las compilaciones simultáneas de la misma clave se unen en una sola tarea del pool
+    #   - Contrapresión: cada conexión tiene una cola acotada (al llenarse se deja de leer el
+    #     socket) y el pool tiene un máximo de tareas en vuelo para todo el servidor
+
+    def __init__(self, trabajadores=None, directorio_cache=None, max_entradas=1024, max_pendientes=None,
+                 cola_por_conexion=64, concurrencia_por_conexion=8):
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.directorio_cache = directorio_cache
+        self.max_entradas = max_entradas
+        self.max_pendientes = max_pendientes or 4 * self.trabajadores
+        self.cola_por_conexion = cola_por_conexion
+        self.concurrencia_por_conexion = concurrencia_por_conexion
+        # Solo se usa para calcular las claves normalizadas (no guarda autómatas)
+        self.claves = CacheAutomatas()
+        self.automatas = OrderedDict()
+        self.en_curso = {}
+        # Tareas de las conexiones abiertas (se cancelan al cerrar el servidor)
+        self.atendiendo = set()
+        self.ejecutor = None
+        self.limite_pool = None
+        self.servidor = None
+        # Contadores
+        self.peticiones = 0
+        self.errores = 0
+        self.compilaciones = 0
+        self.aciertos = 0
+        self.unidas = 0
+        self.envios_automata = 0
+        self.conexiones = 0
+
+    def estadisticas(self):
+        return {
+            'peticiones': self.peticiones,
+            'errores': self.errores,
+            'compilaciones': self.compilaciones,
+            'aciertos_lru': self.aciertos,
+            'compilaciones_unidas': self.unidas,
+            'envios_automata': self.envios_automata,
+            'entradas_lru': len(self.automatas),
+            'compilaciones_en_curso': len(self.en_curso),
+            'conexiones': self.conexiones,
+            'conexiones_abiertas': len(self.atendiendo),
+            'trabajadores': self.trabajadores,
+        }
+
+    async def iniciar(self, host=None, puerto=0, ruta_unix=None):
+        # Crea el pool y empieza a escuchar en un socket Unix (ruta_unix) o TCP (host, puerto).
+        # Devuelve el asyncio.Server; con puerto 0 el sistema elige uno libre (ver direcciones()).
+        self.ejecutor = ProcessPoolExecutor(max_workers=self.trabajadores)
+        self.limite_pool = asyncio.Semaphore(self.max_pendientes)
+        if ruta_unix is not None:
+            self.servidor = await asyncio.start_unix_server(self._atender, path=ruta_unix, limit=LIMITE_LINEA)
+        else:
+            self.servidor = await asyncio.start_server(self._atender, host, puerto, limit=LIMITE_LINEA)
+        return self.servidor
+
+    def direcciones(self):
+        return [conector.getsockname() for conector in self.servidor.sockets]
+
+    async def cerrar(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            for tarea in list(self.atendiendo):
+                tarea.cancel()
+            await asyncio.gather(*self.atendiendo, return_exceptions=True)
+            await self.servidor.wait_closed()
+        if self.ejecutor is not None:
+            self.ejecutor.shutdown(cancel_futures=True)
+
+    async def _ejecutar(self, funcion, *argumentos):
+        # Ejecuta una tarea en el pool respetando el máximo de tareas en vuelo.
+        # Si un trabajador murió, el pool se reemplaza para las peticiones siguientes.
+        async with self.limite_pool:
+            ejecutor = self.ejecutor
+            try:
+                return await asyncio.get_running_loop().run_in_executor(ejecutor, funcion, *argumentos)
+            except BrokenProcessPool:
+                if self.ejecutor is ejecutor:
+                    self.ejecutor = ProcessPoolExecutor(max_workers=self.trabajadores)
+                    ejecutor.shutdown(wait=False)
+                raise
+
+    def clave(self, expresion, opciones):
+        # Clave normalizada del autómata; lanza ErrorSintaxis sin pasar por el pool
+        clave = self.claves.clave(expresion, opciones['optimizar'], opciones['construccion'], opciones['compartir'])
+        return clave + ('a' if opciones['afd'] else '')
+
+    async def compilar(self, expresion, opciones):
+        # Devuelve (clave, diccionario del autómata) desde la LRU, uniéndose a una compilación
+        # en curso de la misma clave o enviando una nueva al pool
+        clave = self.clave(expresion, opciones)
+        datos = self.automatas.get(clave)
+        if datos is not None:
+            self.automatas.move_to_end(clave)
+            self.aciertos += 1
+            return clave, datos
+        tarea = self.en_curso.get(clave)
+        if tarea is not None:
+            self.unidas += 1
+        else:
+            # La compilación es una tarea propia: si se cancela quien la pidió, los demás la siguen esperando
+            tarea = self.en_curso[clave] = asyncio.ensure_future(self._compilar(clave, expresion, opciones))
+        return clave, await asyncio.shield(tarea)
+
+    async def _compilar(self, clave, expresion, opciones):
+        try:
+            datos = await self._ejecutar(_compilar_tarea, expresion, opciones, self.directorio_cache)
+        finally:
+            del self.en_curso[clave]
+        self.compilaciones += 1
+        self.automatas[clave] = datos
+        while len(self.automatas) > self.max_entradas:
+            self.automatas.popitem(last=False)
+        return datos
+
+    async def responder(self, peticion):
+        # Respuesta (diccionario) a una petición ya decodificada
+        if not isinstance(peticion, dict):
+            raise ValueError("La petición debe ser un objeto JSON")
+        operacion = peticion.get('op')
+        if operacion not in OPERACIONES:
+            raise ValueError(f"Operación desconocida '{operacion}'")
+        if operacion == 'estadisticas':
+            return self.estadisticas()
+        expresion = _texto(peticion.get('expresion'), 'expresion')
+        opciones = _opciones(peticion)
+        if operacion == 'compilar':
+            clave, datos = await self.compilar(expresion, opciones)
+            return {'clave': clave, **datos, 'expresion': expresion}
+
+        modo = peticion.get('modo', 'search')
+        if modo not in MODOS_COINCIDENCIA:
+            raise ValueError(f"Modo desconocido '{modo}'")
+        if operacion == 'coincidir':
+            textos = [_texto(peticion.get('texto'), 'texto')]
+        else:
+            textos = peticion.get('textos')
+            if not isinstance(textos, list):
+                raise ValueError("El campo 'textos' debe ser una lista")
+            for texto in textos:
+                _texto(texto, 'textos')
+        # La compilación pasa por la LRU y la unión de peticiones. Al trabajador solo se le envía
+        # la clave; el diccionario del autómata viaja únicamente si no lo tiene en su caché
+        clave, datos = await self.compilar(expresion, opciones)
+        resultados = await self._ejecutar(_coincidir_tarea, clave, None, modo, textos)
+        if resultados is None:
+            self.envios_automata += 1
+            resultados = await self._ejecutar(_coincidir_tarea, clave, datos, modo, textos)
+        if operacion == 'coincidir':
+            return {'resultado': resultados[0]}
+        return {'resultados': resultados}
+
+    async def _responder_linea(self, linea):
+        self.peticiones += 1
+        identificador = None
+        try:
+            peticion = json.loads(linea)
+            if isinstance(peticion, dict):
+                identificador = peticion.get('id')
+            respuesta = {'id': identificador, 'ok': True, **await self.responder(peticion)}
+        except Exception as error:
+            # Cualquier fallo queda aislado en la respuesta de su petición
+            self.errores += 1
+            respuesta = {'id': identificador, 'ok': False, 'error': f"{type(error).__name__}: {error}"}
+        return (json.dumps(respuesta, ensure_ascii=False) + '\n').encode('utf-8')
+
+    async def _atender(self, lector, escritor):
+        # Una conexión: el lector encola las líneas y varias tareas las responden en paralelo.
+        # Con la cola llena el lector espera, el búfer del socket se llena y el cliente se frena.
+        self.conexiones += 1
+        propia = asyncio.current_task()
+        self.atendiendo.add(propia)
+        cola = asyncio.Queue(self.cola_por_conexion)
+        candado = asyncio.Lock()
+
+        async def procesar():
+            while True:
+                linea = await cola.get()
+                try:
+                    respuesta = await self._responder_linea(linea)
+                    async with candado:
+                        escritor.write(respuesta)
+                        await escritor.drain()
+                except ConnectionError:
+                    pass
+                finally:
+                    cola.task_done()
+
+        tareas = [asyncio.create_task(procesar()) for _ in range(self.concurrencia_por_conexion)]
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    # Línea más larga que LIMITE_LINEA: no se puede seguir leyendo el flujo
+                    self.errores += 1
+                    escritor.write(b'{"id": null, "ok": false, "error": "ValueError: L\\u00ednea demasiado larga"}\n')
+                    break
+                except ConnectionError:
+                    break
+                if not linea:
+                    break
+                if linea.strip():
+                    await cola.put(linea)
+            await cola.join()
+        except asyncio.CancelledError:
+            # Cierre del servidor: la conexión termina sin esperar las peticiones pendientes ni
+            # vaciar el búfer de escritura (el cliente puede no estar leyendo)
+            escritor.transport.abort()
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            self.atendiendo.discard(propia)
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def leer_direccion(direccion):
+    # 'unix:/ruta/al/socket', 'host:puerto' o solo 'puerto' -> (host, puerto, ruta_unix)
+    if direccion.startswith('unix:'):
+        return None, None, direccion[len('unix:'):]
+    host, _, puerto = direccion.rpartition(':')
+    return host or '127.0.0.1', int(puerto), None
+
+
+def ejecutar_servidor(direccion, trabajadores=None, directorio_cache=None, max_entradas=1024, max_pendientes=None,
+                      cola_por_conexion=64):
+    # Inicia el servidor y atiende hasta Ctrl+C
+    host, puerto, ruta_unix = leer_direccion(direccion)
+    servidor = ServidorAFN(trabajadores, directorio_cache, max_entradas, max_pendientes, cola_por_conexion)
+
+    async def principal():
+        await servidor.iniciar(host, puerto, ruta_unix)
+        print(f"Escuchando en {', '.join(map(str, servidor.direcciones()))} con {servidor.trabajadores} trabajadores",
+              file=sys.stderr)
+        try:
+            await servidor.servidor.serve_forever()
+        finally:
+            await servidor.cerrar()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
+    return 0
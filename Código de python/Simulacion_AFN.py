@@ -0,0 +1,305 @@
+from array import array
+from Clases_AFN import Particion
+
+EPSILON = 'ε'
+# Caracteres que las verificaciones ancladas del prefiltro pueden recorrer por cada carácter del
+# texto; si se pasan, la búsqueda sigue sin prefiltro (evita el costo cuadrático de muchos
+# candidatos que fallan tarde)
+PRESUPUESTO_PREFILTRO = 4
+
+
+class SimuladorAFN:
+    # Ejecuta el AFN construido sobre cadenas de entrada simulando conjuntos de estados
+    # (construcción de Thompson, sin retroceso). Los estados se numeran con enteros y cada
+    # conjunto de estados es un entero usado como mapa de bits, así que cada carácter de la
+    # entrada cuesta O(estados) y la simulación es lineal en el tamaño del texto.
+
+    def __init__(self, estado_inicial, estados_finales, transiciones):
+        # Numeración densa de los estados: nombre -> entero
+        self.numeros = {estado_inicial: 0}
+        for origen, _, destino in transiciones:
+            for estado in (origen, destino):
+                if estado not in self.numeros:
+                    self.numeros[estado] = len(self.numeros)
+        for estado in estados_finales:
+            if estado not in self.numeros:
+                self.numeros[estado] = len(self.numeros)
+        self.nombres = list(self.numeros)
+        total = len(self.nombres)
+
+        # Transiciones ε y por símbolo (carácter o clase de caracteres) como listas de adyacencia por estado
+        vacias = [[] for _ in range(total)]
+        por_simbolo = {}
+        for origen, simbolo, destino in transiciones:
+            i, j = self.numeros[origen], self.numeros[destino]
+            if simbolo == EPSILON:
+                vacias[i].append(j)
+            else:
+                adyacencia = por_simbolo.get(simbolo)
+                if adyacencia is None:
+                    adyacencia = por_simbolo[simbolo] = [[] for _ in range(total)]
+                adyacencia[i].append(j)
+
+        # Cerraduras ε precalculadas como mapas de bits
+        self.cerraduras = [self._calcular_cerradura(i, vacias) for i in range(total)]
+
+        # Partición del alfabeto en clases de caracteres equivalentes; columnas[caracter] = clase
+        self.particion = Particion(por_simbolo)
+        self.columnas = self.particion.columnas
+
+        # delta[clase][estado] = cerradura ε de todos los destinos por los símbolos que contienen
+        # la clase (None si ningún símbolo la contiene)
+        self.delta = [None] * self.particion.num_clases
+        for simbolo, adyacencia in por_simbolo.items():
+            fila = [0] * total
+            for i, destinos in enumerate(adyacencia):
+                for j in destinos:
+                    fila[i] |= self.cerraduras[j]
+            for clase in self.particion.miembros[simbolo]:
+                actual = self.delta[clase]
+                self.delta[clase] = fila if actual is None else [a | b for a, b in zip(actual, fila)]
+
+        self.inicial = self.cerraduras[0]
+        self.finales = 0
+        for estado in estados_finales:
+            self.finales |= 1 << self.numeros[estado]
+
+        # Literales de la expresión para saltar en search (ver Prefiltro_AFN); None = sin prefiltro
+        self.prefiltro = None
+        # Filas de la transición inversa por clase (se calculan la primera vez que se usa finditer)
+        self.inversas = None
+
+    @classmethod
+    def desde_afn(cls, afn):
+        # Crea el simulador a partir de un ExpresionRegularAFN ya convertido (estados enteros)
+        return cls(afn.inicio, afn.finales, afn.transiciones.transiciones_numericas())
+
+    def _calcular_cerradura(self, estado, vacias):
+        # Estados alcanzables desde estado usando solo transiciones ε (recorrido en profundidad)
+        mascara = 1 << estado
+        pila = [estado]
+        while pila:
+            actual = pila.pop()
+            for siguiente in vacias[actual]:
+                bit = 1 << siguiente
+                if not mascara & bit:
+                    mascara |= bit
+                    pila.append(siguiente)
+        return mascara
+
+    def paso(self, mascara, caracter):
+        # Conjunto de estados alcanzado desde mascara al leer caracter (con cerradura ε)
+        return self.paso_clase(mascara, self.columnas[caracter])
+
+    def paso_clase(self, mascara, clase):
+        # Igual que paso, con la clase del carácter ya calculada
+        fila = self.delta[clase]
+        if fila is None:
+            return 0
+        resultado = 0
+        while mascara:
+            bit = mascara & -mascara
+            resultado |= fila[bit.bit_length() - 1]
+            mascara ^= bit
+        return resultado
+
+    def _preparar_inversas(self):
+        # inversas[clase][k] = estados desde los que un paso por la clase alcanza k.
+        # Varias clases pueden compartir la misma fila de delta; su inversa se calcula una vez.
+        total = len(self.nombres)
+        calculadas = {}
+        self.inversas = [None] * len(self.delta)
+        for clase, fila in enumerate(self.delta):
+            if fila is None:
+                continue
+            inversa = calculadas.get(id(fila))
+            if inversa is None:
+                inversa = calculadas[id(fila)] = [0] * total
+                for origen, destinos in enumerate(fila):
+                    bit_origen = 1 << origen
+                    while destinos:
+                        bit = destinos & -destinos
+                        inversa[bit.bit_length() - 1] |= bit_origen
+                        destinos ^= bit
+            self.inversas[clase] = inversa
+
+    def paso_inverso(self, mascara, clase):
+        # Estados desde los que leer un carácter de la clase lleva a algún estado de mascara
+        fila = self.inversas[clase]
+        if fila is None:
+            return 0
+        resultado = 0
+        while mascara:
+            bit = mascara & -mascara
+            resultado |= fila[bit.bit_length() - 1]
+            mascara ^= bit
+        return resultado
+
+    def estados_de(self, mascara):
+        # Nombres de los estados contenidos en un mapa de bits (útil para depurar)
+        return {self.nombres[i] for i in range(len(self.nombres)) if mascara >> i & 1}
+
+    def fullmatch(self, texto):
+        # True si el autómata acepta el texto completo
+        actual = self.inicial
+        for caracter in texto:
+            actual = self.paso(actual, caracter)
+            if not actual:
+                return False
+        return bool(actual & self.finales)
+
+    def _anclado(self, texto, inicio):
+        # Fin de la coincidencia más larga anclada en inicio (o None) y posición donde paró la simulación
+        actual = self.inicial
+        mejor = inicio if actual & self.finales else None
+        posicion = inicio
+        for posicion in range(inicio, len(texto)):
+            actual = self.paso(actual, texto[posicion])
+            if not actual:
+                break
+            if actual & self.finales:
+                mejor = posicion + 1
+        return mejor, posicion
+
+    def match(self, texto, inicio=0):
+        # Coincidencia más larga anclada en inicio: devuelve (inicio, fin) o None
+        mejor, _ = self._anclado(texto, inicio)
+        return None if mejor is None else (inicio, mejor)
+
+    def search(self, texto, inicio=0):
+        # Primera coincidencia (la más a la izquierda y, entre ellas, la más larga): (inicio, fin) o None.
+        # Con prefiltro se descartan con str.find los textos sin las subcadenas requeridas y solo
+        # se simula desde las posiciones donde aparece un prefijo literal.
+        prefiltro = self.prefiltro
+        if prefiltro is not None:
+            if not prefiltro.posible(texto, inicio):
+                return None
+            if prefiltro.prefijos:
+                return self._search_candidatos(texto, inicio)
+        return self._search(texto, inicio)
+
+    def _search_candidatos(self, texto, inicio):
+        # Ninguna coincidencia empieza fuera de los candidatos del prefiltro y ninguna es vacía, así
+        # que la primera coincidencia anclada en un candidato es la más a la izquierda
+        presupuesto = PRESUPUESTO_PREFILTRO * (len(texto) - inicio + 1)
+        for candidato in self.prefiltro.candidatos(texto, inicio):
+            mejor, parada = self._anclado(texto, candidato)
+            if mejor is not None:
+                return (candidato, mejor)
+            presupuesto -= parada - candidato + 1
+            if presupuesto < 0:
+                return self._search(texto, candidato + 1)
+        return None
+
+    def _search(self, texto, inicio):
+        # Búsqueda sin prefiltro.
+        # Los hilos de simulación se agrupan por posición de inicio en una lista ordenada de
+        # (inicio, mapa_de_bits); un estado solo vive en el grupo más antiguo que lo alcanza,
+        # así que nunca hay más grupos que estados y cada carácter sigue costando O(estados).
+        grupos = []
+        ocupados = 0
+        mejor = None
+        for posicion in range(inicio, len(texto) + 1):
+            # Sembrar un nuevo hilo en esta posición mientras no haya coincidencia
+            if mejor is None:
+                nuevos = self.inicial & ~ocupados
+                if nuevos:
+                    grupos.append((posicion, nuevos))
+                    ocupados |= nuevos
+            # Registrar coincidencias: el grupo más antiguo con estado final gana
+            for origen, mascara in grupos:
+                if mascara & self.finales:
+                    if mejor is None or origen < mejor[0] or (origen == mejor[0] and posicion > mejor[1]):
+                        mejor = (origen, posicion)
+                    break
+            if mejor is not None:
+                # Los hilos que empezaron después de la mejor coincidencia ya no pueden ganar
+                grupos = [(origen, mascara) for origen, mascara in grupos if origen <= mejor[0]]
+            if posicion == len(texto) or not grupos:
+                break
+            # Avanzar todos los grupos con el carácter actual
+            caracter = texto[posicion]
+            siguientes = []
+            ocupados = 0
+            for origen, mascara in grupos:
+                mascara = self.paso(mascara, caracter) & ~ocupados
+                if mascara:
+                    siguientes.append((origen, mascara))
+                    ocupados |= mascara
+            grupos = siguientes
+        return mejor
+
+    def fines_mas_largos(self, texto, inicio=0):
+        # Una pasada de derecha a izquierda con la transición inversa: fines[i - inicio] es el fin de
+        # la coincidencia más larga que empieza en i (-1 si no hay ninguna). Los hilos se agrupan
+        # por la posición donde terminan y un estado solo vive en el grupo que termina más lejos
+        # (lo que pase a su izquierda es igual para todos los grupos que lo alcanzan), así que cada
+        # carácter cuesta O(estados) y el total es lineal en el texto.
+        if self.inversas is None:
+            self._preparar_inversas()
+        columnas, inicial, finales = self.columnas, self.inicial, self.finales
+        fines = array('q', [-1]) * (len(texto) - inicio + 1)
+        grupos = []
+        ocupados = 0
+        for posicion in range(len(texto), inicio - 1, -1):
+            # Sembrar los estados finales: aquí puede terminar una coincidencia
+            nuevos = finales & ~ocupados
+            if nuevos:
+                grupos.append((posicion, nuevos))
+                ocupados |= nuevos
+            # El grupo que termina más lejos y alcanza el estado inicial da la coincidencia más larga
+            for fin, mascara in grupos:
+                if mascara & inicial:
+                    fines[posicion - inicio] = fin
+                    break
+            if posicion == inicio:
+                break
+            clase = columnas[texto[posicion - 1]]
+            siguientes = []
+            ocupados = 0
+            for fin, mascara in grupos:
+                mascara = self.paso_inverso(mascara, clase) & ~ocupados
+                if mascara:
+                    siguientes.append((fin, mascara))
+                    ocupados |= mascara
+            grupos = siguientes
+        return fines
+
+    def finditer(self, texto, inicio=0):
+        # Genera las coincidencias (inicio, fin) sin solapamiento, de izquierda a derecha (las mismas
+        # que llamar a search desde el fin de cada una). Repetir search costaría O(n²) cuando cada
+        # coincidencia obliga a mirar hasta el final del texto (a|a*b sobre aaaa...); en cambio
+        # fines_mas_largos resuelve todas las posiciones en una sola pasada lineal.
+        # Con prefijos en el prefiltro se verifican primero solo los candidatos, con un presupuesto
+        # común a todo el recorrido; si se agota, el resto se resuelve con la pasada inversa.
+        prefiltro = self.prefiltro
+        posicion = inicio
+        if prefiltro is not None:
+            if not prefiltro.posible(texto, inicio):
+                return
+            if prefiltro.prefijos:
+                presupuesto = PRESUPUESTO_PREFILTRO * (len(texto) - inicio + 1)
+                for candidato in prefiltro.candidatos(texto, inicio):
+                    if candidato < posicion:
+                        # Dentro de la coincidencia anterior
+                        continue
+                    mejor, parada = self._anclado(texto, candidato)
+                    presupuesto -= parada - candidato + 1
+                    # Los prefijos no son vacíos, así que tampoco las coincidencias
+                    posicion = candidato + 1 if mejor is None else mejor
+                    if mejor is not None:
+                        yield (candidato, mejor)
+                    if presupuesto < 0:
+                        break
+                else:
+                    return
+        fines = self.fines_mas_largos(texto, posicion)
+        base = posicion
+        while posicion <= len(texto):
+            fin = fines[posicion - base]
+            if fin < 0:
+                posicion += 1
+                continue
+            yield (posicion, fin)
+            # Una coincidencia vacía avanza un carácter para no repetirse
+            posicion = fin if fin > posicion else fin + 1
@@ -0,0 +1,49 @@
+from Analizador_ER import OPERADORES_BINARIOS, OPERADORES_POSFIJOS, Repeticion
+
+# Subexpresiones más cortas que esto (en tokens del postfijo) se construyen siempre de cero:
+# copiarlas cuesta lo mismo que construirlas
+MINIMO_TOKENS = 3
+
+
+def subexpresiones_repetidas(postfijo, minimo_tokens=MINIMO_TOKENS):
+    # Hash-consing del árbol de la expresión en una pasada sobre el postfijo: cada subárbol recibe
+    # un identificador canónico (el mismo para subárboles estructuralmente iguales; la alternancia
+    # no distingue el orden de sus ramas). Devuelve (identificadores, candidatos, repetidas):
+    #   identificadores[i]: subárbol que termina en el token i
+    #   candidatos[j]: índices finales de los subárboles repetidos que empiezan en el token j,
+    #                  del más largo al más corto (solo los de al menos minimo_tokens tokens)
+    #   repetidas: identificadores que aparecen más de una vez (con al menos minimo_tokens tokens)
+    canonicos = {}
+    identificadores = []
+    inicios = []
+    pila = []   # (identificador, índice inicial) de cada operando
+    for indice, token in enumerate(postfijo):
+        if isinstance(token, Repeticion) or (isinstance(token, str) and token in OPERADORES_POSFIJOS):
+            hijo, inicio = pila.pop()
+            clave = (token, hijo)
+        elif isinstance(token, str) and token in OPERADORES_BINARIOS:
+            derecho, _ = pila.pop()
+            izquierdo, inicio = pila.pop()
+            if token == '.':
+                clave = ('.', izquierdo, derecho)
+            else:
+                clave = ('|', min(izquierdo, derecho), max(izquierdo, derecho))
+        else:
+            inicio = indice
+            clave = ('s', token)
+        identificador = canonicos.setdefault(clave, len(canonicos))
+        identificadores.append(identificador)
+        inicios.append(inicio)
+        pila.append((identificador, inicio))
+
+    apariciones = {}
+    for indice, identificador in enumerate(identificadores):
+        if indice - inicios[indice] + 1 >= minimo_tokens:
+            apariciones[identificador] = apariciones.get(identificador, 0) + 1
+    repetidas = {identificador for identificador, cantidad in apariciones.items() if cantidad > 1}
+
+    candidatos = {}
+    for indice in range(len(postfijo) - 1, -1, -1):
+        if identificadores[indice] in repetidas and indice - inicios[indice] + 1 >= minimo_tokens:
+            candidatos.setdefault(inicios[indice], []).append(indice)
+    return identificadores, candidatos, repetidas
@@ -0,0 +1,97 @@
+import json
+from Analizador_ER import simbolo_desde_texto
+from Grafo_AFN import (GrafoAFN, AGREGAR, ELIMINAR, REDIRIGIR_ORIGEN, REDIRIGIR_DESTINO, MOVER_SALIENTES,
+                       SIMBOLO, nombre_estado)
+
+# Marca de fin de paso: ('p', paso, estado_inicial, [estados_finales])
+PASO = 'p'
+
+VERSION_TRAZA = 2
+
+
+class TrazaConstruccion:
+    # Registro compacto de la construcción del AFN: en lugar de copiar todas las transiciones
+    # en cada paso, guarda solo los cambios (altas, bajas y redirecciones de aristas) y una
+    # marca por paso con el estado inicial y los finales. Ocupa memoria lineal y permite
+    # reconstruir el autómata de cualquier paso bajo demanda.
+
+    def __init__(self, expresion=None):
+        self.expresion = expresion
+        self.eventos = []
+        # Posición en eventos de la marca de cada paso: paso -> índice
+        self.indice_pasos = {}
+
+    def registrar(self, *evento):
+        self.eventos.append(evento)
+
+    def marcar_paso(self, paso, estado_inicial, estados_finales):
+        # Marca el final de un paso de la construcción
+        self.indice_pasos[paso] = len(self.eventos)
+        self.eventos.append((PASO, paso, estado_inicial, sorted(estados_finales)))
+
+    def lista_pasos(self):
+        return list(self.indice_pasos)
+
+    def reproducir(self, hasta_paso=None):
+        # Reproduce la traza sobre un único grafo y produce (paso, grafo, estado_inicial, estados_finales)
+        # en cada marca de paso. El grafo se modifica en el lugar: copiarlo si se necesita conservarlo.
+        grafo = GrafoAFN()
+        for evento in self.eventos:
+            tipo = evento[0]
+            if tipo == AGREGAR:
+                grafo.agregar(evento[1], evento[2], evento[3])
+            elif tipo == ELIMINAR:
+                grafo.eliminar(evento[1])
+            elif tipo == REDIRIGIR_ORIGEN:
+                grafo.redirigir_origen(evento[1], evento[2])
+            elif tipo == REDIRIGIR_DESTINO:
+                grafo.redirigir_destino(evento[1], evento[2])
+            elif tipo == MOVER_SALIENTES:
+                grafo.mover_salientes(evento[1], evento[2])
+            elif tipo == SIMBOLO:
+                grafo.simbolo(evento[1])
+            elif tipo == PASO:
+                yield evento[1], grafo, evento[2], set(evento[3])
+                if hasta_paso is not None and evento[1] >= hasta_paso:
+                    return
+            else:
+                raise ValueError(f"Evento de traza desconocido: {tipo}")
+
+    def reconstruir(self, paso):
+        # Devuelve (transiciones, estado_inicial, estados_finales) del paso indicado, con nombres qN
+        if paso not in self.indice_pasos:
+            raise KeyError(f"La traza no contiene el paso {paso}")
+        for numero, grafo, estado_inicial, estados_finales in self.reproducir(paso):
+            if numero == paso:
+                return grafo.copy(), nombre_estado(estado_inicial), {nombre_estado(estado) for estado in estados_finales}
+
+    def guardar(self, ruta):
+        # Guarda la traza como JSON por líneas: una cabecera y un evento por línea
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            cabecera = {'version': VERSION_TRAZA, 'expresion': self.expresion}
+            archivo.write(json.dumps(cabecera, ensure_ascii=False) + '\n')
+            for evento in self.eventos:
+                if evento[0] == SIMBOLO:
+                    # Las clases de caracteres se guardan con su texto canónico
+                    evento = (SIMBOLO, str(evento[1]))
+                archivo.write(json.dumps(evento, ensure_ascii=False) + '\n')
+
+    @classmethod
+    def cargar(cls, ruta):
+        # Lee una traza guardada con guardar()
+        with open(ruta, encoding='utf-8') as archivo:
+            cabecera = json.loads(archivo.readline())
+            if cabecera.get('version') != VERSION_TRAZA:
+                raise ValueError(f"Versión de traza no soportada: {cabecera.get('version')}")
+            traza = cls(cabecera.get('expresion'))
+            for linea in archivo:
+                if not linea.strip():
+                    continue
+                evento = json.loads(linea)
+                if evento[0] == PASO:
+                    traza.marcar_paso(evento[1], evento[2], evento[3])
+                elif evento[0] == SIMBOLO:
+                    traza.registrar(SIMBOLO, simbolo_desde_texto(evento[1]))
+                else:
+                    traza.registrar(*evento)
+        return traza
@@ -0,0 +1,213 @@
+import itertools
+import random
+import re
+from AFD_Perezoso import AFDPerezoso
+from Analizador_ER import ErrorSintaxis
+from Conversion_ER_AFN import compilar, CONSTRUCCION_GLUSHKOV
+
+# Verificación aleatoria contra el módulo re de Python: genera expresiones pequeñas junto con su
+# equivalente en la sintaxis de re y compara fullmatch, match, search y finditer de cada forma de
+# compilar (Thompson, optimizado, Glushkov, con subexpresiones compartidas, AFD mínimo, AFD
+# perezoso, con y sin prefiltro de literales).
+# re elige la primera alternativa que funciona (leftmost-first) y este proyecto la coincidencia
+# más larga (leftmost-longest), así que solo fullmatch se compara directo. Para el resto el
+# oráculo toma de re.search el inicio más a la izquierda (es el mismo en ambas semánticas) y de
+# re.fullmatch el fin más largo desde ese inicio. Los textos son cortos y las repeticiones
+# pequeñas para que el retroceso de re no se dispare. Por lo mismo no se anidan cuantificadores
+# sin límite: con (((c?)+){2,4})+ re tarda 34 s en fullmatch de 'cccx'.
+
+ALFABETO = 'abc'
+# Los textos usan además un carácter que ninguna expresión menciona
+CARACTERES_TEXTO = 'abcx'
+# Clases de caracteres y su equivalente en re ([^] es cualquier carácter)
+CLASES = {'[ab]': '[ab]', '[b-c]': '[b-c]', '[^a]': '[^a]', '[^]': r'[\s\S]'}
+# Todos los textos hasta esta longitud se prueban con fullmatch; search y finditer usan textos
+# aleatorios más largos
+LONGITUD_EXHAUSTIVA = 4
+LONGITUD_ALEATORIA = 12
+TEXTOS_ALEATORIOS = 20
+# Memoria del AFD perezoso de la verificación: pequeña para que la caché desaloje estados
+MEMORIA_PEREZOSO = 2000
+
+
+def generar_expresion(generador, profundidad=3, previas=None):
+    # Devuelve (expresion, equivalente_re, ilimitada), con ilimitada si contiene '*', '+' o {m,}
+    # (sobre una subexpresión ilimitada solo se aplican repeticiones acotadas). Con cierta
+    # probabilidad reutiliza una subexpresión ya generada, para ejercitar compartir_subexpresiones.
+    if previas is None:
+        previas = []
+    if previas and generador.random() < 0.15:
+        return generador.choice(previas)
+    if profundidad == 0 or generador.random() < 0.3:
+        sorteo = generador.random()
+        if sorteo < 0.7:
+            caracter = generador.choice(ALFABETO)
+            generada = (caracter, caracter, False)
+        elif sorteo < 0.9:
+            clase = generador.choice(list(CLASES))
+            generada = (clase, CLASES[clase], False)
+        else:
+            generada = ('^', '(?:)', False)
+    else:
+        operador = generador.choice('..||*+?{')
+        if operador in '.|':
+            primera, equivalente_1, ilimitada_1 = generar_expresion(generador, profundidad - 1, previas)
+            segunda, equivalente_2, ilimitada_2 = generar_expresion(generador, profundidad - 1, previas)
+            if operador == '.':
+                # Concatenación implícita o con '.' explícito
+                expresion = f"({primera}){generador.choice(('', '.'))}({segunda})"
+                equivalente = f'(?:{equivalente_1})(?:{equivalente_2})'
+            else:
+                expresion = f"({primera}){generador.choice('|,')}({segunda})"
+                equivalente = f'(?:{equivalente_1}|{equivalente_2})'
+            generada = (expresion, equivalente, ilimitada_1 or ilimitada_2)
+        else:
+            operando, equivalente, ilimitada = generar_expresion(generador, profundidad - 1, previas)
+            if ilimitada and operador in '*+':
+                operador = generador.choice('?{')
+            if operador == '{':
+                minimo = generador.randint(0, 2)
+                maximo = minimo + generador.randint(0, 2)
+                formas = [f'{{{minimo}}}', f'{{{minimo},{maximo}}}', f'{{,{maximo}}}']
+                if not ilimitada:
+                    formas.append(f'{{{minimo},}}')
+                operador = generador.choice(formas)
+            generada = (f'({operando}){operador}', f'(?:{equivalente}){operador}',
+                        ilimitada or operador in '*+' or operador.endswith(',}'))
+    previas.append(generada)
+    return generada
+
+
+def _fin_mas_largo(patron, texto, inicio):
+    # Fin de la coincidencia más larga de patron anclada en inicio, o None
+    for fin in range(len(texto), inicio - 1, -1):
+        if patron.fullmatch(texto, inicio, fin):
+            return fin
+    return None
+
+
+def esperado_match(patron, texto, inicio=0):
+    fin = _fin_mas_largo(patron, texto, inicio)
+    return None if fin is None else (inicio, fin)
+
+
+def esperado_search(patron, texto, inicio=0):
+    encontrada = patron.search(texto, inicio)
+    if encontrada is None:
+        return None
+    return encontrada.start(), _fin_mas_largo(patron, texto, encontrada.start())
+
+
+def esperado_finditer(patron, texto):
+    # Coincidencias sin solapamiento; tras una coincidencia vacía se avanza un carácter
+    resultado = []
+    posicion = 0
+    while posicion <= len(texto):
+        encontrada = esperado_search(patron, texto, posicion)
+        if encontrada is None:
+            break
+        resultado.append(encontrada)
+        inicio, fin = encontrada
+        posicion = fin if fin > inicio else fin + 1
+    return resultado
+
+
+def _comprobaciones(expresion):
+    # (nombre, función(operación, texto)) de cada forma de compilar la expresión
+    thompson = compilar(expresion, afd=True)
+    simuladores = {
+        'thompson': thompson.crear_simulador(),
+        'sin_prefiltro': thompson.crear_simulador(prefiltro=False),
+        'optimizado': compilar(expresion, optimizar=True).crear_simulador(),
+        'glushkov': compilar(expresion, construccion=CONSTRUCCION_GLUSHKOV).crear_simulador(),
+        'compartido': compilar(expresion, compartir=True).crear_simulador(),
+    }
+    comprobaciones = {}
+    for nombre, simulador in simuladores.items():
+        comprobaciones[nombre] = {
+            'fullmatch': simulador.fullmatch,
+            'match': simulador.match,
+            'search': simulador.search,
+            'finditer': lambda texto, simulador=simulador: list(simulador.finditer(texto)),
+        }
+    comprobaciones['afd_minimo'] = {'fullmatch': thompson.afd.fullmatch, 'match': thompson.afd.match}
+    perezoso = AFDPerezoso(simuladores['thompson'], limite_memoria=MEMORIA_PEREZOSO)
+    comprobaciones['afd_perezoso'] = {'fullmatch': perezoso.fullmatch, 'match': perezoso.match,
+                                      'search': perezoso.search}
+    return comprobaciones
+
+
+def verificar_expresion(expresion, equivalente, textos_exhaustivos, textos_aleatorios):
+    # Compara una expresión con re en todos los textos. Devuelve (conteos, fallos): conteos por
+    # forma de compilar y operación, y una lista de (forma, operación, texto, esperado, obtenido).
+    patron = re.compile(equivalente)
+    esperados = {
+        'fullmatch': lambda texto: patron.fullmatch(texto) is not None,
+        'match': lambda texto: esperado_match(patron, texto),
+        'search': lambda texto: esperado_search(patron, texto),
+        'finditer': lambda texto: esperado_finditer(patron, texto),
+    }
+    conteos = {}
+    fallos = []
+    for nombre, operaciones in _comprobaciones(expresion).items():
+        for operacion, funcion in operaciones.items():
+            textos = textos_exhaustivos + textos_aleatorios if operacion == 'fullmatch' else textos_aleatorios
+            conteos[nombre, operacion] = len(textos)
+            for texto in textos:
+                esperado = esperados[operacion](texto)
+                obtenido = funcion(texto)
+                if obtenido != esperado:
+                    fallos.append((nombre, operacion, texto, esperado, obtenido))
+    return conteos, fallos
+
+
+def verificar(casos=300, semilla=0, profundidad=3):
+    # Verifica casos expresiones aleatorias. Devuelve un diccionario con los conteos por forma de
+    # compilar y operación, y los fallos (expresión, equivalente en re y diferencia encontrada).
+    generador = random.Random(semilla)
+    textos_exhaustivos = [''.join(caracteres) for longitud in range(LONGITUD_EXHAUSTIVA + 1)
+                          for caracteres in itertools.product(CARACTERES_TEXTO, repeat=longitud)]
+    conteos = {}
+    fallos = []
+    for _ in range(casos):
+        expresion, equivalente, _ = generar_expresion(generador, profundidad)
+        textos_aleatorios = [''.join(generador.choice(CARACTERES_TEXTO)
+                                     for _ in range(generador.randint(0, LONGITUD_ALEATORIA)))
+                             for _ in range(TEXTOS_ALEATORIOS)]
+        try:
+            conteos_expresion, fallos_expresion = verificar_expresion(expresion, equivalente, textos_exhaustivos,
+                                                                      textos_aleatorios)
+        except (ErrorSintaxis, re.error) as error:
+            fallos.append({'expresion': expresion, 'equivalente': equivalente,
+                           'error': f"{type(error).__name__}: {error}"})
+            continue
+        for clave, cantidad in conteos_expresion.items():
+            conteos[clave] = conteos.get(clave, 0) + cantidad
+        fallos.extend({'expresion': expresion, 'equivalente': equivalente, 'forma': nombre, 'operacion': operacion,
+                       'texto': texto, 'esperado': esperado, 'obtenido': obtenido}
+                      for nombre, operacion, texto, esperado, obtenido in fallos_expresion)
+    return {'casos': casos, 'semilla': semilla, 'conteos': conteos, 'fallos': fallos}
+
+
+def ejecutar_cli(argumentos=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compara los autómatas del proyecto con el módulo re "
+                                                 "sobre expresiones y textos aleatorios.")
+    parser.add_argument('--casos', type=int, default=300, help="expresiones aleatorias a verificar")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--profundidad', type=int, default=3, help="anidamiento máximo de las expresiones")
+    parser.add_argument('--mostrar', type=int, default=10, help="fallos que se muestran como máximo")
+    opciones = parser.parse_args(argumentos)
+
+    informe = verificar(opciones.casos, opciones.semilla, opciones.profundidad)
+    for (nombre, operacion), cantidad in sorted(informe['conteos'].items()):
+        fallidos = sum(1 for fallo in informe['fallos'] if fallo.get('forma') == nombre and fallo.get('operacion') == operacion)
+        print(f"{nombre:14} {operacion:9} {cantidad:7} textos, {fallidos} fallos")
+    for fallo in informe['fallos'][:opciones.mostrar]:
+        print(fallo)
+    print(f"{opciones.casos} expresiones, {len(informe['fallos'])} fallos")
+    return 1 if informe['fallos'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(ejecutar_cli())